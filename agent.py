@@ -27,6 +27,7 @@ from metta.utils import LLM, process_query
 from metta.scheduler import ScheduledTaskManager
 from metta.email_service import email_service
 from metta.stock_monitor import stock_monitor
+from metta.query_executor import query_executor, QueryBusyError
 
 agent = Agent(name="Semiconductor Market Intelligence Agent", port=8008, mailbox=True, publish_agent_details=True, readme_path = "README.md")
 
@@ -56,6 +57,80 @@ task_manager = ScheduledTaskManager(rag, llm)
 
 chat_proto = Protocol(spec=chat_protocol_spec)
 
+async def answer_query(ctx: Context, sender: str, user_query: str):
+    """Process a chat query on the query executor and send the answer back"""
+    terminal_width = shutil.get_terminal_size().columns
+    separator = "=" * terminal_width
+    dash_line = "-" * terminal_width
+    
+    print(f"\n{separator}")
+    print("📩 NEW REQUEST RECEIVED")
+    print(separator)
+    print(f"👤 From: {sender}")
+    print(f"❓ Query: {user_query}")
+    print(f"⏰ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(dash_line)
+    
+    try:
+        print("🔍 Processing query...")
+        response = await query_executor.run(process_query, user_query, rag, llm)
+        
+        print("\n✅ RESPONSE GENERATED")
+        print(dash_line)
+        
+        if isinstance(response, dict):
+            selected_q = response.get('selected_question', user_query)
+            answer = response.get('humanized_answer', 'I apologize, but I could not process your query.')
+            
+            print(f"📌 Question: {selected_q}")
+            print(f"\n💡 Answer:\n{answer}")
+            
+            # Use raw response directly without formatting
+            answer_text = f"🔹 {selected_q}\n\n{answer}"
+        else:
+            # Use raw response directly without formatting
+            answer_text = str(response)
+            print(f"💡 Response:\n{answer_text}")
+        
+        print(dash_line)
+        print("✉️  Sending response to user...")
+        await ctx.send(sender, create_text_chat(answer_text))
+        print("✅ Response sent successfully!")
+        print(f"{separator}\n")
+        
+    except QueryBusyError as e:
+        ctx.logger.warning(f"Turning away query from {sender}: {e}")
+        print(f"\n⏳ Too many queries pending ({e}), asking the user to retry")
+        await ctx.send(
+            sender,
+            create_text_chat("I'm handling many market queries right now. Please try again in a few minutes.")
+        )
+        print(f"{separator}\n")
+        
+    except asyncio.TimeoutError:
+        ctx.logger.error(f"Query from {sender} timed out after {query_executor.timeout:.0f}s")
+        print(f"\n⏱️  Query timed out after {query_executor.timeout:.0f}s")
+        await ctx.send(
+            sender,
+            create_text_chat("I apologize, but your semiconductor market query took too long to process. Please try again.")
+        )
+        print("✉️  Timeout message sent to user")
+        print(f"{separator}\n")
+        
+    except Exception as e:
+        ctx.logger.error(f"Error processing semiconductor market query: {e}")
+        print("\n❌ ERROR OCCURRED")
+        print(dash_line)
+        print(f"⚠️  Error: {str(e)}")
+        print(dash_line)
+        
+        await ctx.send(
+            sender, 
+            create_text_chat("I apologize, but I encountered an error processing your semiconductor market query. Please try again.")
+        )
+        print("✉️  Error message sent to user")
+        print(f"{separator}\n")
+
 @chat_proto.on_message(ChatMessage)
 async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
     ctx.storage.set(str(ctx.session), sender)
@@ -80,54 +155,8 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
             user_query = item.text.strip()
             ctx.logger.info(f"Got a semiconductor market query from {sender}: {user_query}")
             
-            print(f"\n{separator}")
-            print("📩 NEW REQUEST RECEIVED")
-            print(separator)
-            print(f"👤 From: {sender}")
-            print(f"❓ Query: {user_query}")
-            print(f"⏰ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(dash_line)
-            
-            try:
-                print("🔍 Processing query...")
-                response = process_query(user_query, rag, llm)
-                
-                print("\n✅ RESPONSE GENERATED")
-                print(dash_line)
-                
-                if isinstance(response, dict):
-                    selected_q = response.get('selected_question', user_query)
-                    answer = response.get('humanized_answer', 'I apologize, but I could not process your query.')
-                    
-                    print(f"📌 Question: {selected_q}")
-                    print(f"\n💡 Answer:\n{answer}")
-                    
-                    # Use raw response directly without formatting
-                    answer_text = f"🔹 {selected_q}\n\n{answer}"
-                else:
-                    # Use raw response directly without formatting
-                    answer_text = str(response)
-                    print(f"💡 Response:\n{answer_text}")
-                
-                print(dash_line)
-                print("✉️  Sending response to user...")
-                await ctx.send(sender, create_text_chat(answer_text))
-                print("✅ Response sent successfully!")
-                print(f"{separator}\n")
-                
-            except Exception as e:
-                ctx.logger.error(f"Error processing semiconductor market query: {e}")
-                print("\n❌ ERROR OCCURRED")
-                print(dash_line)
-                print(f"⚠️  Error: {str(e)}")
-                print(dash_line)
-                
-                await ctx.send(
-                    sender, 
-                    create_text_chat("I apologize, but I encountered an error processing your semiconductor market query. Please try again.")
-                )
-                print("✉️  Error message sent to user")
-                print(f"{separator}\n")
+            # Answer in the background, so the handler returns and other messages keep flowing
+            query_executor.submit(answer_query(ctx, sender, user_query))
         else:
             ctx.logger.info(f"Got unexpected content from {sender}")
             print(f"⚠️  Unexpected content type from {sender}")
@@ -151,13 +180,15 @@ async def startup(ctx: Context):
         print("📧 Email service: ✅ Configured")
         print(f"📨 Reports will be sent to: {email_service.recipient_email}")
         
-        # Send startup notification email
-        print("📮 Sending startup notification email...")
-        startup_success = email_service.send_startup_notification()
-        if startup_success:
-            print("✅ Startup notification email sent successfully!")
-        else:
-            print("❌ Failed to send startup notification email")
+        # Send startup notification email, unless one went out just before a restart
+        if task_manager.startup_notification_due():
+            print("📮 Sending startup notification email...")
+            startup_success = email_service.send_startup_notification()
+            task_manager.record_startup_notification(startup_success)
+            if startup_success:
+                print("✅ Startup notification email sent successfully!")
+            else:
+                print("❌ Failed to send startup notification email")
     else:
         print("📧 Email service: ⚠️  Not configured")
         print("   Set EMAIL_USER, EMAIL_PASSWORD, RECIPIENT_EMAIL in .env file")
@@ -0,0 +1,78 @@
+import threading
+import time
+from typing import Dict, Optional
+from .storage import data_path, load_json, save_json
+
+# Alert states of a symbol; "cooling" is a quiet spell after an alert, before returning to normal
+NORMAL, HIGH, EXTREME, COOLING = "normal", "high", "extreme", "cooling"
+
+SEVERITY_RANK = {None: 0, HIGH: 1, EXTREME: 2}
+
+# Seconds a symbol must stay quiet after an alert of each severity before it can alert again
+DEFAULT_COOLDOWNS = {
+    HIGH: 30 * 60,
+    EXTREME: 60 * 60,
+}
+
+class AlertStateMachine:
+    """Per-symbol alert state (normal → high → extreme → cooling), persisted across restarts
+
+    An alert fires only when a symbol leaves normal or escalates above the highest
+    severity it already alerted on. A symbol that stays volatile for the rest of the
+    session does not re-alert; one that calms down and flares up again at the same
+    level does only once the cooldown of its peak severity has passed since it went
+    quiet. A new trading session starts every symbol afresh.
+    """
+
+    def __init__(self, path: Optional[str] = None, cooldowns: Optional[Dict[str, float]] = None):
+        self.path = path or data_path("alert_state.json")
+        self.cooldowns = dict(DEFAULT_COOLDOWNS, **(cooldowns or {}))
+        self._records: Dict[str, Dict] = load_json(self.path, {}) or {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol: str, severity: Optional[str], change_percent: Optional[float] = None,
+               now: Optional[float] = None, session: Optional[str] = None) -> bool:
+        """Feed the latest severity of a symbol (None when quiet); returns True if an alert should fire
+
+        `session` is the symbol's trading day (YYYY-MM-DD); it defaults to the local date of `now`.
+        """
+        now = now or time.time()
+        session = session or time.strftime("%Y-%m-%d", time.localtime(now))
+        with self._lock:
+            record = self._records.get(symbol) or {"state": NORMAL, "peak": None}
+            previous = dict(record)
+            fire = False
+
+            if severity:
+                peak = record["peak"]
+                cooled = (record.get("cooling_since") is not None
+                          and now - record["cooling_since"] >= self.cooldowns[peak])
+                if peak and (cooled or record.get("session", session) != session):
+                    # Quiet for a full cooldown (with no update to close it), or a new session
+                    record = {"state": NORMAL, "peak": None}
+                if SEVERITY_RANK[severity] > SEVERITY_RANK[record["peak"]]:
+                    # New alert, or an escalation (high → extreme), even while cooling
+                    fire = True
+                    record.update(peak=severity, last_alert_at=now, last_alert_change=change_percent, session=session)
+                record["state"] = record["peak"]
+                record.pop("cooling_since", None)
+            elif record["state"] in (HIGH, EXTREME):
+                record.update(state=COOLING, cooling_since=now)
+            elif record["state"] == COOLING and now - record["cooling_since"] >= self.cooldowns[record["peak"]]:
+                record = {"state": NORMAL, "peak": None}
+
+            if record != previous:
+                if record["state"] == NORMAL:
+                    self._records.pop(symbol, None)
+                else:
+                    self._records[symbol] = record
+                save_json(self.path, self._records)
+            return fire
+
+    def state(self, symbol: str) -> str:
+        """Current alert state of a symbol"""
+        return self._records.get(symbol, {}).get("state", NORMAL)
+
+    def active(self) -> Dict[str, Dict]:
+        """Every symbol that is not in the normal state"""
+        return {symbol: dict(record) for symbol, record in self._records.items()}
@@ -0,0 +1,89 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from .stock_data import StockDataFetcher, stock_fetcher
+
+class AsyncStockFetcher:
+    """Async facade over StockDataFetcher
+
+    Blocking yfinance calls run on a bounded thread pool, so coroutines awaiting
+    market data never block the event loop. Each call has a timeout, and fan-out
+    helpers yield results as they complete instead of in submission order.
+    """
+
+    def __init__(self, fetcher: StockDataFetcher, max_concurrency: int = 8, timeout: float = 30.0):
+        self.fetcher = fetcher
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        # The pool size is the concurrency limit: extra calls queue until a worker frees up
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="market-data")
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a blocking fetcher call on the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        return await asyncio.wait_for(future, timeout or self.timeout)
+
+    async def map_as_completed(self, func: Callable, items: Iterable,
+                               timeout: Optional[float] = None) -> AsyncIterator[Tuple[Any, Any]]:
+        """Call `func(item)` for every item concurrently, yielding (item, result) as each finishes
+
+        Failed or timed-out items yield (item, None) so one slow symbol never holds up the rest.
+        """
+        async def call(item):
+            try:
+                return item, await self.run(func, item, timeout=timeout)
+            except asyncio.TimeoutError:
+                print(f"⏱️ Market data request for {item} timed out")
+            except Exception as e:
+                print(f"❌ Market data request for {item} failed: {e}")
+            return item, None
+
+        tasks = [asyncio.ensure_future(call(item)) for item in items]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_current_price(self, symbol: str) -> Optional[Dict]:
+        """Async get_current_price"""
+        return await self.run(self.fetcher.get_current_price, symbol)
+
+    async def get_price_at_time(self, symbol: str, minutes_ago: int) -> Optional[float]:
+        """Async get_price_at_time"""
+        return await self.run(self.fetcher.get_price_at_time, symbol, minutes_ago)
+
+    async def fetch_company_stock_data(self, company_name: str) -> Optional[Dict]:
+        """Async fetch_company_stock_data"""
+        return await self.run(self.fetcher.fetch_company_stock_data, company_name)
+
+    async def fetch_bulk_company_data(self, company_names: List[str], with_fundamentals: bool = False) -> Dict[str, Dict]:
+        """Async fetch_bulk_company_data; missing fundamentals are fetched concurrently"""
+        quotes = await self.run(self.fetcher.fetch_bulk_company_data, company_names)
+        if not with_fundamentals:
+            return quotes
+
+        # ticker.info is one request per symbol, so fan those out instead of
+        # letting the bulk call fetch them one after another
+        missing = {}
+        for stock_data in quotes.values():
+            symbol = stock_data['symbol']
+            session = self.fetcher.bar_store.session_date(symbol)
+            if session and not self.fetcher.fundamentals.get(symbol, session):
+                missing[symbol] = session
+        async for _ in self.map_as_completed(lambda symbol: self.fetcher.get_fundamentals(symbol, missing[symbol]), missing):
+            pass
+
+        # Bars are cached by now, so this only fills in market caps
+        return await self.run(self.fetcher.fetch_bulk_company_data, company_names, with_fundamentals=True)
+
+# Global instance
+async_stock_fetcher = AsyncStockFetcher(
+    stock_fetcher,
+    max_concurrency=int(os.getenv("MARKET_DATA_CONCURRENCY", "8")),
+    timeout=float(os.getenv("MARKET_DATA_TIMEOUT", "30"))
+)
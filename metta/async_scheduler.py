@@ -0,0 +1,305 @@
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from .storage import data_path, load_json, save_json
+
+# Seconds between the catch-up runs of different jobs after a restart
+CATCH_UP_SPACING = 30
+
+def _parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    """Values matched by one cron field: *, */n, a, a-b, a-b/n and comma lists of those"""
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part in ("*", ""):
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = end = int(part)
+        if start < low or end > high or step < 1:
+            raise ValueError(f"Cron field {field!r} is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronTrigger:
+    """Fires at the wall-clock times matched by a 5-field cron expression (minute hour day month weekday)
+
+    Weekdays follow standard cron: 0-7 with both 0 and 7 = Sunday, so 1-5 is Monday
+    to Friday. As in cron, when both day of month and weekday are restricted, a day
+    matching either one fires. Times are in the host's local time zone, like the
+    rest of the scheduler output.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression {expression!r} needs 5 fields")
+        self.expression = expression
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        self.weekdays = {day % 7 for day in _parse_cron_field(fields[4], 0, 7)}
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def _matches_day(self, day: datetime) -> bool:
+        in_days = day.day in self.days
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays  # cron counts from Sunday
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_fire(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after`"""
+        candidate = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Walk day by day, then within the day by hour and minute, never minute by minute over days
+        for _ in range(366 * 4):
+            if candidate.month in self.months and self._matches_day(candidate):
+                for hour in sorted(h for h in self.hours if h >= candidate.hour):
+                    start_minute = candidate.minute if hour == candidate.hour else 0
+                    for minute in sorted(m for m in self.minutes if m >= start_minute):
+                        return candidate.replace(hour=hour, minute=minute)
+            candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+    def __repr__(self):
+        return f"cron({self.expression})"
+
+class IntervalTrigger:
+    """Fires every `seconds`, counted from the previous scheduled fire time"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def next_fire(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds)
+
+    def __repr__(self):
+        return f"every {self.seconds:g}s"
+
+class LeadTrigger:
+    """Fires a fixed number of seconds before each fire time of another trigger"""
+
+    def __init__(self, trigger, lead_seconds: float):
+        self.trigger = trigger
+        self.lead = timedelta(seconds=lead_seconds)
+
+    def next_fire(self, after: datetime) -> datetime:
+        return self.trigger.next_fire(after + self.lead) - self.lead
+
+    def __repr__(self):
+        return f"{self.lead.total_seconds():g}s before {self.trigger!r}"
+
+class JobJournal:
+    """Last run, outcome, duration and next due time of each job, persisted across restarts
+
+    Times are stored as local ISO timestamps, like the scheduler's fire times.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_path("job_journal.json")
+        self._records: Dict[str, Dict] = load_json(self.path, {}) or {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Dict:
+        with self._lock:
+            return dict(self._records.get(name, {}))
+
+    def time(self, name: str, field: str) -> Optional[datetime]:
+        """A recorded time of a job, or None"""
+        value = self.get(name).get(field)
+        return datetime.fromisoformat(value) if value else None
+
+    def update(self, name: str, **fields):
+        """Record fields of a job (datetimes are stored as ISO strings)"""
+        with self._lock:
+            record = self._records.setdefault(name, {})
+            for field, value in fields.items():
+                record[field] = value.isoformat(timespec="seconds") if isinstance(value, datetime) else value
+            save_json(self.path, self._records)
+
+    def records(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: dict(record) for name, record in self._records.items()}
+
+class Job:
+    """A coroutine function run on a trigger (or only on demand, without one)
+
+    `catch_up` is how many seconds late a fire time missed while the agent was down
+    may still be run after a restart; None never catches up.
+    """
+
+    def __init__(self, name: str, func: Callable[[], Awaitable], trigger, jitter: float = 0.0,
+                 allow_overlap: bool = False, catch_up: Optional[float] = None):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.jitter = jitter
+        self.allow_overlap = allow_overlap
+        self.catch_up = catch_up
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+        self.running: Set[asyncio.Task] = set()
+        self.skipped = 0
+
+    def is_running(self) -> bool:
+        return bool(self.running)
+
+class AsyncScheduler:
+    """Runs jobs on the event loop it is started on, without threads or extra loops
+
+    Each job sleeps until its trigger's next fire time (plus optional random jitter),
+    then starts its coroutine as a task. A job that is still running when it comes
+    due again is skipped unless it allows overlap, so long runs never stack up.
+    With a journal, each run is recorded; on start, a job that missed (or was
+    interrupted in) a fire time gets one catch-up run, spaced apart from other
+    jobs' catch-ups, and a fire time that already completed is never run again.
+    """
+
+    def __init__(self, journal: Optional[JobJournal] = None):
+        self.jobs: Dict[str, Job] = {}
+        self.journal = journal
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add_job(self, name: str, func: Callable[[], Awaitable], trigger, jitter: float = 0.0,
+                allow_overlap: bool = False, catch_up: Optional[float] = None) -> Job:
+        """Register a job; it starts with the scheduler (or right away if already started)"""
+        job = Job(name, func, trigger, jitter, allow_overlap, catch_up)
+        self.jobs[name] = job
+        if self._tasks and trigger is not None:
+            self._tasks[name] = asyncio.create_task(self._run_job(job))
+        return job
+
+    def start(self):
+        """Start every job's timer on the running event loop, catching up missed runs one at a time"""
+        catch_up_delay = 0.0
+        for name, job in self.jobs.items():
+            if job.trigger is None:
+                continue
+            if name not in self._tasks or self._tasks[name].done():
+                missed = self._missed_run(job)
+                self._tasks[name] = asyncio.create_task(self._run_job(job, missed, catch_up_delay))
+                if missed:
+                    catch_up_delay += CATCH_UP_SPACING
+
+    def _missed_run(self, job: Job) -> Optional[datetime]:
+        """The fire time a job missed or was interrupted in while the agent was down, if worth catching up"""
+        if self.journal is None or job.catch_up is None:
+            return None
+        record = self.journal.get(job.name)
+        now = datetime.now()
+        next_due = self.journal.time(job.name, "next_due")
+        last_slot = self.journal.time(job.name, "last_slot")
+        if record.get("outcome") in ("running", "cancelled") and last_slot:
+            missed = last_slot  # killed or shut down mid-run
+        elif next_due and next_due <= now:
+            missed = next_due
+        else:
+            return None
+        if missed == last_slot and record.get("outcome") == "ok":
+            return None
+        if (now - missed).total_seconds() > job.catch_up:
+            print(f"⏭️  Not catching up {job.name} missed at {missed:%Y-%m-%d %H:%M}: too late")
+            return None
+        return missed
+
+    def stop(self):
+        """Cancel job timers and any job runs in progress"""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        for job in self.jobs.values():
+            for run in list(job.running):
+                run.cancel()
+            job.next_run = None
+
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self._tasks.values())
+
+    def next_run(self, name: str) -> Optional[datetime]:
+        """Next scheduled fire time of a job, before jitter"""
+        job = self.jobs[name]
+        if job.next_run:
+            return job.next_run
+        return job.trigger.next_fire(datetime.now()) if job.trigger else None
+
+    def run_now(self, name: str) -> Optional[asyncio.Task]:
+        """Start a job immediately, outside its schedule (respecting overlap prevention)"""
+        return self._launch(self.jobs[name])
+
+    def _launch(self, job: Job, slot: Optional[datetime] = None) -> Optional[asyncio.Task]:
+        if job.running and not job.allow_overlap:
+            job.skipped += 1
+            print(f"⏭️  Skipping {job.name}: previous run still in progress")
+            return None
+        job.last_run = datetime.now()
+        if self.journal and slot:
+            self.journal.update(job.name, last_run=job.last_run, last_slot=slot, outcome="running")
+        run = asyncio.create_task(self._execute(job, slot))
+        job.running.add(run)
+        run.add_done_callback(job.running.discard)
+        return run
+
+    async def _execute(self, job: Job, slot: Optional[datetime] = None):
+        started = time.monotonic()
+        outcome = "ok"
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = "error"
+            print(f"❌ Error in scheduled job {job.name}: {e}")
+        finally:
+            # Manual runs are not journaled, so they never stand in for a scheduled one
+            if self.journal and slot:
+                self.journal.update(job.name, outcome=outcome, duration=round(time.monotonic() - started, 1))
+
+    def _schedule_next(self, job: Job, after: datetime):
+        job.next_run = job.trigger.next_fire(after)
+        if self.journal:
+            self.journal.update(job.name, next_due=job.next_run)
+
+    async def _run_job(self, job: Job, missed: Optional[datetime] = None, catch_up_delay: float = 0.0):
+        """Sleep until each fire time and launch the job"""
+        self._schedule_next(job, datetime.now())
+        if missed:
+            await asyncio.sleep(catch_up_delay)
+            print(f"⏪ Catching up {job.name} missed at {missed:%Y-%m-%d %H:%M}")
+            self._launch(job, missed)
+        while True:
+            fire_at = job.next_run + timedelta(seconds=random.uniform(0, job.jitter) if job.jitter else 0)
+            # Sleep in bounded steps so wall-clock changes (suspend, NTP) are picked up
+            remaining = (fire_at - datetime.now()).total_seconds()
+            while remaining > 0:
+                await asyncio.sleep(min(remaining, 60))
+                remaining = (fire_at - datetime.now()).total_seconds()
+            self._launch(job, job.next_run)
+            # Fire times missed while the loop was blocked or the host slept are skipped, not replayed
+            self._schedule_next(job, max(job.next_run, datetime.now()))
+
+    def status(self) -> List[Dict]:
+        """Per-job schedule and run state"""
+        status = []
+        for job in self.jobs.values():
+            record = self.journal.get(job.name) if self.journal else {}
+            status.append({
+                "name": job.name,
+                "trigger": repr(job.trigger) if job.trigger else "manual",
+                "next_run": job.next_run.strftime("%Y-%m-%d %H:%M:%S") if job.next_run else None,
+                "last_run": job.last_run.strftime("%Y-%m-%d %H:%M:%S") if job.last_run else record.get("last_run"),
+                "last_outcome": record.get("outcome"),
+                "last_duration": record.get("duration"),
+                "running": job.is_running(),
+                "skipped": job.skipped,
+            })
+        return status
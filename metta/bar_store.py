@@ -0,0 +1,204 @@
+import threading
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+import pandas as pd
+
+# Column order of the OHLCV block in each buffer
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+# 1m bars for a full extended-hours US session (04:00-20:00 ET)
+DEFAULT_CAPACITY = 960
+
+class BarWindow(NamedTuple):
+    """Read-only views of the most recent bars of one symbol (oldest first)"""
+    timestamps: np.ndarray  # epoch seconds (UTC) of each bar open
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    tz: Optional[str]
+
+    def __len__(self):
+        return len(self.timestamps)
+
+class _SymbolBuffer:
+    """Preallocated ring buffer of 1m bars for one symbol
+
+    Every bar is written twice, at slot i and i + capacity, so the latest n bars
+    are always one contiguous slice and can be handed out as views.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self.values = np.zeros((len(FIELDS), 2 * capacity), dtype=np.float64)
+        self.head = 0   # next slot to write, in [0, capacity)
+        self.count = 0
+        self.session_start = 0  # epoch seconds of the first bar of the current session
+        self.tz = None
+
+    def reset(self, session_start: int):
+        """Forget the previous session's bars"""
+        self.head = 0
+        self.count = 0
+        self.session_start = session_start
+
+    def local_date(self, timestamp: int):
+        """Exchange-local date of a bar"""
+        moment = pd.Timestamp(timestamp, unit="s", tz="UTC")
+        return (moment.tz_convert(self.tz) if self.tz else moment).date()
+
+    def start_session_if_new(self, timestamp: int):
+        """Reset the buffer when `timestamp` is the first bar of a later trading day"""
+        last = self.last_timestamp()
+        if last is not None and timestamp > last and self.local_date(timestamp) != self.local_date(last):
+            self.reset(timestamp)
+
+    def last_timestamp(self) -> Optional[int]:
+        if not self.count:
+            return None
+        return int(self.timestamps[self.head + self.capacity - 1])
+
+    def write(self, timestamp: int, row: np.ndarray, overwrite_last: bool = False):
+        slot = (self.head - 1) % self.capacity if overwrite_last else self.head
+        self.timestamps[slot] = self.timestamps[slot + self.capacity] = timestamp
+        self.values[:, slot] = self.values[:, slot + self.capacity] = row
+        if not overwrite_last:
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def window(self, n: int) -> BarWindow:
+        n = min(n, self.count)
+        end = self.head + self.capacity
+        start = end - n
+        return BarWindow(self.timestamps[start:end], *self.values[:, start:end], self.tz)
+
+def to_epoch_seconds(index: pd.Index) -> np.ndarray:
+    """Convert a DatetimeIndex to UTC epoch seconds"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.values.astype("datetime64[s]").astype(np.int64)
+
+class IntradayBarStore:
+    """Columnar in-memory store of the current trading day's 1m bars per symbol
+
+    Memory per symbol is fixed at construction, so the footprint grows only with
+    the number of symbols, never with the number of bars received. The first bar
+    of a new exchange-local day clears the previous day's bars.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._buffers: Dict[str, _SymbolBuffer] = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol: str, hist: pd.DataFrame, session: bool = True) -> int:
+        """Append only bars newer than the last stored one; returns how many were added
+
+        `hist` is a yfinance 1m frame. With `session=True` it is treated as the
+        whole current session (period="1d"), which marks where the session starts.
+        """
+        if hist is None or hist.empty:
+            return 0
+
+        timestamps = to_epoch_seconds(hist.index)
+        values = hist.reindex(columns=list(FIELDS)).to_numpy(dtype=np.float64, na_value=np.nan).T
+
+        with self._lock:
+            buffer = self._buffers.get(symbol)
+            if buffer is None:
+                buffer = self._buffers[symbol] = _SymbolBuffer(self.capacity)
+
+            tz = getattr(hist.index, "tz", None)
+            if tz is not None:
+                buffer.tz = str(tz)
+            last = buffer.last_timestamp()
+            newer = timestamps[timestamps > last] if last is not None else timestamps
+            if len(newer):
+                buffer.start_session_if_new(int(newer[0]))
+            if session:
+                buffer.session_start = max(buffer.session_start, int(timestamps[0]))
+
+            last = buffer.last_timestamp()
+            start = 0 if last is None else int(np.searchsorted(timestamps, last, side="left"))
+            added = 0
+            for i in range(start, len(timestamps)):
+                timestamp = int(timestamps[i])
+                if np.isnan(values[3, i]):
+                    continue
+                # The latest bar keeps updating until its minute closes
+                buffer.write(timestamp, values[:, i], overwrite_last=(timestamp == last))
+                if timestamp != last:
+                    added += 1
+                last = timestamp
+            return added
+
+    def append_bar(self, symbol: str, timestamp: int, open_: float, high: float, low: float,
+                   close: float, volume: float) -> bool:
+        """Append a single bar (e.g. from a streaming source); older bars are ignored"""
+        with self._lock:
+            buffer = self._buffers.get(symbol)
+            if buffer is None:
+                buffer = self._buffers[symbol] = _SymbolBuffer(self.capacity)
+                buffer.session_start = timestamp
+            buffer.start_session_if_new(timestamp)
+
+            last = buffer.last_timestamp()
+            if last is not None and timestamp < last:
+                return False
+            buffer.write(timestamp, np.array([open_, high, low, close, volume], dtype=np.float64),
+                         overwrite_last=(timestamp == last))
+            return timestamp != last
+
+    def window(self, symbol: str, n: Optional[int] = None) -> Optional[BarWindow]:
+        """Views of the latest n bars (all stored bars if n is None)
+
+        The arrays alias the ring buffer; copy them if they must outlive the next
+        `capacity - n` appends.
+        """
+        buffer = self._buffers.get(symbol)
+        if buffer is None or not buffer.count:
+            return None
+        return buffer.window(buffer.count if n is None else n)
+
+    def since(self, symbol: str, timestamp: Optional[int]) -> Optional[BarWindow]:
+        """Views of the bars at or after `timestamp` (all bars if None)"""
+        full = self.window(symbol)
+        if full is None or timestamp is None:
+            return full
+        start = int(np.searchsorted(full.timestamps, timestamp, side="left"))
+        return self.window(symbol, len(full) - start)
+
+    def session(self, symbol: str) -> Optional[BarWindow]:
+        """Views of the bars since the current session started"""
+        buffer = self._buffers.get(symbol)
+        if buffer is None or not buffer.count:
+            return None
+        full = buffer.window(buffer.count)
+        start = int(np.searchsorted(full.timestamps, buffer.session_start, side="left"))
+        return buffer.window(buffer.count - start)
+
+    def last_timestamp(self, symbol: str) -> Optional[int]:
+        """Epoch seconds of the latest stored bar"""
+        buffer = self._buffers.get(symbol)
+        return buffer.last_timestamp() if buffer else None
+
+    def session_date(self, symbol: str) -> Optional[str]:
+        """Exchange-local date (YYYY-MM-DD) of the latest stored bar"""
+        buffer = self._buffers.get(symbol)
+        if buffer is None or not buffer.count:
+            return None
+        latest = pd.Timestamp(buffer.last_timestamp(), unit="s", tz="UTC")
+        if buffer.tz:
+            latest = latest.tz_convert(buffer.tz)
+        return latest.date().isoformat()
+
+    def symbols(self) -> List[str]:
+        """Symbols that have at least one stored bar"""
+        return [symbol for symbol, buffer in self._buffers.items() if buffer.count]
+
+    def memory_bytes(self) -> int:
+        """Total bytes held by the preallocated buffers"""
+        return sum(b.timestamps.nbytes + b.values.nbytes for b in self._buffers.values())
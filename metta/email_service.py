@@ -74,8 +74,8 @@ class EmailService:
             company = alert.get('company', 'Unknown')
             symbol = alert.get('symbol', 'N/A')
             change_percent = alert.get('change_percent', 0)
-            current_price = alert.get('current_price', 'N/A')
-            previous_price = alert.get('previous_price', 'N/A')
+            current_price = alert.get('current_price')
+            previous_price = alert.get('previous_price')
             trigger_reason = alert.get('trigger_reason', 'High volatility')
             time_period = alert.get('time_period', 'recent period')
             llm_analysis = alert.get('llm_analysis', '')
@@ -89,10 +89,12 @@ class EmailService:
                 <h3 style="color: {severity_color}; margin: 0 0 10px 0;">{company} ({symbol})</h3>
                 
                 <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 15px; margin-bottom: 15px;">
+                    {f'''
                     <div>
                         <p style="margin: 5px 0;"><strong>Current Price:</strong> ${current_price}</p>
                         <p style="margin: 5px 0;"><strong>Previous Price:</strong> ${previous_price}</p>
                     </div>
+                    ''' if current_price is not None else ''}
                     <div>
                         <p style="margin: 5px 0;"><strong>Change:</strong> <span style="color: {'red' if change_percent < 0 else 'green'}; font-weight: bold; font-size: 16px;">{change_percent:+.2f}%</span></p>
                         <p style="margin: 5px 0;"><strong>Period:</strong> {time_period}</p>
@@ -0,0 +1,148 @@
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+import exchange_calendars as xcals
+import pandas as pd
+from .storage import data_path, load_json
+
+class Venue(NamedTuple):
+    """Trading hours of one listing venue, in its local time zone"""
+    name: str
+    tz: str
+    sessions: List[Tuple[dtime, dtime]]          # regular trading, lunch breaks split it in two
+    extended: Optional[Tuple[dtime, dtime]] = None  # pre/post-market hours covered by our 1m bars
+    mic: Optional[str] = None                       # exchange_calendars code with the holidays and early closes
+
+# Keyed by the symbol's exchange suffix ("" for US listings)
+VENUES = {
+    "": Venue("US", "America/New_York", [(dtime(9, 30), dtime(16, 0))], (dtime(4, 0), dtime(20, 0)), "XNYS"),
+    "TW": Venue("Taiwan", "Asia/Taipei", [(dtime(9, 0), dtime(13, 30))], mic="XTAI"),
+    "KS": Venue("Korea", "Asia/Seoul", [(dtime(9, 0), dtime(15, 30))], mic="XKRX"),
+    "T": Venue("Tokyo", "Asia/Tokyo", [(dtime(9, 0), dtime(11, 30)), (dtime(12, 30), dtime(15, 30))], mic="XTKS"),
+    "HK": Venue("Hong Kong", "Asia/Hong_Kong", [(dtime(9, 30), dtime(12, 0)), (dtime(13, 0), dtime(16, 0))], mic="XHKG"),
+}
+
+# A market counts as open for this long after its close, so the closing bars are still fetched
+CLOSE_GRACE = timedelta(minutes=5)
+
+class ExchangeCalendar:
+    """Session hours, time zones and holidays of the venues in the watch universe
+
+    Each venue's holidays, half days and lunch breaks come from its exchange_calendars
+    schedule, which follows the exchange's rules (lunar holidays included) for every
+    year it covers. Outside that range, or for venues without one, weekdays are
+    trading days with the venue's regular hours. Extra closures (e.g. typhoon days)
+    can be added in data/holidays.json as {"Taiwan": ["2026-07-29", ...]}. Symbols
+    on venues without an entry (unknown suffixes) are always treated as open.
+    """
+
+    def __init__(self, venues: Optional[Dict[str, Venue]] = None, holidays_path: Optional[str] = None):
+        self.venues = dict(venues or VENUES)
+        holidays = load_json(holidays_path or data_path("holidays.json"), {}) or {}
+        self.holidays = {name: {date.fromisoformat(day) for day in days} for name, days in holidays.items()}
+        self._calendars: Dict[str, Optional[xcals.ExchangeCalendar]] = {}
+        self._days: Dict[Tuple[str, date], Optional[List[Tuple[datetime, datetime]]]] = {}
+
+    def venue(self, symbol: str) -> Optional[Venue]:
+        """Listing venue of a symbol, from its exchange suffix"""
+        suffix = symbol.rsplit(".", 1)[1] if "." in symbol else ""
+        return self.venues.get(suffix)
+
+    def _calendar(self, venue: Venue) -> Optional[xcals.ExchangeCalendar]:
+        """The venue's exchange_calendars calendar, loaded on first use"""
+        if venue.mic not in self._calendars:
+            try:
+                self._calendars[venue.mic] = xcals.get_calendar(venue.mic) if venue.mic else None
+            except Exception as e:
+                print(f"⚠️ No holiday calendar for {venue.name}, assuming weekdays only: {e}")
+                self._calendars[venue.mic] = None
+        return self._calendars[venue.mic]
+
+    def preload(self):
+        """Load every venue's calendar now; each takes seconds, so call this off the event loop"""
+        for venue in self.venues.values():
+            self._calendar(venue)
+
+    def _scheduled_sessions(self, venue: Venue, day: date) -> Optional[List[Tuple[datetime, datetime]]]:
+        """Regular sessions of a day from the exchange's schedule ([] if closed), or None if it has none"""
+        key = (venue.name, day)
+        if key not in self._days:
+            sessions = None
+            calendar = self._calendar(venue)
+            session = pd.Timestamp(day)
+            if calendar is not None and calendar.first_session <= session <= calendar.last_session:
+                sessions = []
+                if calendar.is_session(session):
+                    row = calendar.schedule.loc[session]
+                    bounds = [row["open"], row["break_start"], row["break_end"], row["close"]]
+                    if pd.isna(bounds[1]) or pd.isna(bounds[2]):
+                        bounds = [bounds[0], bounds[3]]
+                    zone = ZoneInfo(venue.tz)
+                    for start, end in zip(bounds[::2], bounds[1::2]):
+                        sessions.append((start.to_pydatetime().astimezone(zone), end.to_pydatetime().astimezone(zone)))
+            self._days[key] = sessions
+        return self._days[key]
+
+    def trading_hours(self, venue: Venue, day: date, extended: bool = False) -> List[Tuple[datetime, datetime]]:
+        """Local open/close times of a venue on a day ([] if it does not trade)
+
+        On half days the extended (post-market) hours end early by as much as the
+        regular session does.
+        """
+        if day in self.holidays.get(venue.name, ()):
+            return []
+        zone = ZoneInfo(venue.tz)
+        regular = [(datetime.combine(day, start, tzinfo=zone), datetime.combine(day, end, tzinfo=zone))
+                   for start, end in venue.sessions]
+        sessions = self._scheduled_sessions(venue, day)
+        if sessions is None:
+            sessions = regular if day.weekday() < 5 else []
+        if not sessions or not (extended and venue.extended):
+            return sessions
+        early_close = regular[-1][1] - sessions[-1][1]
+        return [(datetime.combine(day, venue.extended[0], tzinfo=zone),
+                 datetime.combine(day, venue.extended[1], tzinfo=zone) - max(early_close, timedelta(0)))]
+
+    def is_trading_day(self, venue: Venue, day: date) -> bool:
+        return bool(self.trading_hours(venue, day))
+
+    def is_open(self, symbol: str, at: Optional[datetime] = None, extended: bool = True,
+                grace: timedelta = CLOSE_GRACE) -> bool:
+        """Whether the symbol's market is trading (including pre/post-market when `extended`)"""
+        venue = self.venue(symbol)
+        if venue is None:
+            return True
+        local = (at or datetime.now(timezone.utc)).astimezone(ZoneInfo(venue.tz))
+        return any(opens <= local < closes + grace
+                   for opens, closes in self.trading_hours(venue, local.date(), extended))
+
+    def next_open(self, symbol: str, at: Optional[datetime] = None, extended: bool = True) -> datetime:
+        """When the symbol's market next opens (`at` itself if it is open)"""
+        at = at or datetime.now(timezone.utc)
+        venue = self.venue(symbol)
+        if venue is None or self.is_open(symbol, at, extended, grace=timedelta(0)):
+            return at
+        local = at.astimezone(ZoneInfo(venue.tz))
+        for offset in range(15):
+            for opens, _ in self.trading_hours(venue, local.date() + timedelta(days=offset), extended):
+                if opens > local:
+                    return opens.astimezone(timezone.utc)
+        return at + timedelta(days=1)
+
+    def seconds_until_open(self, symbol: str, at: Optional[datetime] = None) -> float:
+        """Seconds until the symbol's market opens (0 while it is open)"""
+        at = at or datetime.now(timezone.utc)
+        return max(0.0, (self.next_open(symbol, at) - at).total_seconds())
+
+    def open_venues(self, symbols: List[str], at: Optional[datetime] = None) -> List[str]:
+        """Names of the venues of `symbols` that are trading now"""
+        names = []
+        for symbol in symbols:
+            venue = self.venue(symbol)
+            name = venue.name if venue else symbol
+            if name not in names and self.is_open(symbol, at, grace=timedelta(0)):
+                names.append(name)
+        return names
+
+# Global instance
+exchange_calendar = ExchangeCalendar()
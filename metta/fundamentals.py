@@ -0,0 +1,47 @@
+import threading
+import time
+from typing import Dict, Optional
+from .storage import data_path, load_json, save_json
+
+class FundamentalsCache:
+    """Per-session cache of slow-moving fundamentals (previous close, market cap, shares)
+
+    Records are tagged with the trading session they were fetched in and are
+    persisted, so each symbol costs at most one `ticker.info` call per session,
+    across restarts included.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or data_path("fundamentals.json")
+        self._records: Dict[str, Dict] = load_json(self.path, {}) or {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, session: str) -> Optional[Dict]:
+        """Get the record for a symbol if it was fetched during `session`"""
+        record = self._records.get(symbol)
+        if record and record.get("session") == session:
+            return record
+        return None
+
+    def put(self, symbol: str, session: str, previous_close: Optional[float] = None,
+            market_cap: Optional[float] = None, shares_outstanding: Optional[float] = None) -> Dict:
+        """Store the fundamentals for a symbol and persist the cache"""
+        record = {
+            "session": session,
+            "previous_close": previous_close,
+            "market_cap": market_cap,
+            "shares_outstanding": shares_outstanding,
+            "fetched_at": time.time()
+        }
+        with self._lock:
+            self._records[symbol] = record
+            save_json(self.path, self._records)
+        return record
+
+    def market_cap(self, record: Optional[Dict], price: float):
+        """Market cap at `price`, scaled from shares outstanding when known"""
+        if not record:
+            return 'N/A'
+        if record.get("shares_outstanding"):
+            return int(record["shares_outstanding"] * price)
+        return record.get("market_cap") or 'N/A'
@@ -0,0 +1,187 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from .bar_store import to_epoch_seconds
+from .stock_cache import INTERVAL_TTLS
+from .storage import data_path, load_json, save_json
+
+# Fixed-width little-endian records, appended to one flat file per (symbol, interval).
+# The file has no header, so it can be memory-mapped directly as an array of bars.
+BAR_DTYPE = np.dtype([
+    ("timestamp", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+# Intervals worth persisting: completed bars at these sizes never change
+STORED_INTERVALS = {"1d", "5d", "1wk", "1mo", "3mo"}
+
+# Calendar days covered by each yfinance period string
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653,
+}
+
+def period_days(period: str) -> Optional[float]:
+    """Calendar days spanned by a period string (None for "max")"""
+    if period == "max":
+        return None
+    if period == "ytd":
+        today = datetime.now(timezone.utc)
+        return (today - today.replace(month=1, day=1)).days + 1
+    return PERIOD_DAYS.get(period, 31)
+
+class HistoryStore:
+    """On-disk OHLCV store keyed by symbol and interval, synced incrementally"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.path.dirname(data_path("history", "index.json"))
+        self.index_path = os.path.join(self.root, "index.json")
+        # key -> {"tz", "last_sync", "covered_days"}
+        self.index: Dict[str, Dict] = load_json(self.index_path, {}) or {}
+        self._index_dirty = False
+        self._lock = threading.Lock()
+
+    def _key(self, symbol: str, interval: str) -> str:
+        return f"{symbol}_{interval}"
+
+    def _path(self, symbol: str, interval: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", self._key(symbol, interval))
+        return os.path.join(self.root, f"{safe}.bars")
+
+    def read(self, symbol: str, interval: str) -> np.ndarray:
+        """Memory-map every stored bar (read-only, oldest first)"""
+        path = self._path(symbol, interval)
+        # Ignore a partial trailing record left by an interrupted append
+        count = os.path.getsize(path) // BAR_DTYPE.itemsize if os.path.exists(path) else 0
+        if not count:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        """Epoch seconds of the newest stored bar"""
+        records = self.read(symbol, interval)
+        return int(records["timestamp"][-1]) if len(records) else None
+
+    def needs_sync(self, symbol: str, interval: str, period: str) -> bool:
+        """True if the stored bars are older than the interval's TTL or too short for `period`"""
+        meta = self.index.get(self._key(symbol, interval))
+        if not meta or not self.covers(symbol, interval, period):
+            return True
+        return time.time() - meta.get("last_sync", 0) > INTERVAL_TTLS.get(interval, 3600)
+
+    def covers(self, symbol: str, interval: str, period: str) -> bool:
+        """True if a full download at least as long as `period` has been stored"""
+        meta = self.index.get(self._key(symbol, interval))
+        if not meta:
+            return False
+        wanted = period_days(period)
+        covered = meta.get("covered_days")
+        if covered is None:  # "max" was downloaded
+            return True
+        return wanted is not None and covered >= wanted
+
+    def _to_records(self, hist: pd.DataFrame) -> np.ndarray:
+        hist = hist.dropna(subset=["Close"])
+        records = np.empty(len(hist), dtype=BAR_DTYPE)
+        records["timestamp"] = to_epoch_seconds(hist.index)
+        for field, column in (("open", "Open"), ("high", "High"), ("low", "Low"),
+                              ("close", "Close"), ("volume", "Volume")):
+            records[field] = hist[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        return records
+
+    def _update_meta(self, symbol: str, interval: str, hist: pd.DataFrame, flush: bool, **fields):
+        meta = self.index.setdefault(self._key(symbol, interval), {})
+        tz = getattr(hist.index, "tz", None)
+        if tz is not None:
+            meta["tz"] = str(tz)
+        meta["last_sync"] = time.time()
+        meta.update(fields)
+        self._index_dirty = True
+        if flush:
+            self._flush_index()
+
+    def _flush_index(self):
+        if self._index_dirty:
+            save_json(self.index_path, self.index)
+            self._index_dirty = False
+
+    def flush(self):
+        """Write index changes held back by `flush=False` writes"""
+        with self._lock:
+            self._flush_index()
+
+    def replace(self, symbol: str, interval: str, hist: pd.DataFrame, period: str, flush: bool = True):
+        """Rewrite the stored bars with a full download of `period`
+
+        With `flush=False` the index is only updated in memory until flush(), so a
+        batch of symbols rewrites it once.
+        """
+        records = self._to_records(hist)
+        path = self._path(symbol, interval)
+        with self._lock:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(records.tobytes())
+            os.replace(tmp_path, path)
+            self._update_meta(symbol, interval, hist, flush, covered_days=period_days(period))
+
+    def append(self, symbol: str, interval: str, hist: pd.DataFrame, flush: bool = True) -> int:
+        """Append bars newer than the last stored one; returns how many were added
+
+        A bar with the same timestamp as the last stored one overwrites it in place,
+        since the bar of a session in progress keeps changing until the close.
+        """
+        records = self._to_records(hist)
+        path = self._path(symbol, interval)
+        with self._lock:
+            last = self.last_timestamp(symbol, interval)
+            if last is not None:
+                overlap = records[records["timestamp"] == last]
+                if len(overlap):
+                    with open(path, "r+b") as f:
+                        f.seek((os.path.getsize(path) // BAR_DTYPE.itemsize - 1) * BAR_DTYPE.itemsize)
+                        f.write(overlap[-1:].tobytes())
+                        f.truncate()
+                records = records[records["timestamp"] > last]
+
+            if len(records):
+                with open(path, "ab") as f:
+                    f.write(records.tobytes())
+            self._update_meta(symbol, interval, hist, flush)
+            return len(records)
+
+    def read_frame(self, symbol: str, interval: str, period: str) -> pd.DataFrame:
+        """Stored bars for the last `period`, shaped like a yfinance history frame"""
+        records = self.read(symbol, interval)
+        if not len(records):
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+
+        if re.fullmatch(r"\d+d", period) and interval == "1d":
+            # Day periods count trading sessions, like yfinance does
+            records = records[-int(period[:-1]):]
+        else:
+            days = period_days(period)
+            if days is not None:
+                cutoff = int(time.time() - days * 86400)
+                records = records[np.searchsorted(records["timestamp"], cutoff):]
+
+        index = pd.to_datetime(records["timestamp"], unit="s", utc=True)
+        tz = self.index.get(self._key(symbol, interval), {}).get("tz")
+        if tz:
+            index = index.tz_convert(tz)
+        return pd.DataFrame({
+            "Open": records["open"],
+            "High": records["high"],
+            "Low": records["low"],
+            "Close": records["close"],
+            "Volume": records["volume"],
+        }, index=index)
@@ -1,10 +1,29 @@
+import functools
 import re
+import threading
 from hyperon import MeTTa, E, S, ValueAtom
 
+def serialized(method):
+    """Run a method under the RAG's lock, so only one thread uses the MeTTa runner at a time"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class InvestmentRAG:
+    """Knowledge graph queries over a MeTTa space
+
+    One instance is shared by chat queries, alert analyses and report preparation,
+    each on its own thread pool. The hyperon runner is not documented as thread-safe,
+    so every query (and conversion of its results) holds a per-instance lock.
+    """
+
     def __init__(self, metta_instance: MeTTa):
         self.metta = metta_instance
+        self._lock = threading.RLock()
 
+    @serialized
     def get_company_market_cap(self, company):
         """Get market capitalization for a semiconductor company."""
         company = company.strip('"')
@@ -13,6 +32,7 @@ class InvestmentRAG:
         print(results, query_str)
         return [r[0].get_object().value for r in results if r and len(r) > 0] if results else []
 
+    @serialized
     def get_revenue_growth(self, company):
         """Get revenue growth trend for a semiconductor company."""
         company = company.strip('"')
@@ -21,6 +41,7 @@ class InvestmentRAG:
         print(results, query_str)
         return [r[0].get_object().value for r in results if r and len(r) > 0] if results else []
 
+    @serialized
     def get_company_region(self, company):
         """Get the primary region/country of a semiconductor company."""
         company = company.strip('"')
@@ -30,6 +51,7 @@ class InvestmentRAG:
         unique_regions = list(set(str(r[0]) for r in results if r and len(r) > 0)) if results else []
         return unique_regions
 
+    @serialized
     def get_company_segment(self, company):
         """Get business segment information for a semiconductor company."""
         company = company.strip('"')
@@ -38,6 +60,7 @@ class InvestmentRAG:
         print(results, query_str)
         return [r[0].get_object().value for r in results if r and len(r) > 0] if results else []
 
+    @serialized
     def get_recommendation(self, company):
         """Get investment recommendation for a semiconductor company."""
         company = company.strip('"')
@@ -46,6 +69,7 @@ class InvestmentRAG:
         print(results, query_str)
         return [r[0].get_object().value for r in results if r and len(r) > 0] if results else []
 
+    @serialized
     def query_system_level_topic(self, topic):
         """Get information about system-level semiconductor topics (policy, materials, supply chain)."""
         topic = topic.strip('"')
@@ -54,6 +78,7 @@ class InvestmentRAG:
         print(results, query_str)
         return [r[0].get_object().value for r in results if r and len(r) > 0] if results else []
 
+    @serialized
     def query_company_level_topic(self, topic):
         """Get information about company-level topics (earnings, innovation, leadership)."""
         topic = topic.strip('"')
@@ -62,6 +87,7 @@ class InvestmentRAG:
         print(results, query_str)
         return [r[0].get_object().value for r in results if r and len(r) > 0] if results else []
 
+    @serialized
     def get_industry_trend(self, trend):
         """Get information about key semiconductor industry trends."""
         trend = trend.strip('"')
@@ -70,6 +96,7 @@ class InvestmentRAG:
         print(results, query_str)
         return [r[0].get_object().value for r in results if r and len(r) > 0] if results else []
 
+    @serialized
     def get_risk_factor(self, risk):
         """Get information about semiconductor industry risk factors."""
         risk = risk.strip('"')
@@ -78,6 +105,7 @@ class InvestmentRAG:
         print(results, query_str)
         return [r[0].get_object().value for r in results if r and len(r) > 0] if results else []
 
+    @serialized
     def query_companies_by_region(self, region):
         """Get all semiconductor companies in a specific region."""
         region = region.strip('"')
@@ -87,6 +115,7 @@ class InvestmentRAG:
         unique_companies = list(set(str(r[0]) for r in results if r and len(r) > 0)) if results else []
         return unique_companies
 
+    @serialized
     def query_faq(self, question):
         """Retrieve semiconductor industry FAQ answers."""
         query_str = f'!(match &self (faq "{question}" $answer) $answer)'
@@ -94,6 +123,7 @@ class InvestmentRAG:
         print(results, query_str)
         return results[0][0].get_object().value if results and results[0] else None
 
+    @serialized
     def get_all_companies(self):
         """Get all semiconductor companies in the knowledge base."""
         query_str = '!(match &self (company_market_cap $company $cap) $company)'
@@ -102,6 +132,7 @@ class InvestmentRAG:
         unique_companies = list(set(str(r[0]) for r in results if r and len(r) > 0)) if results else []
         return unique_companies
 
+    @serialized
     def add_knowledge(self, relation_type, subject, object_value):
         """Add new semiconductor market knowledge dynamically."""
         if isinstance(object_value, str):
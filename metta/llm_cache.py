@@ -0,0 +1,129 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from .storage import data_path, load_json, save_json
+
+# Seconds a completion stays fresh, keyed by the call site that asked for it (0 = never cached).
+# Article summaries depend only on the article; answers embed live prices, so they age fastest.
+CALL_SITE_TTLS = {
+    "intent": 24 * 3600,
+    "news_filter": 3600,
+    "article_summary": 7 * 24 * 3600,
+    "news_analysis": 3600,
+    "answer": 600,
+    "default": 600,
+}
+
+# Seconds between writes of the cache file; pending entries are also written at exit
+SAVE_INTERVAL = 30
+
+def completion_key(model: str, system_prompt: str, prompt: str, max_tokens: int) -> str:
+    """Fingerprint of a completion request"""
+    payload = json.dumps([model, system_prompt, prompt, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMCompletionCache:
+    """Disk-backed LRU cache of LLM completions keyed by request fingerprint, with per-call-site TTLs
+
+    Expiry uses wall-clock time so entries stay valid across restarts. The cache file
+    is rewritten at most every SAVE_INTERVAL seconds and on exit.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 2000, enabled: bool = True):
+        self.path = path or data_path("llm_cache.json")
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, completion)
+        self._lock = threading.Lock()  # Shared by chat queries, report jobs and alert analyses
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if enabled:
+            now = time.time()
+            # Stored oldest first, so the LRU order survives a restart
+            for key, (expires_at, completion) in (load_json(self.path, {}) or {}).items():
+                if expires_at > now:
+                    self._entries[key] = (expires_at, completion)
+            atexit.register(self.flush)
+
+    def ttl_for(self, call_site: str) -> float:
+        """Get the TTL for a call site"""
+        return CALL_SITE_TTLS.get(call_site, CALL_SITE_TTLS["default"])
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion, or None if it is missing or expired"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, completion = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self._dirty = True
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return completion
+
+    def put(self, key: str, completion: str, ttl: float):
+        """Store a completion, evicting the least recently used entries when full"""
+        if not self.enabled or ttl <= 0 or not completion:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, completion)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= SAVE_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write pending changes to the cache file"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        try:
+            save_json(self.path, entries)
+        except Exception as e:
+            print(f"⚠️  Could not save LLM cache: {e}")
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+# Global instance
+llm_cache = LLMCompletionCache(
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000")),
+    enabled=os.getenv("LLM_CACHE", "on").lower() not in ("off", "0", "false")
+)
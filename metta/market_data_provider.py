@@ -0,0 +1,217 @@
+import hashlib
+import json
+from abc import ABC, abstractmethod
+import os
+import pickle
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import pandas as pd
+import yfinance as yf
+from .storage import data_path
+
+class MarketDataProvider(ABC):
+    """Source of raw market data for StockDataFetcher
+
+    `history` and `download` return yfinance-shaped OHLCV frames (Open/High/Low/
+    Close/Volume columns, DatetimeIndex); `info` returns a ticker.info-style dict.
+    Providers must implement all three.
+    """
+
+    @abstractmethod
+    def history(self, symbol: str, interval: str = "1d", period: Optional[str] = None,
+                start: Optional[str] = None) -> pd.DataFrame:
+        """Bars for one symbol"""
+
+    @abstractmethod
+    def download(self, symbols: List[str], interval: str = "1d", period: Optional[str] = None,
+                 start: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """Bars for many symbols at once, keyed by symbol (symbols without data are left out)"""
+
+    @abstractmethod
+    def info(self, symbol: str) -> Dict:
+        """Fundamentals for one symbol"""
+
+class YFinanceProvider(MarketDataProvider):
+    """Live market data from Yahoo Finance"""
+
+    def __init__(self):
+        # yf.download collects results in module-level state, so concurrent calls must not overlap
+        self._download_lock = threading.Lock()
+
+    def history(self, symbol: str, interval: str = "1d", period: Optional[str] = None,
+                start: Optional[str] = None) -> pd.DataFrame:
+        return yf.Ticker(symbol).history(period=period, start=start, interval=interval, prepost=True)
+
+    def download(self, symbols: List[str], interval: str = "1d", period: Optional[str] = None,
+                 start: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        # Group by exchange suffix so every download shares a single timezone and
+        # yfinance keeps exchange-local timestamps (mixed zones get coerced to UTC)
+        venues: Dict[str, List[str]] = {}
+        for symbol in dict.fromkeys(symbols):
+            suffix = symbol.rsplit(".", 1)[1] if "." in symbol else ""
+            venues.setdefault(suffix, []).append(symbol)
+
+        results = {}
+        for venue_symbols in venues.values():
+            try:
+                with self._download_lock:
+                    data = yf.download(
+                        venue_symbols, period=period, start=start, interval=interval, prepost=True,
+                        group_by="ticker", ignore_tz=False, threads=True, progress=False
+                    )
+            except Exception as e:
+                print(f"Error fetching bulk data for {', '.join(venue_symbols)}: {e}")
+                continue
+
+            if data is None or data.empty:
+                continue
+
+            for symbol in venue_symbols:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if symbol not in data.columns.get_level_values(0):
+                        continue
+                    hist = data[symbol]
+                else:
+                    hist = data
+                hist = hist.dropna(subset=["Close"])
+                if not hist.empty:
+                    results[symbol] = hist
+
+        return results
+
+    def info(self, symbol: str) -> Dict:
+        return yf.Ticker(symbol).info or {}
+
+def _call_key(method: str, **params) -> str:
+    """Stable file-name-safe key for one provider call
+
+    `start` is left out: incremental syncs derive it from the wall clock, so it
+    never repeats between a recording and its replay.
+    """
+    params.pop("start", None)
+    payload = json.dumps({"method": method, **params}, sort_keys=True, default=str)
+    return f"{method}-{hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]}"
+
+class RecordingProvider(MarketDataProvider):
+    """Wraps another provider and saves every response (with its latency) to disk
+
+    Each call is stored as `<method>-<hash>-<n>.pkl`, where n counts repeats of the
+    same call (ignoring `start`), so a replay sees the same sequence of responses
+    in the same order.
+    """
+
+    def __init__(self, inner: MarketDataProvider, directory: str):
+        self.inner = inner
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, key: str, params: Dict, fetch) -> Any:
+        started = time.perf_counter()
+        response = fetch()
+        latency = time.perf_counter() - started
+
+        with self._lock:
+            sequence = self._counts.get(key, 0)
+            self._counts[key] = sequence + 1
+        with open(os.path.join(self.directory, f"{key}-{sequence:05d}.pkl"), "wb") as f:
+            pickle.dump({"params": params, "latency": latency, "recorded_at": time.time(), "response": response}, f)
+        return response
+
+    def history(self, symbol, interval="1d", period=None, start=None):
+        params = {"symbol": symbol, "interval": interval, "period": period, "start": start}
+        return self._record(_call_key("history", **params), params,
+                            lambda: self.inner.history(symbol, interval=interval, period=period, start=start))
+
+    def download(self, symbols, interval="1d", period=None, start=None):
+        params = {"symbols": list(symbols), "interval": interval, "period": period, "start": start}
+        return self._record(_call_key("download", **params), params,
+                            lambda: self.inner.download(symbols, interval=interval, period=period, start=start))
+
+    def info(self, symbol):
+        params = {"symbol": symbol}
+        return self._record(_call_key("info", **params), params, lambda: self.inner.info(symbol))
+
+class ReplayProvider(MarketDataProvider):
+    """Serves responses captured by RecordingProvider, with no network access
+
+    `speed` scales the recorded latencies (2.0 = twice as fast, 0 = no delay).
+    With `shift_to_now`, bar timestamps are moved forward by the time elapsed since
+    recording, so freshness checks treat replayed bars like live ones. Repeated
+    calls walk through the recorded sequence and wrap around at the end; a `start`
+    drops the (shifted) bars before it.
+    """
+
+    def __init__(self, directory: str, speed: float = 1.0, shift_to_now: bool = True):
+        self.directory = directory
+        self.speed = speed
+        self.shift_to_now = shift_to_now
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            position = self._positions.get(key, 0)
+            path = os.path.join(self.directory, f"{key}-{position:05d}.pkl")
+            if not os.path.exists(path):
+                position = 0
+                path = os.path.join(self.directory, f"{key}-00000.pkl")
+                if not os.path.exists(path):
+                    return None
+            self._positions[key] = position + 1
+
+        with open(path, "rb") as f:
+            record = pickle.load(f)
+        if self.speed > 0:
+            time.sleep(record["latency"] / self.speed)
+        return record
+
+    def _shift(self, hist: pd.DataFrame, recorded_at: float, start=None) -> pd.DataFrame:
+        if hist is None or hist.empty:
+            return hist
+        if self.shift_to_now:
+            hist = hist.copy()
+            hist.index = hist.index + pd.Timedelta(seconds=int(time.time() - recorded_at))
+        if start is not None:
+            start = pd.Timestamp(start)
+            if hist.index.tz is not None:
+                start = start.tz_localize("UTC") if start.tz is None else start
+            elif start.tz is not None:
+                start = start.tz_convert(None)
+            hist = hist[hist.index >= start]
+        return hist
+
+    def history(self, symbol, interval="1d", period=None, start=None):
+        record = self._load(_call_key("history", symbol=symbol, interval=interval, period=period, start=start))
+        if record is None:
+            print(f"⚠️ No recorded history for {symbol} ({period or start}, {interval})")
+            return pd.DataFrame()
+        return self._shift(record["response"], record["recorded_at"], start)
+
+    def download(self, symbols, interval="1d", period=None, start=None):
+        record = self._load(_call_key("download", symbols=list(symbols), interval=interval, period=period, start=start))
+        if record is None:
+            print(f"⚠️ No recorded download for {', '.join(symbols)} ({period or start}, {interval})")
+            return {}
+        results = {symbol: self._shift(hist, record["recorded_at"], start) for symbol, hist in record["response"].items()}
+        return {symbol: hist for symbol, hist in results.items() if not hist.empty}
+
+    def info(self, symbol):
+        record = self._load(_call_key("info", symbol=symbol))
+        return record["response"] if record else {}
+
+def create_provider_from_env() -> MarketDataProvider:
+    """Build the provider selected by MARKET_DATA_PROVIDER (yfinance, record or replay)"""
+    mode = os.getenv("MARKET_DATA_PROVIDER", "yfinance").lower()
+    directory = os.getenv("MARKET_DATA_RECORD_DIR") or os.path.dirname(data_path("recordings", "x"))
+
+    if mode == "record":
+        print(f"🎙️  Recording market data responses to {directory}")
+        return RecordingProvider(YFinanceProvider(), directory)
+    if mode == "replay":
+        speed = float(os.getenv("MARKET_DATA_REPLAY_SPEED", "1.0"))
+        print(f"⏯️  Replaying market data from {directory} (speed {speed}x)")
+        return ReplayProvider(directory, speed=speed)
+    return YFinanceProvider()
@@ -35,7 +35,9 @@ def filter_news_with_llm(all_news, user_query, time_period, llm):
     )
     
     try:
-        response = llm.create_completion(prompt, max_tokens=300)
+        # Only a selection in the requested format is cached; anything else is asked again next time
+        response = llm.create_completion(prompt, max_tokens=300, call_site="news_filter",
+                                         validate=lambda text: '"selected_articles"' in text)
         print(f"🔍 DEBUG: LLM response for filtering: {response[:200]}...")
         
         # Try to extract JSON from the response
@@ -94,7 +96,7 @@ def summarize_individual_article(news_item, llm):
     prompt = get_article_summary_prompt(title=title, description=description)
     
     try:
-        summary = llm.create_completion(prompt, max_tokens=150)
+        summary = llm.create_completion(prompt, max_tokens=150, call_site="article_summary")
         return summary.strip()
     except Exception as e:
         print(f"Error summarizing individual article: {e}")
@@ -102,8 +104,11 @@ def summarize_individual_article(news_item, llm):
         return description[:300] + "..." if len(description) > 300 else description
 
 
-def summarize_news_with_llm(news_list, llm):
-    """Use LLM to analyze filtered news articles"""
+def summarize_news_with_llm(news_list, llm, previous_context=""):
+    """Use LLM to analyze filtered news articles
+
+    `previous_context` tells the analysis what an earlier report already covered.
+    """
     if not news_list:
         return "No news to summarize.", []
     
@@ -132,12 +137,13 @@ def summarize_news_with_llm(news_list, llm):
     
     prompt = get_comprehensive_analysis_prompt(
         article_count=len(processed_articles),
-        news_text=news_text
+        news_text=news_text,
+        previous_context=previous_context
     )
     
     try:
         print(f"🧠 Generating comprehensive analysis of {len(processed_articles)} articles...")
-        summary = llm.create_completion(prompt, max_tokens=1200)
+        summary = llm.create_completion(prompt, max_tokens=1200, call_site="news_analysis")
         return summary, processed_articles
     except Exception as e:
         print(f"Error generating comprehensive analysis: {e}")
@@ -0,0 +1,176 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from .storage import data_path, load_json
+from .stock_data import stock_fetcher
+from .exchange_calendar import ExchangeCalendar, exchange_calendar
+
+# Seconds between polls of each symbol, per priority tier
+TIER_INTERVALS = {
+    "mega": 60,
+    "mid": 300,
+    "tail": 900,
+}
+
+# Bounds for adapted per-symbol intervals, and the activity multiplier range that moves them
+MIN_POLL_INTERVAL = 20
+MAX_POLL_INTERVAL = 1800
+MAX_ACTIVITY_FACTOR = 4.0
+
+# Watch universe used when no watchlist file exists: {tier: [company name, alias or ticker]}
+DEFAULT_WATCHLIST = {
+    "mega": ["NVIDIA", "TSMC", "Broadcom", "ASML", "AMD"],
+    "mid": [
+        "Intel", "Qualcomm", "Micron", "Texas Instruments", "Applied Materials",
+        "Lam Research", "KLA Corporation", "Analog Devices", "Marvell"
+    ],
+    "tail": ["MediaTek", "SK Hynix", "Samsung", "Tokyo Electron", "SMIC", "UMC"],
+}
+
+def load_watchlist(path: Optional[str] = None) -> Dict[str, Dict[str, Optional[str]]]:
+    """Watch universe as {tier: {company: symbol or None}}, from WATCHLIST_FILE / data/watchlist.json
+
+    Each tier in the file is either a list of names known to the symbol resolver, or
+    a {company: ticker} map that also adds new companies to the universe. Without a
+    file the built-in default is used.
+    """
+    path = path or os.getenv("WATCHLIST_FILE") or data_path("watchlist.json")
+    watchlist = load_json(path, None) or DEFAULT_WATCHLIST
+
+    unknown = set(watchlist) - set(TIER_INTERVALS)
+    if unknown:
+        print(f"⚠️ Unknown watchlist tiers {', '.join(sorted(unknown))}, polling them as tail")
+    tiers: Dict[str, Dict[str, Optional[str]]] = {tier: {} for tier in TIER_INTERVALS}
+    for tier, names in watchlist.items():
+        entries = names if isinstance(names, dict) else dict.fromkeys(names)
+        tiers[tier if tier in TIER_INTERVALS else "tail"].update(entries)
+    return tiers
+
+class PollScheduler:
+    """Decides which symbols are due for a poll, so each one is polled at its own interval
+
+    Symbols of a tier start at phases spread evenly across the tier's interval, so
+    every poll tick fetches about the same number of symbols instead of the whole
+    tier at once. Symbols that were never assigned an interval are due every tick.
+    With a calendar, symbols are only due while their market is open.
+    """
+
+    def __init__(self, intervals: Optional[Dict[str, float]] = None, budget_per_minute: Optional[float] = None,
+                 calendar: Optional[ExchangeCalendar] = None):
+        self.intervals: Dict[str, float] = {}
+        self.base_intervals: Dict[str, float] = {}  # tier intervals, before adaptation
+        self.next_due: Dict[str, float] = {}
+        self.last_polled: Dict[str, float] = {}
+        self.tiers: Dict[str, str] = {}
+        # Most symbol polls per minute that adapt() may schedule across the universe
+        self.budget_per_minute = budget_per_minute
+        # Symbols whose market is closed are never due
+        self.calendar = calendar
+        if intervals:
+            self.assign(intervals)
+
+    def assign(self, intervals: Dict[str, float], tier: Optional[str] = None, now: Optional[float] = None):
+        """Poll these symbols every `interval` seconds, spreading their first polls over one interval"""
+        now = now or time.time()
+        for i, (symbol, interval) in enumerate(intervals.items()):
+            self.intervals[symbol] = self.base_intervals[symbol] = interval
+            self.next_due[symbol] = now + interval * i / len(intervals)
+            if tier:
+                self.tiers[symbol] = tier
+
+    def due(self, symbols: List[str], now: Optional[float] = None) -> List[str]:
+        """The subset of `symbols` to poll now; each one returned is scheduled for its next interval"""
+        now = now or time.time()
+        at = datetime.fromtimestamp(now, tz=timezone.utc)
+        due = []
+        for symbol in symbols:
+            if self.calendar and not self.calendar.is_open(symbol, at):
+                continue
+            next_due = self.next_due.get(symbol)
+            if next_due is None:
+                due.append(symbol)
+            elif next_due <= now:
+                due.append(symbol)
+                self.last_polled[symbol] = now
+                # Keep the phase: skip whole intervals that were missed instead of bunching up
+                interval = self.intervals[symbol]
+                self.next_due[symbol] = next_due + interval * (int((now - next_due) // interval) + 1)
+        return due
+
+    def retune(self, intervals: Dict[str, float]):
+        """Change the interval of scheduled symbols, counting from their last poll"""
+        for symbol, interval in intervals.items():
+            if symbol not in self.intervals or interval == self.intervals[symbol]:
+                continue
+            self.intervals[symbol] = interval
+            last = self.last_polled.get(symbol)
+            if last is not None:
+                self.next_due[symbol] = last + interval
+
+    def adapt(self, activity: Dict[str, float]) -> float:
+        """Poll active symbols faster and quiet ones slower, within the request budget
+
+        `activity` is a relative score per symbol (1 = typical, 2 = twice as active);
+        each symbol's tier interval is divided by it, within MAX_ACTIVITY_FACTOR either
+        way. If the result exceeds the budget, every interval is stretched by the same
+        factor, so priorities are kept; a warning is printed when even the maximum
+        interval cannot fit the budget. Returns the scheduled symbol polls per minute.
+        """
+        targets = {}
+        for symbol, base in self.base_intervals.items():
+            factor = min(max(activity.get(symbol, 1.0), 1 / MAX_ACTIVITY_FACTOR), MAX_ACTIVITY_FACTOR)
+            targets[symbol] = min(max(base / factor, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+
+        demand = sum(60 / interval for interval in targets.values())
+        # Symbols clamped at MAX_POLL_INTERVAL stop giving back polls, so stretch the rest again
+        while self.budget_per_minute and demand > self.budget_per_minute * 1.0001:
+            stretchable = {symbol: interval for symbol, interval in targets.items() if interval < MAX_POLL_INTERVAL}
+            if not stretchable:
+                print(f"⚠️ Poll budget of {self.budget_per_minute:g}/min cannot be met: {len(targets)} symbols "
+                      f"need {demand:.1f} polls/min even at the {MAX_POLL_INTERVAL}s maximum interval")
+                break
+            fixed = demand - sum(60 / interval for interval in stretchable.values())
+            stretch = (demand - fixed) / max(self.budget_per_minute - fixed, 1e-9)
+            for symbol, interval in stretchable.items():
+                targets[symbol] = min(interval * stretch, MAX_POLL_INTERVAL)
+            demand = sum(60 / interval for interval in targets.values())
+
+        self.retune(targets)
+        return demand
+
+    def status(self) -> Dict[str, int]:
+        """Number of scheduled symbols per tier"""
+        counts: Dict[str, int] = {}
+        for tier in self.tiers.values():
+            counts[tier] = counts.get(tier, 0) + 1
+        return counts
+
+    def polls_per_minute(self) -> float:
+        """Symbol polls per minute at the current intervals"""
+        return sum(60 / interval for interval in self.intervals.values())
+
+def create_poll_scheduler(watchlist: Dict[str, Dict[str, Optional[str]]]) -> PollScheduler:
+    """Schedule every resolvable symbol of the watchlist at its tier's interval"""
+    # Simulated bars are generated around the clock, so only live polling follows market hours
+    simulated = os.getenv("QUOTE_FEED", "poll").lower() == "simulated"
+    scheduler = PollScheduler(budget_per_minute=float(os.getenv("POLL_BUDGET_PER_MINUTE", "30")),
+                              calendar=None if simulated else exchange_calendar)
+    for tier, names in watchlist.items():
+        symbols = {}
+        for name, symbol in names.items():
+            if symbol:
+                stock_fetcher.add_company(name, symbol)
+            else:
+                symbol = stock_fetcher.get_stock_symbol(name)
+            if symbol:
+                symbols[symbol] = TIER_INTERVALS[tier]
+            else:
+                print(f"⚠️ Watchlist entry {name!r} does not resolve to a symbol, skipping")
+        if symbols:
+            scheduler.assign(symbols, tier=tier)
+    return scheduler
+
+# Global instance
+watchlist = load_watchlist()
+poll_scheduler = create_poll_scheduler(watchlist)
@@ -89,11 +89,16 @@ Provide a 2-3 sentence summary focusing on:
 
 Keep it professional and factual."""
 
-def get_comprehensive_analysis_prompt(article_count, news_text):
+def get_comprehensive_analysis_prompt(article_count, news_text, previous_context=""):
     """Generate the comprehensive news analysis prompt"""
+    if previous_context:
+        previous_context = f"""
+For context, this was already reported earlier. Do not repeat it; refer to it only where the new articles continue or change a story:
+{previous_context}
+"""
     return f"""Analyze these {article_count} semiconductor news articles comprehensively:
 
-{news_text}
+{news_text}{previous_context}
 
 Provide professional analysis covering:
 1. Key developments and emerging trends across all articles
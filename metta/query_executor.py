@@ -0,0 +1,65 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, Set
+
+class QueryBusyError(Exception):
+    """Raised when more chat queries are waiting than the executor accepts"""
+
+class QueryExecutor:
+    """Runs blocking chat query processing off the agent's event loop
+
+    Queries run on a bounded thread pool with a per-request timeout, and handlers
+    hand them off as background tasks, so the loop keeps acknowledging messages
+    and serving the scheduler while several users' queries run side by side.
+    A timed-out query that has not started is cancelled; one already running
+    finishes in the background (still counted as pending) and its result is dropped.
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 180.0, max_pending: Optional[int] = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # Queries beyond this many (running plus queued) are turned away instead of queuing for minutes
+        self.max_pending = max_pending or max_workers * 4
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-query")
+        self._pending = 0
+        self._pending_lock = threading.Lock()  # Released from worker threads when a query finishes
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a blocking call on the pool and await its result, raising QueryBusyError when full"""
+        with self._pending_lock:
+            if self._pending >= self.max_pending:
+                raise QueryBusyError(f"{self._pending} queries already pending")
+            self._pending += 1
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+        # The slot stays taken until the worker is done, even if the caller stops waiting
+        future.add_done_callback(self._release)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+
+    def _release(self, future: Optional[Future] = None):
+        with self._pending_lock:
+            self._pending -= 1
+
+    def submit(self, coroutine: Awaitable) -> asyncio.Task:
+        """Run a coroutine as a background task, keeping a reference until it finishes"""
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def pending(self) -> int:
+        """Queries running or waiting for a worker"""
+        return self._pending
+
+# Global instance
+query_executor = QueryExecutor(
+    max_workers=int(os.getenv("CHAT_QUERY_CONCURRENCY", "4")),
+    timeout=float(os.getenv("CHAT_QUERY_TIMEOUT", "180"))
+)
@@ -0,0 +1,180 @@
+import asyncio
+import inspect
+import itertools
+import os
+import random
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from .bar_store import BarWindow, IntradayBarStore
+from .stock_data import StockDataFetcher, stock_fetcher
+from .async_fetcher import AsyncStockFetcher, async_stock_fetcher
+from .poll_scheduler import PollScheduler, poll_scheduler
+
+class PollingQuoteSource:
+    """Feeds new 1m bars into the bar store by polling the market data provider"""
+
+    def __init__(self, fetcher: StockDataFetcher, async_fetcher: AsyncStockFetcher):
+        self.fetcher = fetcher
+        self.async_fetcher = async_fetcher
+
+    async def poll(self, symbols: List[str]):
+        """Download bars newer than what the bar store holds, in one bulk request per venue"""
+        await self.async_fetcher.run(self.fetcher.sync_intraday, symbols)
+
+class SimulatedQuoteSource:
+    """Random-walk 1m bars for driving the feed locally, without market data access
+
+    Every poll appends one bar per symbol, one minute after the previous one, with an
+    occasional shock so alert paths can be exercised.
+    """
+
+    def __init__(self, bar_store: IntradayBarStore, volatility: float = 0.002,
+                 shock_probability: float = 0.01, shock_size: float = 0.08, seed: Optional[int] = None):
+        self.bar_store = bar_store
+        self.volatility = volatility
+        self.shock_probability = shock_probability
+        self.shock_size = shock_size
+        self.random = random.Random(seed)
+
+    async def poll(self, symbols: List[str]):
+        """Append one simulated bar per symbol"""
+        now = int(time.time()) // 60 * 60
+        for symbol in symbols:
+            last = self.bar_store.window(symbol, 1)
+            if last is None:
+                timestamp, price = now, 100.0
+            else:
+                timestamp, price = int(last.timestamps[-1]) + 60, float(last.close[-1])
+
+            change = self.random.gauss(0, self.volatility)
+            if self.random.random() < self.shock_probability:
+                change += self.random.choice((-1, 1)) * self.shock_size
+            close = price * (1 + change)
+            self.bar_store.append_bar(
+                symbol, timestamp, price, max(price, close), min(price, close), close,
+                float(self.random.randint(1_000, 100_000))
+            )
+
+class QuoteFeed:
+    """Push-based quote subscriptions over a single poller
+
+    Consumers register symbols and a callback. Each poll makes one fetch for the
+    union of subscribed symbols; symbols that got new bars (or whose forming bar
+    changed) are fanned out to their subscribers as bar store views.
+    """
+
+    def __init__(self, bar_store: IntradayBarStore, source, poll_interval: float = 20.0,
+                 scheduler: Optional[PollScheduler] = None):
+        self.bar_store = bar_store
+        self.source = source
+        self.poll_interval = poll_interval
+        # Picks which subscribed symbols are due on each poll (all of them without one)
+        self.scheduler = scheduler
+        self._subscriptions: Dict[int, tuple] = {}  # id -> (symbols, callback)
+        self._ids = itertools.count(1)
+        self._delivered: Dict[str, tuple] = {}  # symbol -> (timestamp, close) of the last bar delivered
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, symbols: Iterable[str], callback: Callable[[Dict[str, BarWindow]], None]) -> int:
+        """Register a callback (sync or async) for bar updates of `symbols`; returns a subscription id
+
+        The callback receives {symbol: bars}, where bars are the bars since the last
+        delivery. The first bar may be a revision of the last bar delivered before.
+        """
+        subscription_id = next(self._ids)
+        self._subscriptions[subscription_id] = (set(symbols), callback)
+        return subscription_id
+
+    def unsubscribe(self, subscription_id: int):
+        """Remove a subscription"""
+        self._subscriptions.pop(subscription_id, None)
+
+    def subscribed_symbols(self) -> List[str]:
+        """Union of all subscribed symbols"""
+        symbols: Set[str] = set()
+        for subscribed, _ in self._subscriptions.values():
+            symbols |= subscribed
+        return sorted(symbols)
+
+    def _collect_updates(self, symbols: List[str]) -> Dict[str, BarWindow]:
+        updates = {}
+        for symbol in symbols:
+            latest = self.bar_store.window(symbol, 1)
+            if latest is None:
+                continue
+            state = (int(latest.timestamps[-1]), float(latest.close[-1]))
+            delivered = self._delivered.get(symbol)
+            if state == delivered:
+                continue
+            bars = self.bar_store.since(symbol, delivered[0] if delivered else None)
+            self._delivered[symbol] = state
+            updates[symbol] = bars
+        return updates
+
+    async def publish(self, updates: Dict[str, BarWindow]):
+        """Fan updates out to every subscriber of the affected symbols"""
+        for subscribed, callback in list(self._subscriptions.values()):
+            relevant = {symbol: bars for symbol, bars in updates.items() if symbol in subscribed}
+            if not relevant:
+                continue
+            try:
+                result = callback(relevant)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"❌ Quote subscriber failed: {e}")
+
+    async def poll_once(self) -> Dict[str, BarWindow]:
+        """Fetch once for the subscribed symbols that are due and publish what changed"""
+        symbols = self.subscribed_symbols()
+        if self.scheduler:
+            symbols = self.scheduler.due(symbols)
+        if not symbols:
+            return {}
+        await self.source.poll(symbols)
+        updates = self._collect_updates(symbols)
+        if updates:
+            await self.publish(updates)
+        return updates
+
+    async def run(self):
+        """Poll until cancelled"""
+        while True:
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Error in quote feed: {e}")
+            await asyncio.sleep(max(0.0, self.poll_interval - (time.monotonic() - started)))
+
+    def start(self) -> asyncio.Task:
+        """Start polling on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def stop(self):
+        """Stop polling"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def is_running(self) -> bool:
+        return bool(self._task and not self._task.done())
+
+def create_quote_source_from_env():
+    """Build the bar source selected by QUOTE_FEED (poll or simulated)"""
+    if os.getenv("QUOTE_FEED", "poll").lower() == "simulated":
+        print("🎲 Quote feed driven by simulated bars")
+        return SimulatedQuoteSource(stock_fetcher.bar_store)
+    return PollingQuoteSource(stock_fetcher, async_stock_fetcher)
+
+# Global instance
+quote_feed = QuoteFeed(
+    stock_fetcher.bar_store,
+    create_quote_source_from_env(),
+    poll_interval=float(os.getenv("QUOTE_POLL_INTERVAL", "20")),
+    scheduler=poll_scheduler
+)
@@ -0,0 +1,68 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from .storage import data_path, load_json, save_json
+
+# Reports whose articles count as already covered
+REPORT_HISTORY_LENGTH = 24
+
+# Characters of the previous report's news summary passed on as context
+PREVIOUS_SUMMARY_CHARS = 1500
+
+def article_key(article: Dict) -> str:
+    """Identity of an article across fetches: its normalized title, so syndicated copies match too"""
+    return " ".join(article.get('title', '').lower().split())
+
+class ReportHistory:
+    """Articles of recent reports, persisted so each report only covers new news
+
+    Each record keeps the keys of the articles a report covered and of those its
+    news filter dismissed, so neither is filtered or summarized again while the
+    report is in the history.
+    """
+
+    def __init__(self, path: Optional[str] = None, length: int = REPORT_HISTORY_LENGTH):
+        self.path = path or data_path("report_history.json")
+        self.length = length
+        data = load_json(self.path, {}) or {}
+        self.reports: List[Dict] = data.get("reports", [])
+        self._lock = threading.Lock()
+
+    def seen(self) -> set:
+        """Keys of every article covered or dismissed by a report in the history"""
+        return {key for report in self.reports for key in report["articles"] + report.get("dismissed", [])}
+
+    def unseen(self, articles: List[Dict]) -> List[Dict]:
+        """The articles no recent report covered or dismissed"""
+        seen = self.seen()
+        return [article for article in articles if article_key(article) not in seen]
+
+    def previous_context(self) -> str:
+        """Compact context from the last report: its news summary and the headlines it covered"""
+        if not self.reports:
+            return ""
+        last = self.reports[-1]
+        summary = last.get("summary", "")
+        if len(summary) > PREVIOUS_SUMMARY_CHARS:
+            summary = summary[:PREVIOUS_SUMMARY_CHARS] + "..."
+        headlines = "\n".join(f"- {title}" for title in last.get("titles", []))
+        return (
+            f"Previous report ({last['time']}):\n{summary}\n\n"
+            f"Headlines already covered:\n{headlines}\n"
+        )
+
+    def record(self, news_summary: str, articles: List[Dict], dismissed: Optional[List[Dict]] = None):
+        """Remember a report's news summary, the articles it covered and those its filter dismissed"""
+        with self._lock:
+            self.reports.append({
+                "time": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                "summary": news_summary,
+                "articles": [article_key(article) for article in articles],
+                "titles": [article.get('title', '') for article in articles],
+                "dismissed": [article_key(article) for article in dismissed or []],
+            })
+            self.reports = self.reports[-self.length:]
+            save_json(self.path, {"reports": self.reports})
+
+# Global instance
+report_history = ReportHistory()
@@ -1,14 +1,32 @@
 import asyncio
-import schedule
-import threading
-import time
+import os
 from datetime import datetime, timedelta
-from typing import Optional
-from .utils import LLM, process_query
+from typing import Dict, List, Optional
+from .utils import LLM, prepare_query, synthesize_answer
+from .async_scheduler import AsyncScheduler, CronTrigger, JobJournal, LeadTrigger
 from .investment_rag import InvestmentRAG
 from .email_service import email_service
 from .stock_monitor import stock_monitor
 from .stock_data import stock_fetcher  # Direct import of stock_fetcher
+from .quote_feed import quote_feed
+from .poll_scheduler import poll_scheduler, TIER_INTERVALS
+from .exchange_calendar import exchange_calendar
+from .report_history import report_history
+from .llm_cache import llm_cache
+
+# When the market report runs (5-field cron in local time; default: every hour at :00)
+REPORT_CRON = os.getenv("REPORT_CRON", "0 * * * *")
+
+# Minutes before each report that news gathering and summarization start
+REPORT_LEAD_MINUTES = float(os.getenv("REPORT_LEAD_MINUTES", "5"))
+
+# A report missed while the agent was down is still sent if it restarts within this many minutes
+REPORT_CATCH_UP_MINUTES = float(os.getenv("REPORT_CATCH_UP_MINUTES", "30"))
+
+# Restarts within this many hours of the last startup email don't send another one
+STARTUP_NOTIFICATION_HOURS = float(os.getenv("STARTUP_NOTIFICATION_HOURS", "12"))
+
+REPORT_QUERY = "What happened in semiconductor market in the past hour?"
 
 class ScheduledTaskManager:
     """Scheduled task manager responsible for hourly reports and stock monitoring"""
@@ -17,224 +35,190 @@ class ScheduledTaskManager:
         self.rag = rag
         self.llm = llm
         self.is_running = False
-        self.scheduler_thread = None
-        self.monitor_task = None
+        
+        # Alert analysis reuses the agent's knowledge graph and LLM client
+        stock_monitor.attach_analysis_context(rag, llm)
+        # Jobs run on the agent's event loop once started; their runs are journaled across restarts
+        self.journal = JobJournal()
+        self.scheduler = AsyncScheduler(self.journal)
+        # (started at, task) of the report context gathered ahead of the next report
+        self._prepared_report: Optional[tuple] = None
+        self._monitoring_start: Optional[asyncio.Task] = None
         
         # Configure scheduled tasks
         self._setup_scheduled_tasks()
     
     def _setup_scheduled_tasks(self):
         """Set up scheduled tasks"""
-        # Execute market report at the top of every hour
-        schedule.every().hour.at(":00").do(self._run_hourly_report)
+        # Execute market report at the top of every hour; a report still running is not started twice
+        report_trigger = CronTrigger(REPORT_CRON)
+        self.scheduler.add_job("hourly_report", self._run_hourly_report, report_trigger,
+                               catch_up=REPORT_CATCH_UP_MINUTES * 60)
+        # News and summaries are gathered ahead of time, so only the final synthesis runs on the hour
+        if REPORT_LEAD_MINUTES > 0:
+            self.scheduler.add_job("report_prepare", self._prepare_hourly_report,
+                                   LeadTrigger(report_trigger, REPORT_LEAD_MINUTES * 60))
+        # Full polling sweep, only run on demand
+        self.scheduler.add_job("volatility_check", self._run_volatility_check, None)
         
-        # Check stock volatility every 5 minutes
-        schedule.every(5).minutes.do(self._run_volatility_check)
+        # Volatility is checked as new bars arrive on the quote feed
+        stock_monitor.subscribe(quote_feed)
         
         print("📅 Scheduled tasks configured:")
-        print("   📊 Hourly market report: Every hour at :00")
-        print("   🚨 Volatility monitoring: Every 5 minutes")
+        print(f"   📊 Hourly market report: cron {REPORT_CRON} (prepared {REPORT_LEAD_MINUTES:g} min ahead)")
+        print(f"   🚨 Volatility monitoring: On every new bar (polled every {quote_feed.poll_interval:.0f}s)")
+        for tier, count in poll_scheduler.status().items():
+            print(f"      {tier}: {count} symbols every {TIER_INTERVALS[tier] // 60} min")
     
     def start(self):
-        """Start scheduled tasks"""
+        """Start scheduled tasks on the running event loop"""
         if self.is_running:
             print("⚠️  Task scheduler is already running")
             return
         
         self.is_running = True
         
-        # Start scheduler thread
-        self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
-        self.scheduler_thread.start()
+        self.scheduler.start()
         
-        # Start asynchronous monitoring task
-        asyncio.create_task(self._continuous_monitor())
+        # Start the monitoring pipeline: one fetch per poll, every alert rule on the same bars
+        self._monitoring_start = asyncio.create_task(self._start_monitoring())
         
         print("🚀 Scheduled task manager started")
         print(f"⏰ Next hourly report: {self._get_next_hour_time()}")
-        print(f"🔍 Volatility checks: Every 5 minutes")
+        print(f"🔍 Volatility checks: On every new bar")
+    
+    async def _start_monitoring(self):
+        """Start the quote feed once the market calendars are loaded, off the event loop"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, exchange_calendar.preload)
+        if self.is_running:
+            quote_feed.start()
     
     def stop(self):
         """Stop scheduled tasks"""
         self.is_running = False
         
-        if self.monitor_task:
-            self.monitor_task.cancel()
+        self.scheduler.stop()
+        self._prepared_report = None
+        quote_feed.stop()
         
         print("⏸️  Scheduled task manager stopped")
     
-    def _run_scheduler(self):
-        """Scheduler thread function"""
-        while self.is_running:
-            schedule.run_pending()
-            time.sleep(30)  # Check every 30 seconds
+    def startup_notification_due(self) -> bool:
+        """Whether this start should send a startup email (not after a quick restart)"""
+        last_sent = self.journal.time("startup_notification", "last_run")
+        if last_sent and datetime.now() - last_sent < timedelta(hours=STARTUP_NOTIFICATION_HOURS):
+            print(f"📮 Startup notification already sent at {last_sent:%Y-%m-%d %H:%M}, skipping")
+            return False
+        return True
     
-    async def _continuous_monitor(self):
-        """Continuous monitoring task"""
-        self.monitor_task = asyncio.current_task()
-        
-        while self.is_running:
-            try:
-                # Perform a quick stock price check every 5 minutes
-                await asyncio.sleep(300)  # 5 minutes
-                
-                if not self.is_running:
-                    break
-                
-                # Perform a quick volatility check (no email, just record)
-                await self._quick_volatility_check()
-                
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                print(f"❌ Error in continuous monitor: {e}")
-                await asyncio.sleep(60)  # Wait 1 minute before retrying after an error
+    def record_startup_notification(self, success: bool):
+        """Journal a startup email, so restarts shortly after don't repeat it"""
+        if success:
+            self.journal.update("startup_notification", last_run=datetime.now(), outcome="ok")
     
-    def _run_hourly_report(self):
+    async def _run_hourly_report(self):
         """Execute hourly market report"""
-        print(f"\n🕐 Running hourly market report at {datetime.now().strftime('%H:00')}")
+        print(f"\n🕐 Running hourly market report at {datetime.now().strftime('%H:%M')}")
         
         try:
-            # Execute asynchronously
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(self._generate_hourly_report())
-            loop.close()
+            await self._generate_hourly_report()
             
         except Exception as e:
             print(f"❌ Error in hourly report: {e}")
     
-    def _run_volatility_check(self):
+    async def _run_volatility_check(self):
         """Execute stock volatility check"""
         print(f"\n🔍 Running volatility check at {datetime.now().strftime('%H:%M')}")
         
         try:
-            # Execute asynchronously
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(stock_monitor.check_volatility())
-            loop.close()
+            await stock_monitor.check_volatility()
             
         except Exception as e:
             print(f"❌ Error in volatility check: {e}")
     
+    async def _prepare_hourly_report(self):
+        """Start gathering the next report's news and summaries ahead of the hour"""
+        print(f"\n📰 Preparing market report context at {datetime.now().strftime('%H:%M')}")
+        task = asyncio.create_task(self._prepare_report_context())
+        self._prepared_report = (datetime.now(), task)
+        await task
+    
+    async def _prepare_report_context(self) -> Dict:
+        """News not covered by earlier reports, summaries and knowledge graph context, with fundamentals warmed up"""
+        loop = asyncio.get_running_loop()
+        prepared, _ = await asyncio.gather(
+            loop.run_in_executor(None, prepare_query, REPORT_QUERY, self.rag, self.llm, report_history),
+            stock_monitor.warm_sector_overview()
+        )
+        return prepared
+    
+    async def _take_prepared_context(self) -> Dict:
+        """The context prepared for this report (waiting for it if still running), else gather it now"""
+        prepared, self._prepared_report = self._prepared_report, None
+        max_age = timedelta(minutes=REPORT_LEAD_MINUTES + 5)
+        if prepared and datetime.now() - prepared[0] <= max_age:
+            try:
+                return await prepared[1]
+            except Exception as e:
+                print(f"⚠️ Prepared report context failed ({e}), gathering it now")
+        return await self._prepare_report_context()
+    
+    def _quotes_section(self, sector_overview: dict) -> List[str]:
+        """Prompt section with the quotes taken at report time"""
+        lines = [
+            f"{company} ({data['symbol']}): ${data['price']:.2f} ({data['change_percent']:+.2f}%)"
+            for company, data in sector_overview.items()
+            if isinstance(data, dict) and 'symbol' in data
+        ]
+        if not lines:
+            return []
+        return [
+            f"=== SECTOR QUOTES AT REPORT TIME ===\n"
+            f"Sector Average: {sector_overview.get('sector_average_change', 0):+.2f}%\n"
+            + "\n".join(lines) + "\n\n"
+        ]
+    
     async def _generate_hourly_report(self):
         """Generate hourly market report"""
         try:
             print("🔍 Generating hourly semiconductor market analysis...")
             
-            # Query market dynamics for the past hour
-            query = "What happened in semiconductor market in the past hour?"
+            # News and summaries for the past hour, normally gathered before the hour
+            prepared = await self._take_prepared_context()
             
-            # Generate market analysis
-            response = process_query(query, self.rag, self.llm, output_length=512)
+            # Add sector overview, with quotes fetched now
+            sector_overview = await stock_monitor.get_sector_overview()
+            
+            # Only the final synthesis runs on the hour, off the event loop so the quote feed keeps polling
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None, lambda: synthesize_answer(prepared, self.llm, output_length=512,
+                                                extra_sections=self._quotes_section(sector_overview))
+            )
             
             if isinstance(response, dict):
                 market_analysis = response.get('humanized_answer', 'Unable to generate market analysis')
             else:
                 market_analysis = str(response)
             
-            # Add sector overview
-            sector_overview = await stock_monitor.get_sector_overview()
-            
             # Build comprehensive report
             full_report = self._build_comprehensive_report(market_analysis, sector_overview)
             
             # Send email report
-            success = email_service.send_hourly_report(full_report)
+            success = await loop.run_in_executor(None, email_service.send_hourly_report, full_report)
             
             if success:
                 print("✅ Hourly report sent successfully")
+                # Later reports skip these articles and build on this summary
+                if prepared.get("articles") or prepared.get("dismissed"):
+                    report_history.record(prepared["news_summary"], prepared["articles"], prepared.get("dismissed"))
             else:
                 print("❌ Failed to send hourly report")
             
         except Exception as e:
             print(f"❌ Error generating hourly report: {e}")
     
-    async def _quick_volatility_check(self):
-        """Quick volatility check (compare prices from 5 minutes ago)"""
-        try:
-            alerts = []
-            
-            # Check several major stocks
-            major_stocks = ["NVIDIA", "TSMC", "Intel", "AMD"]
-            
-            for company in major_stocks:
-                stock_data = stock_fetcher.fetch_company_stock_data(company)
-                
-                if stock_data and stock_data.get('current'):
-                    current_data = stock_data['current']
-                    symbol = stock_data['symbol']
-                    current_price = current_data['current_price']
-                    
-                    # Get price from 5 minutes ago directly from yfinance
-                    price_5min_ago = stock_fetcher.get_price_at_time(symbol, 5)
-                    
-                    if price_5min_ago and price_5min_ago > 0:
-                        # Calculate price change percentage over 5 minutes
-                        price_change_percent = ((current_price - price_5min_ago) / price_5min_ago) * 100
-                        
-                        print(f"📊 {company} ({symbol}): 5min change {price_change_percent:+.2f}% (${price_5min_ago:.2f} → ${current_price:.2f})")
-                        
-                        # Check if it exceeds the threshold
-                        if abs(price_change_percent) >= stock_monitor.volatility_thresholds["extreme"]:
-                            # Get LLM analysis
-                            llm_analysis = await stock_monitor._analyze_stock_event_with_llm(
-                                company, symbol, price_change_percent, 
-                                current_price, price_5min_ago, "5 minutes"
-                            )
-                            
-                            alert_info = {
-                                'company': company,
-                                'symbol': symbol,
-                                'current_price': current_price,
-                                'previous_price': price_5min_ago,
-                                'change_percent': price_change_percent,
-                                'trigger_reason': f'Extreme 5-minute volatility: {price_change_percent:+.2f}%',
-                                'severity': 'extreme',
-                                'time_period': '5 minutes',
-                                'llm_analysis': llm_analysis
-                            }
-                            alerts.append(alert_info)
-                            print(f"🚨 EXTREME volatility alert for {company}: {price_change_percent:+.2f}% in 5 minutes")
-                            
-                        elif abs(price_change_percent) >= stock_monitor.volatility_thresholds["high"]:
-                            # Get LLM analysis
-                            llm_analysis = await stock_monitor._analyze_stock_event_with_llm(
-                                company, symbol, price_change_percent, 
-                                current_price, price_5min_ago, "5 minutes"
-                            )
-                            
-                            alert_info = {
-                                'company': company,
-                                'symbol': symbol,
-                                'current_price': current_price,
-                                'previous_price': price_5min_ago,
-                                'change_percent': price_change_percent,
-                                'trigger_reason': f'High 5-minute volatility: {price_change_percent:+.2f}%',
-                                'severity': 'high',
-                                'time_period': '5 minutes',
-                                'llm_analysis': llm_analysis
-                            }
-                            alerts.append(alert_info)
-                            print(f"🚨 HIGH volatility alert for {company}: {price_change_percent:+.2f}% in 5 minutes")
-                    else:
-                        # Unable to get 5-minute historical data
-                        print(f"📊 {company} ({symbol}): ${current_price:.2f} (unable to get 5-min history)")
-            
-            # If there are alerts, send them immediately
-            if alerts:
-                print(f"🚨 Immediate volatility alert triggered for {len(alerts)} stocks")
-                # Send alert email
-                success = email_service.send_volatility_alert(alerts)
-                if success:
-                    print("✅ Enhanced volatility alert email sent successfully")
-                else:
-                    print("❌ Failed to send enhanced volatility alert email")
-            
-        except Exception as e:
-            print(f"❌ Error in quick volatility check: {e}")
-    
     def _build_comprehensive_report(self, market_analysis: str, sector_overview: dict) -> str:
         """Build comprehensive market report"""
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -263,36 +247,40 @@ Generated at: {current_time}
 {sector_text}
 
 === MONITORING STATUS ===
-Volatility Thresholds: High ≥5%, Extreme ≥10%
+Volatility Thresholds: {stock_monitor.describe_thresholds()}
+Markets Open: {', '.join(exchange_calendar.open_venues(list(poll_scheduler.intervals))) or 'None'}
 Next Report: {self._get_next_hour_time()}
         """
         
         return full_report.strip()
     
     def _get_next_hour_time(self) -> str:
-        """Get next top of the hour time"""
-        now = datetime.now()
-        next_hour = (now + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
-        return next_hour.strftime("%Y-%m-%d %H:00")
+        """Get the time of the next scheduled report"""
+        return self.scheduler.next_run("hourly_report").strftime("%Y-%m-%d %H:%M")
     
     def get_status(self) -> dict:
         """Get task manager status"""
         return {
             'is_running': self.is_running,
             'next_hourly_report': self._get_next_hour_time(),
-            'scheduler_thread_alive': self.scheduler_thread.is_alive() if self.scheduler_thread else False,
-            'monitor_task_running': self.monitor_task and not self.monitor_task.done() if self.monitor_task else False,
-            'scheduled_jobs_count': len(schedule.jobs)
+            'scheduler_running': self.scheduler.is_running(),
+            'monitor_task_running': quote_feed.is_running(),
+            'quote_feed_symbols': quote_feed.subscribed_symbols(),
+            'poll_tiers': poll_scheduler.status(),
+            'polls_per_minute': round(poll_scheduler.polls_per_minute(), 1),
+            'scheduled_jobs': self.scheduler.status(),
+            'quote_cache': stock_fetcher.history_cache.stats(),
+            'llm_cache': llm_cache.stats()
         }
     
-    def force_hourly_report(self):
-        """Manually trigger hourly report"""
+    def force_hourly_report(self) -> Optional[asyncio.Task]:
+        """Manually trigger hourly report (skipped if one is already running)"""
         print("🔄 Manually triggering hourly report...")
-        self._run_hourly_report()
+        return self.scheduler.run_now("hourly_report")
     
-    def force_volatility_check(self):
-        """Manually trigger volatility check"""
+    def force_volatility_check(self) -> Optional[asyncio.Task]:
+        """Manually trigger volatility check (skipped if one is already running)"""
         print("🔄 Manually triggering volatility check...")
-        self._run_volatility_check()
+        return self.scheduler.run_now("volatility_check")
 
 # Since it needs to be initialized in agent.py, no global instance is created here
\ No newline at end of file
@@ -0,0 +1,79 @@
+import threading
+import warnings
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .stock_data import StockDataFetcher
+
+# Daily returns used for each beta, and the history period synced to cover them
+BETA_WINDOW = 60
+BETA_PERIOD = "6mo"
+
+# Fewer overlapping returns than this leave a symbol without a beta
+MIN_BETA_OBSERVATIONS = 20
+
+def sector_betas(returns: np.ndarray) -> np.ndarray:
+    """Beta of every column of a (days x symbols) return matrix to its equal-weighted row mean
+
+    NaNs (holidays, listings on other calendars) are masked pair-wise, so each beta
+    uses the days on which both the symbol and the sector have a return.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        sector = np.nanmean(returns, axis=1)
+    valid = ~np.isnan(returns) & ~np.isnan(sector)[:, None]
+    count = valid.sum(axis=0)
+
+    market = np.where(valid, sector[:, None], 0.0)
+    stock = np.where(valid, returns, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        market_dev = np.where(valid, market - market.sum(axis=0) / count, 0.0)
+        stock_dev = np.where(valid, stock - stock.sum(axis=0) / count, 0.0)
+        betas = (stock_dev * market_dev).sum(axis=0) / (market_dev ** 2).sum(axis=0)
+    betas[(count < MIN_BETA_OBSERVATIONS) | ~np.isfinite(betas)] = np.nan
+    return betas
+
+class SectorBetas:
+    """Rolling betas of each symbol to the sector average, from the stored daily bars
+
+    Recomputed at most once per day for the whole universe in one vectorized pass.
+    """
+
+    def __init__(self, fetcher: StockDataFetcher, window: int = BETA_WINDOW):
+        self.fetcher = fetcher
+        self.window = window
+        self._betas: Dict[str, float] = {}
+        self._computed_for: Optional[tuple] = None  # (day, symbols) of the cached betas
+        self._lock = threading.Lock()
+
+    def compute(self, symbols: List[str]) -> Dict[str, float]:
+        """Betas of `symbols` to their equal-weighted average over the last `window` sessions"""
+        self.fetcher.sync_history(symbols, period=BETA_PERIOD, interval="1d")
+
+        closes = {}
+        for symbol in symbols:
+            hist = self.fetcher.history_store.read_frame(symbol, "1d", BETA_PERIOD)
+            if not hist.empty:
+                # Exchange-local session dates, so listings in different zones line up by day
+                closes[symbol] = pd.Series(hist["Close"].values, index=pd.Index(hist.index.date))
+        if len(closes) < 2:
+            return {}
+
+        frame = pd.DataFrame(closes).sort_index()
+        returns = frame.pct_change(fill_method=None).iloc[-self.window:].to_numpy(dtype=np.float64)
+        betas = sector_betas(returns)
+        return {symbol: float(beta) for symbol, beta in zip(frame.columns, betas) if not np.isnan(beta)}
+
+    def betas(self, symbols: List[str]) -> Dict[str, float]:
+        """Cached betas, recomputed when the day or the universe changes"""
+        key = (datetime.now(timezone.utc).date(), tuple(sorted(symbols)))
+        with self._lock:
+            if self._computed_for != key:
+                try:
+                    self._betas = self.compute(list(key[1]))
+                except Exception as e:
+                    print(f"❌ Error computing sector betas: {e}")
+                    self._betas = {}
+                self._computed_for = key
+            return self._betas
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Seconds a cached history stays fresh, keyed by bar interval.
+# Intraday bars go stale as soon as the next bar prints; daily and longer bars barely move.
+INTERVAL_TTLS = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "60m": 3600,
+    "90m": 3600,
+    "1h": 3600,
+    "1d": 4 * 3600,
+    "5d": 4 * 3600,
+    "1wk": 12 * 3600,
+    "1mo": 24 * 3600,
+    "3mo": 24 * 3600,
+}
+
+class StockHistoryCache:
+    """Bounded LRU cache for market data responses with per-interval TTLs"""
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()  # Shared by the chat path, the monitor and the scheduler thread
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, interval: str) -> float:
+        """Get the TTL for a bar interval"""
+        return INTERVAL_TTLS.get(interval, self.default_ttl)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries when full"""
+        if ttl is None:
+            ttl = self.default_ttl
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop every entry for a symbol, or the whole cache"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                return
+
+            for key in [k for k in self._entries if isinstance(k, tuple) and k and k[0] == symbol]:
+                del self._entries[key]
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
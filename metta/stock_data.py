@@ -1,13 +1,32 @@
-import yfinance as yf
+import pandas as pd
+import numpy as np
 import requests
 import json
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional, List, Tuple
+from .stock_cache import StockHistoryCache
+from .bar_store import IntradayBarStore
+from .history_store import HistoryStore, STORED_INTERVALS
+from .symbol_index import SymbolResolver, DEFAULT_ALIASES
+from .fundamentals import FundamentalsCache
+from .exchange_calendar import exchange_calendar
+from .market_data_provider import MarketDataProvider, create_provider_from_env
+
+# Bar timestamps mark the bar open, so the latest 1m bar can be up to a minute old
+# before the next one prints, plus up to a minute of quote-cache TTL
+MAX_BAR_AGE_SECONDS = 120
+
+# Within this many seconds of the last stored 1m bar, only newer bars are downloaded
+INCREMENTAL_SYNC_WINDOW = 1800
 
 class StockDataFetcher:
     """Fetches real-time stock data for semiconductor companies"""
     
-    def __init__(self):
+    def __init__(self, provider: Optional[MarketDataProvider] = None):
+        # Where bars and fundamentals come from (yfinance, or a record/replay backend)
+        self.provider = provider or create_provider_from_env()
+        
         # Map company names to their stock symbols
         self.company_symbols = {
             "NVIDIA": "NVDA", "TSMC": "TSM", "Intel": "INTC", "AMD": "AMD",
@@ -18,58 +37,179 @@ class StockDataFetcher:
             "Samsung": "005930.KS", "Tokyo Electron": "8035.T", "SMIC": "0981.HK", "UMC": "UMC"
         }
         
+        # Ticker / name / alias index, built once so lookups don't scan the map
+        self.symbol_resolver = SymbolResolver(self.company_symbols, DEFAULT_ALIASES)
+        
+        # Shared by every caller of the fetcher, keyed on (symbol, period, interval)
+        self.history_cache = StockHistoryCache()
+        
+        # Today's 1m bars per symbol, appended as new bars arrive
+        self.bar_store = IntradayBarStore()
+        
+        # Daily and longer bars persisted on disk and synced incrementally
+        self.history_store = HistoryStore()
+        
+        # Previous close / market cap / shares, refreshed once per trading session
+        self.fundamentals = FundamentalsCache()
+        
     def get_stock_symbol(self, company_name: str) -> Optional[str]:
-        """Get stock symbol for a company name"""
-        # Direct symbol lookup
-        if company_name.upper() in [s.upper() for s in self.company_symbols.values()]:
-            return company_name.upper()
-            
-        # Company name lookup
-        for name, symbol in self.company_symbols.items():
-            if company_name.upper() in name.upper() or name.upper() in company_name.upper():
-                return symbol
-        return None
+        """Get stock symbol for a ticker, company name or alias"""
+        return self.symbol_resolver.resolve(company_name)
+    
+    def add_company(self, company_name: str, symbol: str, aliases: Optional[List[str]] = None):
+        """Add a company to the tracked universe"""
+        self.company_symbols[company_name] = symbol
+        self.symbol_resolver.add(symbol, [company_name] + list(aliases or []))
         
+    def _cache_ttl(self, symbol: str, interval: str) -> float:
+        """Cache TTL for a symbol's bars; a closed market's bars stay valid until it reopens"""
+        ttl = self.history_cache.ttl_for(interval)
+        if exchange_calendar.is_open(symbol):
+            return ttl
+        return max(ttl, exchange_calendar.seconds_until_open(symbol))
+    
     def _fetch_stock_history(self, symbol: str, period: str = "1d", interval: str = "1m") -> Optional[Dict]:
         """Core function to fetch stock data - all other functions use this"""
         try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=period, interval=interval, prepost=True)
+            key = (symbol, period, interval)
+            cached = self.history_cache.get(key)
             
-            if (hist.empty):
-                return None
+            if cached is None:
+                if interval in STORED_INTERVALS:
+                    self.sync_history([symbol], period=period, interval=interval)
+                    hist = self.history_store.read_frame(symbol, interval, period)
+                else:
+                    hist = self.provider.history(symbol, interval=interval, period=period)
+                
+                if (hist.empty):
+                    return None
                 
-            # Get additional info only when needed (for current price calculations)
-            info = None
-            if interval == "1m" and period == "1d":  # Current price request
-                try:
-                    info = ticker.info
-                except:
-                    info = {}
+                cached = {"hist_data": hist, "timestamp": datetime.now()}
+                self.history_cache.put(key, cached, ttl=self._cache_ttl(symbol, interval))
+                if interval == "1m" and period == "1d":
+                    self.bar_store.update(symbol, hist)
                 
             return {
                 "symbol": symbol,
                 "period": period,
                 "interval": interval,
-                "hist_data": hist,
-                "info": info or {},
-                "timestamp": datetime.now()
+                "hist_data": cached["hist_data"],
+                "timestamp": cached["timestamp"]
             }
         except Exception as e:
             print(f"Error fetching data for {symbol}: {e}")
             return None
     
-    def get_current_price(self, symbol: str) -> Optional[Dict]:
-        """Get current stock price and basic metrics"""
-        data = self._fetch_stock_history(symbol, period="1d", interval="1m")
-        if not data or data["hist_data"].empty:
-            return None
-            
-        hist = data["hist_data"]
-        info = data["info"]
+    def _fetch_bulk_history(self, symbols: List[str], period: str = "1d", interval: str = "1m",
+                            refresh: bool = False) -> Dict[str, pd.DataFrame]:
+        """Fetch bars for many symbols, serving cached ones and downloading the rest together"""
+        results = {}
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            cached = None if refresh else self.history_cache.get((symbol, period, interval))
+            if cached is not None:
+                results[symbol] = cached["hist_data"]
+            else:
+                missing.append(symbol)
+        
+        if not missing:
+            return results
+        
+        if interval in STORED_INTERVALS:
+            self.sync_history(missing, period=period, interval=interval)
+            fetched = {}
+            for symbol in missing:
+                hist = self.history_store.read_frame(symbol, interval, period)
+                if not hist.empty:
+                    fetched[symbol] = hist
+        else:
+            fetched = self.provider.download(missing, interval=interval, period=period)
+        
+        for symbol, hist in fetched.items():
+            results[symbol] = hist
+            self.history_cache.put(
+                (symbol, period, interval),
+                {"hist_data": hist, "timestamp": datetime.now()},
+                ttl=self._cache_ttl(symbol, interval)
+            )
+            if interval == "1m" and period == "1d":
+                self.bar_store.update(symbol, hist)
+        
+        return results
+    
+    def sync_intraday(self, symbols: List[str]):
+        """Bring the bar store's 1m bars up to date, downloading only recent bars where possible
+        
+        Symbols whose last stored bar is recent are fetched from that bar onwards (so the
+        bar still forming is re-read); the rest get a full session download.
+        """
+        now = time.time()
+        full, recent = [], {}
+        for symbol in dict.fromkeys(symbols):
+            last = self.bar_store.last_timestamp(symbol)
+            if last is not None and now - last < INCREMENTAL_SYNC_WINDOW:
+                recent[symbol] = last
+            else:
+                full.append(symbol)
         
+        if full:
+            self._fetch_bulk_history(full, period="1d", interval="1m", refresh=True)
+        if recent:
+            start = datetime.fromtimestamp(min(recent.values()), tz=timezone.utc)
+            for symbol, hist in self.provider.download(list(recent), interval="1m", start=start).items():
+                self.bar_store.update(symbol, hist, session=False)
+    
+    def sync_history(self, symbols: List[str], period: str = "5d", interval: str = "1d") -> Dict[str, int]:
+        """Bring the on-disk bars up to date, downloading only what is not stored yet
+        
+        Symbols with no stored bars (or too short a history for `period`) get one full
+        download; the rest are fetched from the day of their last stored bar onwards.
+        Returns the number of new bars stored per symbol.
+        """
+        full = []
+        incremental: Dict[str, List[str]] = {}
+        for symbol in dict.fromkeys(symbols):
+            if not self.history_store.needs_sync(symbol, interval, period):
+                continue
+            last = self.history_store.last_timestamp(symbol, interval)
+            if last is None or not self.history_store.covers(symbol, interval, period):
+                full.append(symbol)
+            else:
+                # Re-fetch the last stored day too: its bar may still have been in progress
+                start = datetime.fromtimestamp(last, tz=timezone.utc).strftime("%Y-%m-%d")
+                incremental.setdefault(start, []).append(symbol)
+        
+        added = {}
+        try:
+            if full:
+                for symbol, hist in self.provider.download(full, interval=interval, period=period).items():
+                    self.history_store.replace(symbol, interval, hist, period, flush=False)
+                    added[symbol] = len(hist)
+            for start, group in incremental.items():
+                for symbol, hist in self.provider.download(group, interval=interval, start=start).items():
+                    added[symbol] = self.history_store.append(symbol, interval, hist, flush=False)
+        finally:
+            # One index write for the whole batch
+            self.history_store.flush()
+        return added
+    
+    def _previous_close_from_daily(self, daily: Optional[pd.DataFrame], latest_time) -> Optional[float]:
+        """Close of the last completed session, skipping the daily bar of the session in progress"""
+        if daily is None or daily.empty:
+            return None
+        closes = daily['Close'].dropna()
+        if closes.empty:
+            return None
+        if len(closes) >= 2 and closes.index[-1].date() >= latest_time.date():
+            return float(closes.iloc[-2])
+        return float(closes.iloc[-1])
+    
+    def _build_price_summary(self, symbol: str, hist: pd.DataFrame, previous_close: Optional[float],
+                             market_cap, timestamp: datetime) -> Dict:
+        """Build the current price dict shared by single and bulk quote paths"""
         current_price = hist['Close'].iloc[-1]
-        previous_close = info.get('previousClose', current_price)
+        if not previous_close:
+            previous_close = current_price
         
         return {
             "symbol": symbol,
@@ -78,41 +218,111 @@ class StockDataFetcher:
             "change": round(current_price - previous_close, 2),
             "change_percent": round(((current_price - previous_close) / previous_close) * 100, 2),
             "volume": hist['Volume'].iloc[-1] if not hist['Volume'].empty else 0,
-            "market_cap": info.get('marketCap', 'N/A'),
-            "timestamp": data["timestamp"].strftime("%Y-%m-%d %H:%M:%S")
+            "market_cap": market_cap,
+            "timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S")
         }
     
-    def get_price_at_time(self, symbol: str, minutes_ago: int) -> Optional[float]:
-        """Get stock price from X minutes ago - simplified approach"""
+    def get_fundamentals(self, symbol: str, session: str) -> Dict:
+        """Get previous close, market cap and shares outstanding, fetched once per session"""
+        record = self.fundamentals.get(symbol, session)
+        if record:
+            return record
+        
+        try:
+            info = self.provider.info(symbol)
+        except Exception as e:
+            # Not cached, so the next quote retries; callers fall back to daily bars
+            print(f"⚠️ Could not fetch fundamentals for {symbol}: {e}")
+            return {}
+        
+        return self.fundamentals.put(
+            symbol, session,
+            previous_close=info.get('previousClose'),
+            market_cap=info.get('marketCap'),
+            shares_outstanding=info.get('sharesOutstanding')
+        )
+    
+    def get_current_price(self, symbol: str) -> Optional[Dict]:
+        """Get current stock price and basic metrics"""
         data = self._fetch_stock_history(symbol, period="1d", interval="1m")
         if not data or data["hist_data"].empty:
             return None
-        
+            
         hist = data["hist_data"]
-        
-        # Check if latest data is recent enough (within 1 minute)
         latest_time = hist.index[-1]
-        if hasattr(latest_time, 'tz_localize'):
-            latest_time = latest_time.tz_localize(None)
-        elif latest_time.tzinfo:
-            latest_time = latest_time.replace(tzinfo=None)
         
-        time_diff_seconds = (datetime.now() - latest_time).total_seconds()
+        # The session is identified by the exchange-local date of the latest bar
+        fundamentals = self.get_fundamentals(symbol, latest_time.date().isoformat())
+        previous_close = fundamentals.get('previous_close')
+        if not previous_close:
+            daily = self._fetch_bulk_history([symbol], period="5d", interval="1d").get(symbol)
+            previous_close = self._previous_close_from_daily(daily, latest_time)
         
-        # If latest data is older than 1 minute, print warning and return None
-        if time_diff_seconds > 60:
-            print(f"⚠️ Latest data for {symbol} is {time_diff_seconds/60:.1f} minutes old (timestamp: {latest_time})")
+        market_cap = self.fundamentals.market_cap(fundamentals, hist['Close'].iloc[-1])
+        return self._build_price_summary(symbol, hist, previous_close, market_cap, data["timestamp"])
+    
+    def get_bulk_quotes(self, symbols: List[str], with_fundamentals: bool = False) -> Dict[str, Dict]:
+        """Get current prices plus intraday and daily bars for many symbols at once
+        
+        Costs two multi-symbol downloads per listing venue instead of ~5 requests per symbol.
+        Previous close is taken from daily bars. Market cap comes from the fundamentals
+        cache; with `with_fundamentals=True` missing records are fetched (once per session).
+        Intraday bars are returned as bar store views of the current session.
+        """
+        intraday = self._fetch_bulk_history(symbols, period="1d", interval="1m")
+        if not intraday:
+            return {}
+        daily = self._fetch_bulk_history(list(intraday.keys()), period="5d", interval="1d")
+        timestamp = datetime.now()
+        
+        results = {}
+        for symbol, hist in intraday.items():
+            daily_hist = daily.get(symbol)
+            latest_time = hist.index[-1]
+            previous_close = self._previous_close_from_daily(daily_hist, latest_time)
+            
+            session = latest_time.date().isoformat()
+            if with_fundamentals:
+                fundamentals = self.get_fundamentals(symbol, session)
+            else:
+                fundamentals = self.fundamentals.get(symbol, session)
+            if not previous_close and fundamentals:
+                previous_close = fundamentals.get('previous_close')
+            market_cap = self.fundamentals.market_cap(fundamentals, hist['Close'].iloc[-1])
+            
+            results[symbol] = {
+                "symbol": symbol,
+                "current": self._build_price_summary(symbol, hist, previous_close, market_cap, timestamp),
+                "bars": self.bar_store.session(symbol),
+                "daily_data": daily_hist
+            }
+        return results
+    
+    def get_price_at_time(self, symbol: str, minutes_ago: int) -> Optional[float]:
+        """Get stock price from X minutes ago - simplified approach"""
+        # A closed market has no recent bars to compare against, so don't fetch any
+        if not exchange_calendar.is_open(symbol):
+            return None
+        
+        # Refreshes the bar store only if the cached 1m bars have expired
+        self._fetch_bulk_history([symbol], period="1d", interval="1m")
+        session = self.bar_store.session(symbol)
+        # Bars from before today's first bar belong to another session, so don't reach back into them
+        if session is None or len(session) < minutes_ago:
             return None
+        bars = self.bar_store.window(symbol, minutes_ago)
         
-        # Use simple indexing: -1 is current, -5 is ~5 minutes ago, etc.
-        target_index = -min(minutes_ago, len(hist))
+        # Check if latest data is recent enough
+        time_diff_seconds = time.time() - bars.timestamps[-1]
         
-        # Make sure we have enough data points
-        if abs(target_index) > len(hist):
-            print(f"⚠️ Not enough historical data for {symbol} (requested: {minutes_ago} min ago, available: {len(hist)} points)")
+        # If latest data is too old, print warning and return None
+        if time_diff_seconds > MAX_BAR_AGE_SECONDS:
+            latest_time = datetime.fromtimestamp(int(bars.timestamps[-1]))
+            print(f"⚠️ Latest data for {symbol} is {time_diff_seconds/60:.1f} minutes old (timestamp: {latest_time})")
             return None
         
-        target_price = hist['Close'].iloc[target_index]
+        # The window ends at the current bar: close[0] is ~minutes_ago back
+        target_price = bars.close[0]
         return round(target_price, 2)
     
     def get_historical_data(self, symbol: str, period: str = "5d", interval: str = "1d", max_points: int = 20) -> Optional[Dict]:
@@ -120,31 +330,48 @@ class StockDataFetcher:
         data = self._fetch_stock_history(symbol, period=period, interval=interval)
         if not data or data["hist_data"].empty:
             return None
-            
-        hist = data["hist_data"]
+        
+        if period == "1d" and interval == "1m":
+            # Today's 1m bars come straight from the bar store views
+            bars = self.bar_store.session(symbol)
+            if bars is None or not len(bars):
+                return None
+            dates = pd.to_datetime(bars.timestamps, unit="s", utc=True)
+            if bars.tz:
+                dates = dates.tz_convert(bars.tz)
+            opens, highs, lows, closes, volumes = bars.open, bars.high, bars.low, bars.close, bars.volume
+        else:
+            hist = data["hist_data"]
+            dates = hist.index
+            opens, highs, lows, closes, volumes = (
+                hist[column].to_numpy(dtype=np.float64) for column in ("Open", "High", "Low", "Close", "Volume")
+            )
         
         # Format timestamp based on interval
         timestamp_format = "%Y-%m-%d %H:%M:%S" if interval in ["1m", "5m", "15m", "30m", "1h"] else "%Y-%m-%d"
         
-        price_data = []
-        for timestamp, row in hist.iterrows():
-            price_data.append({
-                "date": timestamp.strftime(timestamp_format),
-                "open": round(row['Open'], 2),
-                "high": round(row['High'], 2), 
-                "low": round(row['Low'], 2),
-                "close": round(row['Close'], 2),
-                "volume": int(row['Volume'])
-            })
+        # Only the last N points are formatted; columns are rounded in one pass each
+        tail = slice(-max_points, None)
+        price_data = [
+            {"date": date, "open": o, "high": h, "low": l, "close": c, "volume": int(v)}
+            for date, o, h, l, c, v in zip(
+                dates[tail].strftime(timestamp_format),
+                np.round(opens[tail], 2).tolist(),
+                np.round(highs[tail], 2).tolist(),
+                np.round(lows[tail], 2).tolist(),
+                np.round(closes[tail], 2).tolist(),
+                np.nan_to_num(volumes[tail]).tolist()
+            )
+        ]
         
         return {
             "symbol": symbol,
             "period": period,
             "interval": interval,
-            "high": round(hist['High'].max(), 2),
-            "low": round(hist['Low'].min(), 2),
-            "avg_volume": int(hist['Volume'].mean()),
-            "price_data": price_data[-max_points:]  # Last N points
+            "high": round(float(np.nanmax(highs)), 2),
+            "low": round(float(np.nanmin(lows)), 2),
+            "avg_volume": int(np.nanmean(volumes)),
+            "price_data": price_data
         }
     
     # Simplified wrapper functions for backward compatibility
@@ -178,14 +405,30 @@ class StockDataFetcher:
             "daily_history": daily_history  # Keep daily data for longer-term analysis
         }
         
+    def fetch_bulk_company_data(self, company_names: List[str], with_fundamentals: bool = False) -> Dict[str, Dict]:
+        """Get quotes and bars for many companies, keyed by company name"""
+        company_by_symbol = {}
+        for company_name in company_names:
+            symbol = self.get_stock_symbol(company_name)
+            if symbol and symbol not in company_by_symbol:
+                company_by_symbol[symbol] = company_name
+        
+        quotes = self.get_bulk_quotes(list(company_by_symbol.keys()), with_fundamentals=with_fundamentals)
+        
+        return {
+            company_by_symbol[symbol]: {"company": company_by_symbol[symbol], **quote}
+            for symbol, quote in quotes.items()
+        }
+        
     def fetch_sector_overview(self) -> Dict:
         """Get semiconductor sector performance overview"""
         sector_companies = ["NVDA", "TSM", "INTC", "AMD", "QCOM", "AVGO", "MU"]
         results = {}
         
+        quotes = self.get_bulk_quotes(sector_companies)
         for symbol in sector_companies:
-            data = self.get_current_price(symbol)
-            if data:
+            if symbol in quotes:
+                data = quotes[symbol]["current"]
                 results[symbol] = {
                     "price": data['current_price'],
                     "change_percent": data['change_percent'],
@@ -1,129 +1,361 @@
 import asyncio
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from .stock_data import stock_fetcher
+from typing import Dict, List, Optional, Set
+import numpy as np
+from .stock_data import stock_fetcher, MAX_BAR_AGE_SECONDS
+from .async_fetcher import async_stock_fetcher
 from .email_service import email_service
+from .bar_store import BarWindow
+from .quote_feed import QuoteFeed
+from .volatility_scan import VolatilityScanner
+from .volatility_stats import VolatilityStats
+from .alert_state import AlertStateMachine
+from .poll_scheduler import watchlist, poll_scheduler, MAX_ACTIVITY_FACTOR
+from .sector_beta import SectorBetas
+
+# Alert state key and display name for sector-wide moves
+SECTOR_SYMBOL = "SECTOR"
+SECTOR_NAME = "Semiconductor Sector"
+
+# Recent bars whose average volume, against the session average, signals activity
+ACTIVITY_VOLUME_BARS = 5
+
+# Stocks whose latest bar is older than this (closed markets, slow poll tiers) stay out of the sector move
+SECTOR_MAX_BAR_AGE_SECONDS = 20 * 60
 
 class StockMonitor:
     """Stock price monitoring class for detecting significant fluctuations and triggering alerts"""
     
     def __init__(self):
-        # List of major semiconductor companies
-        self.watched_companies = [
-            "NVIDIA", "TSMC", "Intel", "AMD", "Qualcomm", 
-            "Broadcom", "Micron", "ASML", "Texas Instruments"
-        ]
+        # Semiconductor companies across all watchlist tiers (see poll_scheduler)
+        self.watched_companies = [company for tier in watchlist.values() for company in tier]
         
         # Volatility threshold settings
         self.volatility_thresholds = {
             "high": 5.0,      # 5% change triggers high volatility alert
             "extreme": 10.0,   # 10% change triggers extreme volatility alert
         }
+        
+        # Once a stock has enough 1m history, moves are judged against its own volatility
+        # (scaled to each window's length) instead of the fixed percentages above
+        self.sigma_thresholds = {
+            "high": 4.0,         # 4 standard deviations triggers high volatility alert
+            "extreme": 6.0,      # 6 standard deviations triggers extreme volatility alert
+            "min_percent": 1.0,  # ignore moves smaller than 1% however unusual
+        }
+        self.volatility_stats = VolatilityStats()
+        
+        # Per-symbol alert state with cooldowns, shared by every check that can alert
+        self.alert_state = AlertStateMachine()
+        
+        # Knowledge graph RAG and LLM client for alert analysis, shared across alerts
+        self.rag = None
+        self.llm = None
+        
+        # Alert analyses run side by side on a bounded pool, in background tasks so scans
+        # never wait for them; an alert whose analysis misses the deadline (including time
+        # spent queued for a worker) is sent with its price data only
+        self._analysis_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("ALERT_ANALYSIS_CONCURRENCY", "4")), thread_name_prefix="alert-analysis"
+        )
+        self.analysis_deadline = float(os.getenv("ALERT_ANALYSIS_DEADLINE", "90"))
+        self._alert_tasks: Set[asyncio.Task] = set()
+        
+        # Quote feed updates arrive keyed by symbol
+        self._companies_by_symbol = {}
+        for company in self.watched_companies:
+            symbol = stock_fetcher.get_stock_symbol(company)
+            if symbol:
+                self._companies_by_symbol[symbol] = company
+        
+        # Moves over 1/5/15/60 minutes and since the open, for all symbols at once,
+        # measured against the sector through each stock's beta
+        self.scanner = VolatilityScanner(stock_fetcher.bar_store)
+        self.sector_betas = SectorBetas(stock_fetcher)
     
     async def check_volatility(self) -> List[Dict]:
-        """Simple volatility check: compare current price vs 5 minutes ago"""
-        print("🔍 Checking 5-minute price changes...")
+        """Volatility check: scan every watched stock's moves over all scan windows
         
-        alerts = []
+        Returns the moves that fire an alert; their alerts are analyzed and sent in the background.
+        """
+        print("🔍 Checking intraday price changes...")
         
-        for company in self.watched_companies:
-            try:
-                # Get current price
-                stock_data = stock_fetcher.fetch_company_stock_data(company)
-                if not stock_data or not stock_data.get('current'):
-                    continue
-                
-                symbol = stock_data['symbol'] 
-                current_price = stock_data['current']['current_price']
-                
-                # Get price from 5 minutes ago
-                price_5min_ago = stock_fetcher.get_price_at_time(symbol, 5)
-                
-                if not price_5min_ago or price_5min_ago <= 0:
-                    print(f"📊 {company} ({symbol}): ${current_price:.2f} (no 5min data)")
-                    continue
-                
-                # Calculate percentage change
-                change_percent = ((current_price - price_5min_ago) / price_5min_ago) * 100
-                
-                print(f"📊 {company} ({symbol}): {change_percent:+.2f}% (${price_5min_ago:.2f} → ${current_price:.2f})")
-                
-                # Check if it exceeds thresholds
-                if abs(change_percent) >= self.volatility_thresholds["extreme"]:
-                    severity = 'extreme'
-                    trigger = f'Extreme 5-minute volatility: {change_percent:+.2f}%'
-                elif abs(change_percent) >= self.volatility_thresholds["high"]:
-                    severity = 'high' 
-                    trigger = f'High 5-minute volatility: {change_percent:+.2f}%'
-                else:
-                    continue  # No alert needed
-                
-                # Get LLM analysis
-                llm_analysis = await self._analyze_stock_event_with_llm(
-                    company, symbol, change_percent, current_price, price_5min_ago, "5 minutes"
-                )
-                
-                alert = {
-                    'company': company,
-                    'symbol': symbol,
-                    'current_price': current_price,
-                    'previous_price': price_5min_ago,
-                    'change_percent': change_percent,
-                    'trigger_reason': trigger,
-                    'severity': severity,
-                    'time_period': '5 minutes',
-                    'llm_analysis': llm_analysis
-                }
-                alerts.append(alert)
-                print(f"🚨 {severity.upper()} alert: {company} {change_percent:+.2f}%")
-                
-            except Exception as e:
-                print(f"❌ Error checking {company}: {e}")
+        # Same incremental bar sync the quote feed uses, off the event loop
+        symbols = list(self._companies_by_symbol)
+        await async_stock_fetcher.run(stock_fetcher.sync_intraday, symbols)
+        
+        moves = await self._scan(symbols, max_age=MAX_BAR_AGE_SECONDS)
         
         # Send alerts if any
-        if alerts:
-            print(f"📧 Sending {len(alerts)} volatility alerts...")
-            success = email_service.send_volatility_alert(alerts)
-            print("✅ Alerts sent" if success else "❌ Failed to send alerts")
+        if moves:
+            self._dispatch_alerts(moves)
         else:
             print("✅ No significant volatility detected")
         
-        return alerts
+        return moves
     
-    async def _analyze_stock_event_with_llm(self, company: str, symbol: str, 
-                                          change_percent: float, current_price: float, 
-                                          previous_price: float, time_period: str) -> str:
-        """Analyze the cause of abnormal stock price fluctuations using LLM"""
+    async def on_bars(self, updates: Dict[str, BarWindow]) -> List[Dict]:
+        """Quote feed callback: scan every symbol that got a new bar, without waiting for alert analyses"""
+        moves = await self._scan(list(updates))
+        if moves:
+            self._dispatch_alerts(moves)
+        self._adapt_polling()
+        return moves
+    
+    def _dispatch_alerts(self, moves: List[Dict]) -> asyncio.Task:
+        """Analyze and send the alerts of firing moves as a background task"""
+        task = asyncio.ensure_future(self._analyze_and_send(moves))
+        self._alert_tasks.add(task)
+        task.add_done_callback(self._alert_tasks.discard)
+        return task
+    
+    async def _analyze_and_send(self, moves: List[Dict]) -> List[Dict]:
+        """Build the alerts of firing moves with their analyses and email them"""
+        try:
+            analyses = await self._analyze_moves(moves)
+            alerts = [self._build_alert(move, analysis) for move, analysis in zip(moves, analyses)]
+            self._send_alerts(alerts)
+            return alerts
+        except Exception as e:
+            print(f"❌ Error sending volatility alerts: {e}")
+            return []
+    
+    def _adapt_polling(self):
+        """Retune per-symbol poll intervals from recent volatility, volume and alert state"""
+        symbols = list(self._companies_by_symbol)
+        sigmas = self.volatility_stats.sigmas(symbols)
+        typical_sigma = float(np.median(list(sigmas.values()))) if sigmas else None
+        
+        activity = {}
+        for symbol in symbols:
+            scores = []
+            # Realized volatility relative to the rest of the universe
+            if typical_sigma and symbol in sigmas:
+                scores.append(sigmas[symbol] / typical_sigma)
+            # Volume of the last few bars relative to the session so far
+            bars = stock_fetcher.bar_store.session(symbol)
+            if bars is not None and len(bars) > ACTIVITY_VOLUME_BARS:
+                session_volume = float(bars.volume.mean())
+                if session_volume > 0:
+                    scores.append(float(bars.volume[-ACTIVITY_VOLUME_BARS:].mean()) / session_volume)
+            # Symbols that are alerting are polled as fast as allowed
+            if self.alert_state.state(symbol) in ('high', 'extreme'):
+                scores.append(MAX_ACTIVITY_FACTOR)
+            # The most active signal wins; symbols without any keep their tier interval
+            activity[symbol] = max(scores) if scores else 1.0
+        
+        poll_scheduler.adapt(activity)
+    
+    def subscribe(self, feed: QuoteFeed) -> int:
+        """Subscribe to bar updates for the watched companies"""
+        return feed.subscribe(self._companies_by_symbol, self.on_bars)
+    
+    async def _scan(self, symbols: List[str], max_age: Optional[float] = None) -> List[Dict]:
+        """Run the multi-window scan and return the moves that should alert
+        
+        The whole watch list is scanned so moves are measured against the sector, but
+        only `symbols` (the ones with new bars) are evaluated for alerts.
+        """
+        for symbol in symbols:
+            self.volatility_stats.observe(symbol, stock_fetcher.bar_store.session(symbol))
+        
+        universe = list(dict.fromkeys(list(self._companies_by_symbol) + list(symbols)))
         try:
+            betas = await async_stock_fetcher.run(self.sector_betas.betas, universe)
+        except Exception as e:
+            print(f"⚠️ Sector betas unavailable, assuming beta 1: {e}")
+            betas = {}
+        
+        result = self.scanner.scan(
+            universe, self.volatility_thresholds, max_age=max_age,
+            sigmas=self.volatility_stats.sigmas(universe), sigma_thresholds=self.sigma_thresholds,
+            betas=betas, sector_max_age=SECTOR_MAX_BAR_AGE_SECONDS
+        )
+        
+        focus = set(symbols)
+        for symbol, changes, excess in zip(result.symbols, result.changes, result.excess):
+            if symbol not in focus:
+                continue
+            moves = ", ".join(f"{window} {change:+.2f}% ({rel:+.2f}% vs sector)"
+                              for window, change, rel in zip(result.windows, changes, excess)
+                              if not np.isnan(change))
+            print(f"📊 {self._companies_by_symbol.get(symbol, symbol)} ({symbol}): {moves}")
+        
+        # Only transitions and escalations alert; a stock that stays volatile is reported once
+        firing = []
+        sector_move = result.sector_triggered()
+        if self.alert_state.update(SECTOR_SYMBOL, sector_move and sector_move['severity'],
+                                   sector_move and sector_move['change_percent']):
+            firing.append(self._sector_alert_move(sector_move, result))
+        
+        moves = {move['symbol']: move for move in result.triggered()}
+        for symbol in result.symbols:
+            if symbol not in focus:
+                continue
+            move = moves.get(symbol)
+            if self.alert_state.update(symbol, move and move['severity'], move and move['change_percent'],
+                                       session=stock_fetcher.bar_store.session_date(symbol)):
+                firing.append(move)
+            elif move:
+                print(f"🔕 {symbol} still {self.alert_state.state(symbol)}, alert suppressed")
+        
+        return firing
+    
+    def _sector_alert_move(self, sector_move: Dict, result) -> Dict:
+        """Describe a sector-wide move like a stock move, with its biggest movers"""
+        column = result.windows.index(sector_move['time_period'])
+        order = np.argsort(-np.abs(np.nan_to_num(result.changes[:, column])))
+        leaders = [(result.symbols[row], float(result.changes[row, column])) for row in order[:5]]
+        # An average across the sector has no price of its own
+        return dict(sector_move, symbol=SECTOR_SYMBOL, current_price=None, previous_price=None,
+                    excess_change=0.0, zscore=None, leaders=leaders)
+    
+    async def _analyze_moves(self, moves: List[Dict]) -> List[str]:
+        """Analyze all triggered moves concurrently, giving up on any not done by the deadline"""
+        if not moves:
+            return []
+        
+        # Work still queued for a worker at the deadline is skipped rather than run for nothing
+        deadline = time.monotonic() + self.analysis_deadline
+        tasks = []
+        for move in moves:
+            if move['symbol'] == SECTOR_SYMBOL:
+                analysis = self._analyze_sector_move_with_llm(
+                    move['change_percent'], move['time_period'], move['symbols'], move['leaders'], deadline
+                )
+            else:
+                analysis = self._analyze_stock_event_with_llm(
+                    self._companies_by_symbol.get(move['symbol'], move['symbol']), move['symbol'],
+                    move['change_percent'], move['current_price'], move['previous_price'], move['time_period'],
+                    deadline
+                )
+            tasks.append(asyncio.ensure_future(analysis))
+        done, pending = await asyncio.wait(tasks, timeout=self.analysis_deadline)
+        for task in pending:
+            task.cancel()
+        
+        analyses = []
+        for move, task in zip(moves, tasks):
+            if task in done and not task.exception():
+                analyses.append(task.result())
+            else:
+                print(f"⏱️ Analysis for {move['symbol']} not ready after {self.analysis_deadline:.0f}s, sending price data only")
+                analyses.append(f"Price moved {move['change_percent']:+.2f}% ({move['time_period']}). "
+                                f"The analysis of the cause did not finish in time.")
+        return analyses
+    
+    def _build_alert(self, move: Dict, llm_analysis: str) -> Dict:
+        """Turn a triggered scan entry and its analysis into an alert"""
+        symbol = move['symbol']
+        company = SECTOR_NAME if symbol == SECTOR_SYMBOL else self._companies_by_symbol.get(symbol, symbol)
+        change_percent = move['change_percent']
+        severity = move['severity']
+        
+        if symbol == SECTOR_SYMBOL:
+            trigger = (f"{severity.capitalize()} sector-wide move ({move['time_period']}): "
+                       f"{change_percent:+.2f}% average across {move['symbols']} stocks")
+        else:
+            trigger = f"{severity.capitalize()} volatility ({move['time_period']}): {change_percent:+.2f}%"
+            if abs(move['excess_change'] - change_percent) >= 0.01:
+                trigger += f", {move['excess_change']:+.2f}% beyond the sector"
+            if move['zscore'] is not None:
+                trigger += f" ({move['zscore']:+.1f}σ)"
+        
+        print(f"🚨 {severity.upper()} alert: {company} {change_percent:+.2f}% ({move['time_period']})")
+        return {
+            'company': company,
+            'symbol': symbol,
+            'current_price': move['current_price'],
+            'previous_price': move['previous_price'],
+            'change_percent': change_percent,
+            'trigger_reason': trigger,
+            'severity': severity,
+            'time_period': move['time_period'],
+            'llm_analysis': llm_analysis
+        }
+    
+    def describe_thresholds(self) -> str:
+        """How moves are judged, for reports"""
+        sigma = self.sigma_thresholds
+        fixed = self.volatility_thresholds
+        return (f"High ≥{sigma['high']:g}σ, Extreme ≥{sigma['extreme']:g}σ of each stock's own volatility "
+                f"(at least {sigma['min_percent']:g}%), measured beyond the sector's move; "
+                f"High ≥{fixed['high']:g}%, Extreme ≥{fixed['extreme']:g}% until a stock has enough history")
+    
+    def _send_alerts(self, alerts: List[Dict]):
+        """Email a batch of volatility alerts"""
+        print(f"📧 Sending {len(alerts)} volatility alerts...")
+        success = email_service.send_volatility_alert(alerts)
+        print("✅ Alerts sent" if success else "❌ Failed to send alerts")
+    
+    def attach_analysis_context(self, rag, llm):
+        """Use an existing knowledge graph RAG and LLM client for alert analysis"""
+        self.rag = rag
+        self.llm = llm
+    
+    def _analysis_context(self):
+        """RAG and LLM for alert analysis, built once if none was attached"""
+        if self.rag is None or self.llm is None:
             # Dynamically import to avoid circular imports
-            import os
-            from .utils import LLM, process_query
+            from .utils import LLM
             from .investment_rag import InvestmentRAG
             from .knowledge import initialize_investment_knowledge
             from hyperon import MeTTa
             
-            # Initialize LLM
-            llm = LLM(api_key=os.getenv("ASI_ONE_API_KEY"))
-            
-            # Initialize knowledge graph and RAG
+            print("🧠 Building analysis context for stock alerts...")
             metta = MeTTa()
             initialize_investment_knowledge(metta)
-            rag = InvestmentRAG(metta)
-            
-            # Construct query
-            query = f"""
-            {company} ({symbol}) stock price just moved {change_percent:+.2f}% in the last {time_period}, 
-            from ${previous_price:.2f} to ${current_price:.2f}. 
-            
-            What might have caused this significant price movement? 
-            Please analyze recent news, market events, or company developments that could explain this volatility.
-            Keep the response concise and focused on the most likely causes.
-            """
+            self.rag = InvestmentRAG(metta)
+            self.llm = LLM(api_key=os.getenv("ASI_ONE_API_KEY"))
+        return self.rag, self.llm
+    
+    async def _analyze_stock_event_with_llm(self, company: str, symbol: str, 
+                                          change_percent: float, current_price: float, 
+                                          previous_price: float, time_period: str,
+                                          deadline: Optional[float] = None) -> str:
+        """Analyze the cause of abnormal stock price fluctuations using LLM"""
+        # Construct query
+        query = f"""
+        {company} ({symbol}) stock price just moved {change_percent:+.2f}% ({time_period}), 
+        from ${previous_price:.2f} to ${current_price:.2f}. 
+        
+        What might have caused this significant price movement? 
+        Please analyze recent news, market events, or company developments that could explain this volatility.
+        Keep the response concise and focused on the most likely causes.
+        """
+        fallback = f"Price moved {change_percent:+.2f}% ({time_period}). Unable to analyze the cause at this time."
+        return await self._run_analysis(query, fallback, company, deadline)
+    
+    async def _analyze_sector_move_with_llm(self, change_percent: float, time_period: str,
+                                            companies: int, leaders: List,
+                                            deadline: Optional[float] = None) -> str:
+        """Analyze the cause of a sector-wide move using LLM"""
+        movers = ", ".join(f"{symbol} {change:+.2f}%" for symbol, change in leaders)
+        query = f"""
+        The semiconductor sector just moved {change_percent:+.2f}% on average across {companies} stocks ({time_period}). 
+        Biggest movers: {movers}. 
+        
+        What market-wide, macro or industry event might have caused this sector-wide move? 
+        Keep the response concise and focused on the most likely causes.
+        """
+        fallback = f"Sector moved {change_percent:+.2f}% ({time_period}). Unable to analyze the cause at this time."
+        return await self._run_analysis(query, fallback, SECTOR_NAME, deadline)
+    
+    async def _run_analysis(self, query: str, fallback: str, subject: str,
+                            deadline: Optional[float] = None) -> str:
+        """Answer an analysis query with the shared RAG and LLM, unless the pool only gets to it after `deadline`"""
+        try:
+            from .utils import process_query
+            rag, llm = self._analysis_context()
             
-            # Use process_query to get analysis
-            response = process_query(query, rag, llm)
+            # Use process_query to get analysis, on the analysis pool so alerts are analyzed side by side
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self._analysis_executor, self._analyze_before, deadline,
+                                                  process_query, query, rag, llm)
             
             if isinstance(response, dict):
                 analysis = response.get('humanized_answer', 'Unable to analyze the price movement at this time.')
@@ -134,8 +366,22 @@ class StockMonitor:
             return analysis[:500] + "..." if len(analysis) > 500 else analysis
             
         except Exception as e:
-            print(f"❌ Error getting LLM analysis for {company}: {e}")
-            return f"Price moved {change_percent:+.2f}% in {time_period}. Unable to analyze the cause at this time."
+            print(f"❌ Error getting LLM analysis for {subject}: {e}")
+            return fallback
+
+    @staticmethod
+    def _analyze_before(deadline: Optional[float], func, *args):
+        """Run `func` on an analysis worker only if the deadline (time.monotonic()) has not passed"""
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("analysis deadline passed while queued")
+        return func(*args)
+
+    async def warm_sector_overview(self):
+        """Fetch the overview's fundamentals ahead of time, so a later overview only refreshes quotes"""
+        try:
+            await async_stock_fetcher.fetch_bulk_company_data(self.watched_companies, with_fundamentals=True)
+        except Exception as e:
+            print(f"⚠️ Could not warm sector overview data: {e}")
 
     async def get_sector_overview(self) -> Dict:
         """Get an overview of the semiconductor sector"""
@@ -145,9 +391,11 @@ class StockMonitor:
         total_change = 0
         valid_companies = 0
         
+        quotes = await async_stock_fetcher.fetch_bulk_company_data(self.watched_companies, with_fundamentals=True)
+        
         for company in self.watched_companies:
             try:
-                stock_data = stock_fetcher.fetch_company_stock_data(company)
+                stock_data = quotes.get(company)
                 
                 if stock_data and stock_data.get('current'):
                     current_data = stock_data['current']
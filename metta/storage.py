@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+from typing import Any
+
+# Root for everything the agent persists between restarts (market data, caches, job state)
+DATA_DIR = os.getenv(
+    "AGENT_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+)
+
+def data_path(*parts: str) -> str:
+    """Get a path under the data directory, creating parent folders as needed"""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def load_json(path: str, default: Any = None) -> Any:
+    """Read a JSON file, falling back to `default` if it is missing or corrupt"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Could not read {path}: {e}")
+        return default
+
+def save_json(path: str, data: Any):
+    """Write a JSON file atomically so a crash never leaves it half-written"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,112 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Other names people use for listed companies, beyond the canonical name and ticker
+DEFAULT_ALIASES = {
+    "TSM": ["Taiwan Semiconductor", "Taiwan Semiconductor Manufacturing", "Taiwan Semi", "2330.TW"],
+    "AMD": ["Advanced Micro Devices"],
+    "TXN": ["TI"],
+    "ASML": ["ASML Holding"],
+    "MU": ["Micron Technology"],
+    "MRVL": ["Marvell Technology"],
+    "KLAC": ["KLA", "KLA-Tencor"],
+    "000660.KS": ["Hynix", "SKHynix"],
+    "005930.KS": ["Samsung Electronics"],
+    "0981.HK": ["Semiconductor Manufacturing International"],
+    "UMC": ["United Microelectronics"],
+}
+
+# Corporate suffixes that never distinguish one company from another
+SUFFIX_WORDS = {
+    "INC", "INCORPORATED", "CORP", "CORPORATION", "CO", "COMPANY", "LTD", "LIMITED",
+    "PLC", "NV", "SA", "AG", "HOLDING", "HOLDINGS", "GROUP", "TECHNOLOGY", "TECHNOLOGIES",
+}
+
+# Words that commonly surround a company name in a query
+STOP_WORDS = {"THE", "STOCK", "STOCKS", "SHARE", "SHARES", "PRICE", "OF", "FOR", "AND", "S"}
+
+# Shorter keys ("TI", "MU") only resolve when they are the whole query; inside a
+# sentence they collide with ordinary words and fragments
+MIN_TOKEN_MATCH_LENGTH = 3
+
+def normalize(text: str) -> str:
+    """Uppercase, drop punctuation (keeping ticker dots) and corporate suffixes"""
+    text = text.upper().replace("&", " AND ")
+    text = re.sub(r"[^A-Z0-9.\s]", " ", text)
+    tokens = [token.strip(".") for token in text.split()]
+    return " ".join(token for token in tokens if token and token not in SUFFIX_WORDS)
+
+class SymbolResolver:
+    """Constant-time company name / alias / ticker to symbol lookup
+
+    Built once from the company map: every ticker, canonical name and alias is
+    normalized into a dict. A query is resolved by an exact lookup, then by probing
+    its token n-grams (longest first), so cost depends only on the query length.
+    Leading words of a multi-word name ("Lam", "Texas", "SK") are indexed too, so
+    partial names match on whole-word boundaries only, never inside another word.
+    """
+
+    def __init__(self, company_symbols: Dict[str, str], aliases: Optional[Dict[str, Iterable[str]]] = None):
+        self._exact: Dict[str, Optional[str]] = {}
+        self._phrases: Dict[str, Optional[str]] = {}
+        self._prefixes: Dict[str, Optional[str]] = {}  # leading words of multi-word names
+        self._max_phrase_tokens = 1
+
+        for name, symbol in company_symbols.items():
+            self.add(symbol, [name])
+        for symbol, names in (aliases or {}).items():
+            self.add(symbol, names)
+
+    def _index(self, table: Dict[str, Optional[str]], key: str, symbol: str):
+        # A key claimed by two different symbols is ambiguous and resolves to nothing
+        if key in table and table[key] != symbol:
+            table[key] = None
+        else:
+            table[key] = symbol
+
+    def add(self, symbol: str, names: Iterable[str] = ()):
+        """Register a symbol together with any names it should be found by"""
+        symbol = symbol.upper()
+        keys = {normalize(symbol)}
+        keys.update(normalize(name) for name in names)
+        # Listing codes like 005930.KS are also typed without the venue suffix
+        keys.update(key.split(".")[0] for key in list(keys) if re.fullmatch(r"[0-9A-Z]+\.[A-Z]{1,2}", key))
+
+        for key in keys:
+            if not key:
+                continue
+            self._index(self._exact, key, symbol)
+            if len(key) >= MIN_TOKEN_MATCH_LENGTH and key not in STOP_WORDS:
+                self._index(self._phrases, key, symbol)
+                self._max_phrase_tokens = max(self._max_phrase_tokens, len(key.split()))
+            tokens = key.split()
+            for size in range(1, len(tokens)):
+                prefix = " ".join(tokens[:size])
+                if prefix not in STOP_WORDS:
+                    self._index(self._prefixes, prefix, symbol)
+
+    def resolve(self, query: str) -> Optional[str]:
+        """Get the symbol for a ticker, company name or alias, or None"""
+        key = normalize(query)
+        if not key:
+            return None
+        if key in self._exact:
+            return self._exact[key]
+
+        if key in self._prefixes:
+            return self._prefixes[key]
+
+        tokens = [token for token in key.split() if token not in STOP_WORDS]
+        for size in range(min(self._max_phrase_tokens, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                probe = " ".join(tokens[start:start + size])
+                symbol = self._phrases.get(probe)
+                if not symbol and len(probe) >= MIN_TOKEN_MATCH_LENGTH:
+                    symbol = self._prefixes.get(probe)
+                if symbol:
+                    return symbol
+        return None
+
+    def symbols(self) -> List[str]:
+        """Every symbol the resolver can return"""
+        return sorted({symbol for symbol in self._exact.values() if symbol})
@@ -1,7 +1,10 @@
 import json
 import shutil
+from typing import Callable, Optional
 from openai import OpenAI
 from .investment_rag import InvestmentRAG
+from .report_history import ReportHistory
+from .llm_cache import LLMCompletionCache, completion_key, llm_cache
 from .stock_data import stock_fetcher
 from .news_data import (
     filter_news_with_llm,
@@ -16,42 +19,73 @@ from .prompt import (
 )
 
 class LLM:
-    def __init__(self, api_key):
+    def __init__(self, api_key, model="asi1-mini", cache: Optional[LLMCompletionCache] = llm_cache):
         self.client = OpenAI(
             api_key=api_key,
             base_url="https://api.asi1.ai/v1"
         )
+        self.model = model
+        self.cache = cache
 
-    def create_completion(self, prompt, max_tokens=2500):
+    def create_completion(self, prompt, max_tokens=2500, call_site="default",
+                          validate: Optional[Callable[[str], bool]] = None):
+        """Complete a prompt, served from the completion cache when the same request was made recently
+
+        `call_site` picks the cache TTL (see llm_cache.CALL_SITE_TTLS). With `validate`,
+        only completions it accepts are cached, so a malformed one is not served again.
+        """
+        key = completion_key(self.model, SYSTEM_PROMPT, prompt, max_tokens)
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None and (validate is None or validate(cached)):
+                return cached
+        
         completion = self.client.chat.completions.create(
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
-            model="asi1-mini",
+            model=self.model,
             max_tokens=max_tokens
         )
-        return completion.choices[0].message.content
+        content = completion.choices[0].message.content
+        if self.cache and (validate is None or validate(content)):
+            self.cache.put(key, content, self.cache.ttl_for(call_site))
+        return content
+
+def parse_intent_response(response):
+    """JSON object of an intent classification response (raises json.JSONDecodeError if there is none)"""
+    # Clean the response - sometimes LLM includes extra text
+    response_cleaned = response.strip()
+    
+    # Try to extract JSON if it's wrapped in other text
+    if '{' in response_cleaned and '}' in response_cleaned:
+        start_idx = response_cleaned.find('{')
+        end_idx = response_cleaned.rfind('}') + 1
+        json_str = response_cleaned[start_idx:end_idx]
+    else:
+        json_str = response_cleaned
+    
+    result = json.loads(json_str)
+    if not isinstance(result, dict):
+        raise json.JSONDecodeError("Expected a JSON object", json_str, 0)
+    return result
+
+def is_intent_response(response):
+    """Whether an intent classification response parses, and so may be cached"""
+    try:
+        parse_intent_response(response)
+        return True
+    except json.JSONDecodeError:
+        return False
 
 def get_intent_and_keyword(query, llm):
     """Use ASI:One API to classify semiconductor market query intent and extract entities."""
     prompt = get_intent_classification_prompt(query)
     
     try:
-        response = llm.create_completion(prompt, max_tokens=200)
-        
-        # Clean the response - sometimes LLM includes extra text
-        response_cleaned = response.strip()
-        
-        # Try to extract JSON if it's wrapped in other text
-        if '{' in response_cleaned and '}' in response_cleaned:
-            start_idx = response_cleaned.find('{')
-            end_idx = response_cleaned.rfind('}') + 1
-            json_str = response_cleaned[start_idx:end_idx]
-        else:
-            json_str = response_cleaned
-        
-        result = json.loads(json_str)
+        response = llm.create_completion(prompt, max_tokens=200, call_site="intent", validate=is_intent_response)
+        result = parse_intent_response(response)
         
         intents = result.get("intents", ["unknown"])
         company_name = result.get("company_name", None)
@@ -71,7 +105,14 @@ def get_intent_and_keyword(query, llm):
         print(f"❌ Response: {response}")
         return ["unknown"], None, "3d", None, ["semiconductor"]
 
-def process_query(query, rag: InvestmentRAG, llm: LLM, output_length=None):
+def prepare_query(query, rag: InvestmentRAG, llm: LLM, history: Optional[ReportHistory] = None):
+    """Gather everything the final answer is built from: intents, news and knowledge graph sections
+
+    Returns the prompt sections and news references that synthesize_answer turns into
+    the response, so the slow gathering can run ahead of the final LLM call. With a
+    report history, only articles no recent report covered are processed, and the
+    last report's summary is passed along as context.
+    """
     intents, company_name, time_period, topic, recommended_search_queries = get_intent_and_keyword(query, llm)
     print(f"Intents: {intents}, Company: {company_name}, Time: {time_period}, Topic: {topic}")
     print(f"LLM-generated search queries: {recommended_search_queries}")
@@ -79,6 +120,9 @@ def process_query(query, rag: InvestmentRAG, llm: LLM, output_length=None):
     # Build prompt sections additively
     prompt_sections = [f"Query: '{query}'\n"]
     news_references = ""  # Store news references for final output
+    news_summary = ""
+    summarized_news_list = []
+    dismissed_news = []
     
     # Handle each intent independently
     if "recent_news" in intents:
@@ -87,18 +131,30 @@ def process_query(query, rag: InvestmentRAG, llm: LLM, output_length=None):
         # Step 1: Fetch ALL available news
         all_news = get_news_from_multiple_sources(recommended_search_queries, time_period)
         
+        previous_context = ""
+        if history is not None:
+            fetched = len(all_news)
+            all_news = history.unseen(all_news)
+            previous_context = history.previous_context()
+            print(f"📰 {len(all_news)} of {fetched} articles not covered by recent reports")
+        
         if all_news:
             # Step 2: Use LLM to filter to most important articles
             filtered_news = filter_news_with_llm(all_news, query, time_period, llm)
+            selected = {id(article) for article in filtered_news}
+            dismissed_news = [article for article in all_news if id(article) not in selected]
             
             # Step 3: Use LLM to analyze the filtered articles
-            news_summary, summarized_news_list = summarize_news_with_llm(filtered_news, llm)
+            news_summary, summarized_news_list = summarize_news_with_llm(filtered_news, llm, previous_context)
             
             # Step 4: Build source references for final output
             print(f"🔗 DEBUG: Building source references from {len(summarized_news_list)} processed articles...")
             news_references = build_source_references(summarized_news_list)
             print(f"🔗 DEBUG: Source references length: {len(news_references)} characters")
             print(f"🔗 DEBUG: Source references preview: {news_references[:200]}...")
+        elif previous_context:
+            news_summary = f"No new articles since the previous report.\n\n{previous_context}"
+            print("⚠️  DEBUG: No new news, reusing the previous report's summary as context")
         else:
             news_summary = "No recent news found."
             print("⚠️  DEBUG: No news found, skipping source references")
@@ -229,8 +285,22 @@ def process_query(query, rag: InvestmentRAG, llm: LLM, output_length=None):
                 f"A: {faq_answer}\n\n"
             )
     
+    return {
+        "query": query,
+        "prompt_sections": prompt_sections,
+        "news_references": news_references,
+        "news_summary": news_summary,
+        "articles": summarized_news_list,
+        "dismissed": dismissed_news,
+    }
+
+def synthesize_answer(prepared, llm: LLM, output_length=None, extra_sections=None):
+    """Final LLM call over a prepare_query result, plus any late sections (e.g. fresh quotes)"""
+    query = prepared["query"]
+    news_references = prepared["news_references"]
+    
     # Build final prompt
-    prompt = "".join(prompt_sections)
+    prompt = "".join(prepared["prompt_sections"] + list(extra_sections or []))
     
     # Add structured report format instruction
     prompt += """
@@ -282,7 +352,7 @@ Please ensure each section is substantive and backed by the data provided. Use p
     print(f"\n🔍 DEBUG: Sending prompt to LLM...")
     print(f"Prompt length: {len(prompt)} characters")
     
-    response = llm.create_completion(prompt, max_tokens=4096)
+    response = llm.create_completion(prompt, max_tokens=4096, call_site="answer")
     
     print(f"\n📝 DEBUG: Raw LLM Response:")
     print(f"Response length: {len(response)} characters")
@@ -309,3 +379,7 @@ Please ensure each section is substantive and backed by the data provided. Use p
     
     print(f"\n✅ Response generated successfully")
     return {"selected_question": query, "humanized_answer": final_response}
+
+
+def process_query(query, rag: InvestmentRAG, llm: LLM, output_length=None):
+    return synthesize_answer(prepare_query(query, rag, llm), llm, output_length)
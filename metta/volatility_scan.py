@@ -0,0 +1,192 @@
+import time
+import warnings
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from .bar_store import IntradayBarStore
+
+# Lookback windows in minutes, keyed by the period shown in alerts (None = since the session open)
+SCAN_WINDOWS = {
+    "1 minute": 1,
+    "5 minutes": 5,
+    "15 minutes": 15,
+    "60 minutes": 60,
+    "since open": None,
+}
+
+# Sector moves are only measured across at least this many symbols
+MIN_SECTOR_SYMBOLS = 5
+
+# Severity codes used in ScanResult.severity
+NORMAL, HIGH, EXTREME = 0, 1, 2
+SEVERITY_NAMES = {HIGH: "high", EXTREME: "extreme"}
+
+class ScanResult(NamedTuple):
+    """Percentage moves of many symbols over several windows (rows = symbols, columns = windows)"""
+    symbols: List[str]
+    windows: List[str]
+    prices: np.ndarray      # (symbols,) latest close
+    references: np.ndarray  # (symbols, windows) close at the start of each window
+    changes: np.ndarray     # (symbols, windows) percentage change, NaN without data
+    zscores: np.ndarray     # (symbols, windows) excess change in standard deviations, NaN without volatility stats
+    severity: np.ndarray    # (symbols, windows) NORMAL / HIGH / EXTREME
+    sector_changes: np.ndarray   # (windows,) equal-weighted average change, NaN when not sector-relative
+    excess: np.ndarray           # (symbols, windows) change beyond beta x sector change (= changes otherwise)
+    sector_severity: np.ndarray  # (windows,) NORMAL / HIGH / EXTREME of the sector average itself
+    sector_members: int          # symbols averaged into the sector move
+
+    def triggered(self) -> List[Dict]:
+        """One entry per symbol that crossed a threshold: its most severe, largest move"""
+        worst = self.severity.max(axis=1)
+        results = []
+        for row in np.flatnonzero(worst):
+            # Among the windows at the worst severity, report the largest move
+            magnitude = np.where(self.severity[row] == worst[row], np.abs(self.excess[row]), -1.0)
+            column = int(np.argmax(magnitude))
+            results.append({
+                "symbol": self.symbols[row],
+                "time_period": self.windows[column],
+                "current_price": round(float(self.prices[row]), 2),
+                "previous_price": round(float(self.references[row, column]), 2),
+                "change_percent": float(self.changes[row, column]),
+                "excess_change": float(self.excess[row, column]),
+                "zscore": None if np.isnan(self.zscores[row, column]) else float(self.zscores[row, column]),
+                "severity": SEVERITY_NAMES[int(worst[row])],
+            })
+        return results
+
+    def sector_triggered(self) -> Optional[Dict]:
+        """The sector's most severe, largest average move if it crossed a threshold"""
+        worst = int(self.sector_severity.max()) if len(self.sector_severity) else NORMAL
+        if worst == NORMAL:
+            return None
+        magnitude = np.where(self.sector_severity == worst, np.abs(self.sector_changes), -1.0)
+        column = int(np.argmax(magnitude))
+        return {
+            "time_period": self.windows[column],
+            "change_percent": float(self.sector_changes[column]),
+            "severity": SEVERITY_NAMES[worst],
+            "symbols": self.sector_members,
+        }
+
+class VolatilityScanner:
+    """Vectorized multi-window volatility scan over the intraday bar store
+
+    Closes of every symbol are laid out on a per-symbol 1-minute grid ending at its
+    latest bar (gaps forward-filled), stacked into one matrix, and the returns for
+    all windows are computed and thresholded as whole-array operations.
+    """
+
+    def __init__(self, bar_store: IntradayBarStore, windows: Optional[Dict[str, Optional[int]]] = None):
+        self.bar_store = bar_store
+        self.windows = dict(windows or SCAN_WINDOWS)
+        self.lookback = max(minutes for minutes in self.windows.values() if minutes) + 1
+
+    def close_matrix(self, symbols: List[str], max_age: Optional[float] = None):
+        """Aligned closes (symbols x lookback minutes, oldest first), session opens, minutes since
+        the open, seconds since the latest bar and the symbols kept"""
+        now = time.time()
+        kept, rows, opens, elapsed, ages = [], [], [], [], []
+        for symbol in symbols:
+            bars = self.bar_store.session(symbol)
+            if bars is None or not len(bars):
+                continue
+            end = int(bars.timestamps[-1])
+            if max_age is not None and now - end > max_age:
+                continue
+
+            # Column of each bar counted back from the symbol's latest minute
+            columns = self.lookback - 1 - (end - bars.timestamps) // 60
+            recent = columns >= 0
+            row = np.full(self.lookback, np.nan)
+            row[columns[recent]] = bars.close[recent]
+
+            kept.append(symbol)
+            rows.append(row)
+            opens.append(bars.open[0])
+            elapsed.append((end - bars.timestamps[0]) / 60 + 1)
+            ages.append(now - end)
+
+        if not rows:
+            return np.empty((0, self.lookback)), np.empty(0), np.empty(0), np.empty(0), kept
+        return (_fill_gaps(np.vstack(rows)), np.asarray(opens, dtype=np.float64),
+                np.asarray(elapsed, dtype=np.float64), np.asarray(ages, dtype=np.float64), kept)
+
+    def scan(self, symbols: List[str], thresholds: Dict[str, float], max_age: Optional[float] = None,
+             sigmas: Optional[Dict[str, float]] = None,
+             sigma_thresholds: Optional[Dict[str, float]] = None,
+             betas: Optional[Dict[str, float]] = None,
+             sector_max_age: Optional[float] = None) -> ScanResult:
+        """Compute every window's move for all symbols and flag those over the high/extreme thresholds
+
+        `thresholds` are percentages. With `sigmas` (1m return volatility per symbol, in
+        percent) and `sigma_thresholds`, symbols that have a sigma are judged in standard
+        deviations instead, scaled to each window's length, and must also move at least
+        `sigma_thresholds["min_percent"]`.
+
+        With `betas`, the scan is sector-relative: the equal-weighted average change of
+        all scanned symbols is the sector move, and symbols are judged on their excess
+        change (change - beta x sector move; beta 1 when unknown), so a sector-wide move
+        flags the sector instead of every member. Symbols whose latest bar is older than
+        `sector_max_age` (e.g. markets that are closed) are left out of the sector move.
+        """
+        closes, opens, elapsed, ages, kept = self.close_matrix(symbols, max_age)
+        latest = closes[:, -1]
+
+        references = np.empty((len(kept), len(self.windows)))
+        minutes = np.empty((len(kept), len(self.windows)))
+        for column, window in enumerate(self.windows.values()):
+            references[:, column] = opens if window is None else closes[:, self.lookback - 1 - window]
+            minutes[:, column] = elapsed if window is None else np.minimum(window, elapsed)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            changes = (latest[:, None] - references) / references * 100
+        changes[~np.isfinite(changes)] = np.nan
+
+        sector_changes = np.full(len(self.windows), np.nan)
+        sector_severity = np.zeros(len(self.windows), dtype=np.int8)
+        excess = changes
+        members = ages <= sector_max_age if sector_max_age is not None else np.ones(len(kept), dtype=bool)
+        if betas is not None and members.sum() >= MIN_SECTOR_SYMBOLS:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                sector_changes = np.nanmean(changes[members], axis=0)
+            beta = np.array([betas.get(symbol, 1.0) for symbol in kept], dtype=np.float64)
+            excess = changes - beta[:, None] * np.nan_to_num(sector_changes)[None, :]
+            sector_magnitude = np.nan_to_num(np.abs(sector_changes))
+            sector_severity = np.where(sector_magnitude >= thresholds["extreme"], EXTREME,
+                                       np.where(sector_magnitude >= thresholds["high"], HIGH, NORMAL)).astype(np.int8)
+        magnitude = np.nan_to_num(np.abs(excess))
+
+        severity = np.where(magnitude >= thresholds["extreme"], EXTREME,
+                            np.where(magnitude >= thresholds["high"], HIGH, NORMAL)).astype(np.int8)
+
+        zscores = np.full(changes.shape, np.nan)
+        if sigmas and sigma_thresholds:
+            sigma = np.array([sigmas.get(symbol) or np.nan for symbol in kept], dtype=np.float64)
+            # A window of m one-minute returns has sqrt(m) times the 1m standard deviation
+            with np.errstate(divide="ignore", invalid="ignore"):
+                zscores = excess / (sigma[:, None] * np.sqrt(minutes))
+            zscores[~np.isfinite(zscores)] = np.nan
+
+            z = np.nan_to_num(np.abs(zscores))
+            significant = magnitude >= sigma_thresholds.get("min_percent", 0.0)
+            sigma_severity = np.where(significant & (z >= sigma_thresholds["extreme"]), EXTREME,
+                                      np.where(significant & (z >= sigma_thresholds["high"]), HIGH, NORMAL))
+            severity = np.where(np.isnan(sigma)[:, None], severity, sigma_severity).astype(np.int8)
+
+        return ScanResult(kept, list(self.windows), latest, references, changes, zscores, severity,
+                          sector_changes, excess, sector_severity,
+                          int(members.sum()) if not np.isnan(sector_changes).all() else 0)
+
+def _fill_gaps(matrix: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along each row, then back-fill the leading ones with the first value"""
+    columns = np.arange(matrix.shape[1])
+    valid = ~np.isnan(matrix)
+    rows = np.arange(matrix.shape[0])[:, None]
+
+    last_valid = np.maximum.accumulate(np.where(valid, columns, 0), axis=1)
+    filled = matrix[rows, last_valid]
+
+    # Windows reaching back before the first bar start from the oldest bar instead
+    first_valid = valid.argmax(axis=1)
+    return np.where(columns < first_valid[:, None], filled[rows[:, 0], first_valid][:, None], filled)
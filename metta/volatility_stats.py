@@ -0,0 +1,150 @@
+import math
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+import numpy as np
+from .bar_store import BarWindow
+
+# Consecutive bars further apart than this (halts, overnight) do not form a 1m return
+MAX_RETURN_GAP_SECONDS = 300
+
+class SymbolVolatility:
+    """Running 1m return statistics for one symbol, updated in O(1) per completed bar
+
+    Returns are in percent. Keeps an EWMA variance, the mean and variance over a
+    rolling window of returns (running sums over a fixed-size deque), and an EWMA
+    of the Parkinson high/low range estimator.
+    """
+
+    def __init__(self, halflife: float = 30.0, window: int = 60):
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.ewma_variance: Optional[float] = None
+        self.range_variance: Optional[float] = None
+        self.returns = deque(maxlen=window)
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.count = 0  # returns seen in total
+        self.last_close: Optional[float] = None
+        self.last_timestamp: Optional[int] = None
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        return value if current is None else (1 - self.alpha) * current + self.alpha * value
+
+    def update(self, timestamp: int, high: float, low: float, close: float):
+        """Fold one completed bar into the statistics"""
+        if (self.last_close and self.last_timestamp is not None
+                and 0 < timestamp - self.last_timestamp <= MAX_RETURN_GAP_SECONDS):
+            change = (close / self.last_close - 1) * 100
+            self.ewma_variance = self._ewma(self.ewma_variance, change * change)
+
+            if len(self.returns) == self.returns.maxlen:
+                oldest = self.returns[0]
+                self.sum -= oldest
+                self.sum_squares -= oldest * oldest
+            self.returns.append(change)
+            self.sum += change
+            self.sum_squares += change * change
+            self.count += 1
+
+        if high > 0 and low > 0:
+            # Parkinson estimator of the 1m variance from the bar's range, in percent^2
+            parkinson = (math.log(high / low) * 100) ** 2 / (4 * math.log(2))
+            self.range_variance = self._ewma(self.range_variance, parkinson)
+
+        self.last_close = close
+        self.last_timestamp = timestamp
+
+    @property
+    def ewma_volatility(self) -> Optional[float]:
+        """EWMA standard deviation of 1m returns, in percent"""
+        return math.sqrt(self.ewma_variance) if self.ewma_variance is not None else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean 1m return over the rolling window"""
+        return self.sum / len(self.returns) if self.returns else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Sample variance of 1m returns over the rolling window"""
+        n = len(self.returns)
+        if n < 2:
+            return None
+        return max(0.0, (self.sum_squares - self.sum * self.sum / n) / (n - 1))
+
+    @property
+    def realized_range(self) -> Optional[float]:
+        """Range-based (Parkinson) 1m volatility, in percent"""
+        return math.sqrt(self.range_variance) if self.range_variance is not None else None
+
+    def zscore(self, change: float) -> Optional[float]:
+        """How many rolling standard deviations a 1m return is from the rolling mean"""
+        variance = self.variance
+        if not variance:
+            return None
+        return (change - self.mean) / math.sqrt(variance)
+
+class VolatilityStats:
+    """Per-symbol incremental volatility statistics fed from the intraday bar store
+
+    `observe` only folds in bars that completed since the previous call (the last,
+    still-forming bar is left for later), so each call costs time proportional to
+    the new bars, never to the length of the history.
+    """
+
+    def __init__(self, halflife: float = 30.0, window: int = 60, min_samples: int = 30):
+        self.halflife = halflife
+        self.window = window
+        self.min_samples = min_samples
+        self._symbols: Dict[str, SymbolVolatility] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, symbol: str, bars: Optional[BarWindow]) -> int:
+        """Update a symbol from its latest bars; returns how many completed bars were added"""
+        if bars is None or len(bars) < 2:
+            return 0
+        with self._lock:
+            stats = self._symbols.get(symbol)
+            if stats is None:
+                stats = self._symbols[symbol] = SymbolVolatility(self.halflife, self.window)
+
+            completed = len(bars) - 1
+            start = 0
+            if stats.last_timestamp is not None:
+                start = int(np.searchsorted(bars.timestamps[:completed], stats.last_timestamp, side="right"))
+            for i in range(start, completed):
+                stats.update(int(bars.timestamps[i]), float(bars.high[i]), float(bars.low[i]), float(bars.close[i]))
+            return completed - start
+
+    def get(self, symbol: str) -> Optional[SymbolVolatility]:
+        """Statistics for a symbol, if any bars were observed"""
+        return self._symbols.get(symbol)
+
+    def sigma(self, symbol: str) -> Optional[float]:
+        """EWMA 1m volatility in percent, once enough returns were seen to trust it"""
+        stats = self._symbols.get(symbol)
+        if stats is None or stats.count < self.min_samples:
+            return None
+        return stats.ewma_volatility
+
+    def sigmas(self, symbols: List[str]) -> Dict[str, float]:
+        """sigma() for the symbols that are warmed up"""
+        sigmas = {}
+        for symbol in symbols:
+            sigma = self.sigma(symbol)
+            if sigma:
+                sigmas[symbol] = sigma
+        return sigmas
+
+    def snapshot(self, symbol: str) -> Optional[Dict]:
+        """Current statistics of a symbol as a plain dict"""
+        stats = self._symbols.get(symbol)
+        if stats is None:
+            return None
+        return {
+            "samples": stats.count,
+            "ewma_volatility": stats.ewma_volatility,
+            "rolling_mean": stats.mean,
+            "rolling_variance": stats.variance,
+            "realized_range": stats.realized_range,
+        }
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep anything modules persist at import time out of the repo's data directory
+os.environ.setdefault("AGENT_DATA_DIR", tempfile.mkdtemp(prefix="agent-test-data-"))
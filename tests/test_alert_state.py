@@ -0,0 +1,52 @@
+from metta.alert_state import COOLING, EXTREME, HIGH, NORMAL, AlertStateMachine
+
+def machine(tmp_path):
+    return AlertStateMachine(path=str(tmp_path / "alert_state.json"))
+
+def test_alerts_once_while_volatile_and_on_escalation(tmp_path):
+    alerts = machine(tmp_path)
+    assert alerts.update("NVDA", HIGH, now=1000)
+    assert not alerts.update("NVDA", HIGH, now=1060)
+    assert alerts.update("NVDA", EXTREME, now=1120)
+    assert not alerts.update("NVDA", HIGH, now=1180)
+    assert alerts.state("NVDA") == EXTREME
+
+def test_cools_down_and_returns_to_normal(tmp_path):
+    alerts = machine(tmp_path)
+    alerts.update("NVDA", HIGH, now=1000)
+    alerts.update("NVDA", None, now=1100)
+    assert alerts.state("NVDA") == COOLING
+    assert not alerts.update("NVDA", HIGH, now=1200)
+
+    alerts.update("NVDA", None, now=1300)
+    alerts.update("NVDA", None, now=1300 + 30 * 60)
+    assert alerts.state("NVDA") == NORMAL
+    assert alerts.active() == {}
+
+def test_cooldown_expires_without_further_quiet_updates(tmp_path):
+    alerts = machine(tmp_path)
+    assert alerts.update("NVDA", HIGH, now=1000)
+    alerts.update("NVDA", None, now=1100)
+    assert alerts.update("NVDA", HIGH, now=1000 + 86400)
+
+def test_continuous_volatility_does_not_realert_within_the_session(tmp_path):
+    alerts = machine(tmp_path)
+    assert alerts.update("NVDA", HIGH, now=1000, session="2026-10-16")
+    for minute in range(1, 300):
+        assert not alerts.update("NVDA", HIGH, now=1000 + 60 * minute, session="2026-10-16")
+    assert alerts.update("NVDA", HIGH, now=1000 + 86400, session="2026-10-19")
+
+def test_quiet_spell_shorter_than_the_cooldown_does_not_reset(tmp_path):
+    alerts = machine(tmp_path)
+    assert alerts.update("NVDA", HIGH, now=1000, session="2026-10-16")
+    alerts.update("NVDA", None, now=1060, session="2026-10-16")
+    assert not alerts.update("NVDA", HIGH, now=1060 + 29 * 60, session="2026-10-16")
+    alerts.update("NVDA", None, now=4000, session="2026-10-16")
+    assert alerts.update("NVDA", HIGH, now=4000 + 30 * 60, session="2026-10-16")
+
+def test_state_survives_restart(tmp_path):
+    machine(tmp_path).update("NVDA", EXTREME, change_percent=-9.5, now=1000)
+    reloaded = machine(tmp_path)
+    assert reloaded.state("NVDA") == EXTREME
+    assert reloaded.active()["NVDA"]["last_alert_change"] == -9.5
+    assert not reloaded.update("NVDA", EXTREME, now=1060)
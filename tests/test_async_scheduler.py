@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+import pytest
+from metta.async_scheduler import AsyncScheduler, CronTrigger, IntervalTrigger, JobJournal, LeadTrigger
+
+def test_cron_field_parsing():
+    trigger = CronTrigger("*/15 9-16 1,15 * 1-5")
+    assert trigger.minutes == {0, 15, 30, 45}
+    assert trigger.hours == set(range(9, 17))
+    assert trigger.days == {1, 15}
+    assert trigger.weekdays == {1, 2, 3, 4, 5}
+
+@pytest.mark.parametrize("expression", ["0 * * *", "60 * * * *", "0 24 * * *", "0 * * * 8", "*/0 * * * *"])
+def test_cron_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronTrigger(expression)
+
+def test_cron_next_fire_is_strictly_after():
+    trigger = CronTrigger("0 * * * *")
+    assert trigger.next_fire(datetime(2026, 10, 16, 9, 0)) == datetime(2026, 10, 16, 10, 0)
+    assert trigger.next_fire(datetime(2026, 10, 16, 9, 59, 30)) == datetime(2026, 10, 16, 10, 0)
+
+def test_cron_weekdays_count_from_sunday():
+    market_hours = CronTrigger("0 9-16 * * 1-5")
+    # Friday 2026-10-16 after the last slot rolls over the weekend to Monday
+    assert market_hours.next_fire(datetime(2026, 10, 16, 16, 0)) == datetime(2026, 10, 19, 9, 0)
+    sundays = CronTrigger("30 8 * * 7")
+    assert sundays.weekdays == {0}
+    assert sundays.next_fire(datetime(2026, 10, 16, 12, 0)) == datetime(2026, 10, 18, 8, 30)
+
+def test_cron_day_and_weekday_match_either():
+    trigger = CronTrigger("0 0 1 * 1")
+    # Monday the 19th matches the weekday even though it is not the 1st
+    assert trigger.next_fire(datetime(2026, 10, 16, 12, 0)) == datetime(2026, 10, 19, 0, 0)
+    assert trigger.next_fire(datetime(2026, 10, 26, 12, 0)) == datetime(2026, 11, 1, 0, 0)
+
+def test_cron_that_never_fires():
+    with pytest.raises(ValueError):
+        CronTrigger("0 0 31 2 *").next_fire(datetime(2026, 1, 1))
+
+def test_interval_and_lead_triggers():
+    assert IntervalTrigger(90).next_fire(datetime(2026, 10, 16, 9, 0)) == datetime(2026, 10, 16, 9, 1, 30)
+    lead = LeadTrigger(CronTrigger("0 * * * *"), 300)
+    assert lead.next_fire(datetime(2026, 10, 16, 9, 0)) == datetime(2026, 10, 16, 9, 55)
+    assert lead.next_fire(datetime(2026, 10, 16, 9, 56)) == datetime(2026, 10, 16, 10, 55)
+
+def scheduler_with_journal(tmp_path, **record):
+    journal = JobJournal(str(tmp_path / "job_journal.json"))
+    if record:
+        journal.update("report", **record)
+    scheduler = AsyncScheduler(JobJournal(str(tmp_path / "job_journal.json")))
+    job = scheduler.add_job("report", lambda: None, CronTrigger("0 * * * *"), catch_up=3600)
+    return scheduler, job
+
+def test_catches_up_a_fire_time_missed_while_down(tmp_path):
+    due = datetime.now().replace(microsecond=0) - timedelta(minutes=10)
+    scheduler, job = scheduler_with_journal(tmp_path, next_due=due, last_slot=due - timedelta(hours=1), outcome="ok")
+    assert scheduler._missed_run(job) == due
+
+def test_catches_up_a_run_interrupted_midway(tmp_path):
+    slot = datetime.now().replace(microsecond=0) - timedelta(minutes=5)
+    scheduler, job = scheduler_with_journal(tmp_path, next_due=slot + timedelta(hours=1), last_slot=slot,
+                                            outcome="running")
+    assert scheduler._missed_run(job) == slot
+
+def test_never_reruns_a_completed_fire_time(tmp_path):
+    slot = datetime.now().replace(microsecond=0) - timedelta(minutes=5)
+    scheduler, job = scheduler_with_journal(tmp_path, next_due=slot, last_slot=slot, outcome="ok")
+    assert scheduler._missed_run(job) is None
+
+def test_skips_fire_times_missed_too_long_ago(tmp_path):
+    due = datetime.now().replace(microsecond=0) - timedelta(hours=3)
+    scheduler, job = scheduler_with_journal(tmp_path, next_due=due, outcome="ok")
+    assert scheduler._missed_run(job) is None
+
+def test_no_catch_up_without_history_or_when_disabled(tmp_path):
+    scheduler, job = scheduler_with_journal(tmp_path)
+    assert scheduler._missed_run(job) is None
+    job.catch_up = None
+    scheduler.journal.update("report", next_due=datetime.now() - timedelta(minutes=1))
+    assert scheduler._missed_run(job) is None
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from metta.bar_store import IntradayBarStore
+
+DAY = 86400
+OPEN = 1_760_000_400  # some bar open, epoch seconds
+
+def append(store, symbol, timestamp, close):
+    return store.append_bar(symbol, timestamp, close, close, close, close, 100.0)
+
+def test_ring_wrap_keeps_latest_bars_contiguous():
+    store = IntradayBarStore(capacity=4)
+    for i in range(10):
+        append(store, "NVDA", OPEN + 60 * i, float(i))
+
+    bars = store.window("NVDA")
+    assert len(bars) == 4
+    assert list(bars.close) == [6.0, 7.0, 8.0, 9.0]
+    assert list(bars.timestamps) == [OPEN + 60 * i for i in range(6, 10)]
+    assert list(store.window("NVDA", 2).close) == [8.0, 9.0]
+
+def test_latest_bar_is_revised_in_place():
+    store = IntradayBarStore(capacity=4)
+    assert append(store, "NVDA", OPEN, 1.0)
+    assert not append(store, "NVDA", OPEN, 1.5)
+    assert not append(store, "NVDA", OPEN - 60, 0.5)
+    assert list(store.window("NVDA").close) == [1.5]
+
+def test_update_appends_only_newer_bars():
+    store = IntradayBarStore(capacity=8)
+    index = pd.to_datetime([OPEN + 60 * i for i in range(3)], unit="s", utc=True)
+    frame = pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": [1.0, 2.0, 3.0], "Volume": 1.0}, index=index)
+    assert store.update("NVDA", frame) == 3
+
+    index = pd.to_datetime([OPEN + 60 * i for i in range(2, 5)], unit="s", utc=True)
+    frame = pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": [3.5, 4.0, 5.0], "Volume": 1.0}, index=index)
+    assert store.update("NVDA", frame, session=False) == 2
+    assert list(store.window("NVDA").close) == [1.0, 2.0, 3.5, 4.0, 5.0]
+
+def test_new_trading_day_drops_previous_session():
+    store = IntradayBarStore(capacity=16)
+    for i in range(5):
+        append(store, "NVDA", OPEN + 60 * i, 100.0 + i)
+
+    append(store, "NVDA", OPEN + DAY, 200.0)
+    session = store.session("NVDA")
+    assert list(session.close) == [200.0]
+    assert len(store.window("NVDA", 10)) == 1
+
+def test_session_starts_at_the_session_frame():
+    store = IntradayBarStore(capacity=16)
+    index = pd.to_datetime([OPEN + 60 * i for i in range(4)], unit="s", utc=True).tz_convert("America/New_York")
+    frame = pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": np.arange(4.0), "Volume": 1.0}, index=index)
+    store.update("NVDA", frame)
+    assert len(store.session("NVDA")) == 4
+    assert store.session_date("NVDA") == index[-1].date().isoformat()
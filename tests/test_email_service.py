@@ -0,0 +1,19 @@
+from metta.email_service import EmailService
+
+def sent_alert_html(monkeypatch, alert):
+    service = EmailService()
+    sent = []
+    monkeypatch.setattr(service, "_send_email", lambda subject, html, email_type: sent.append(html) or True)
+    service.send_volatility_alert([alert])
+    return sent[0]
+
+def test_stock_alerts_show_prices(monkeypatch):
+    html = sent_alert_html(monkeypatch, {"company": "NVIDIA", "symbol": "NVDA", "change_percent": 6.2,
+                                         "current_price": 181.23, "previous_price": 170.65})
+    assert "$181.23" in html and "$170.65" in html
+
+def test_sector_alerts_have_no_price_rows(monkeypatch):
+    html = sent_alert_html(monkeypatch, {"company": "Semiconductor sector", "symbol": "SECTOR",
+                                         "change_percent": -5.4, "current_price": None, "previous_price": None})
+    assert "Current Price" not in html and "$None" not in html and "$N/A" not in html
+    assert "-5.40%" in html
@@ -0,0 +1,54 @@
+import json
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+import pytest
+from metta.exchange_calendar import ExchangeCalendar
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+def make_calendar(tmp_path, holidays=None):
+    path = tmp_path / "holidays.json"
+    if holidays:
+        path.write_text(json.dumps(holidays))
+    return ExchangeCalendar(holidays_path=str(path))
+
+@pytest.fixture(scope="module")
+def calendar(tmp_path_factory):
+    # Loading an exchange's schedule takes a moment, so the tests share one calendar
+    return make_calendar(tmp_path_factory.mktemp("calendar"))
+
+def test_us_holidays_and_half_days(calendar):
+    us = calendar.venue("NVDA")
+    assert not calendar.is_trading_day(us, date(2026, 11, 26))
+    assert not calendar.is_open("NVDA", datetime(2026, 11, 27, 13, 30, tzinfo=NEW_YORK), extended=False)
+    assert calendar.is_open("NVDA", datetime(2026, 11, 27, 16, 30, tzinfo=NEW_YORK))
+    assert not calendar.is_open("NVDA", datetime(2026, 11, 27, 17, 30, tzinfo=NEW_YORK))
+    assert calendar.is_open("NVDA", datetime(2026, 11, 30, 17, 30, tzinfo=NEW_YORK))
+
+def test_asian_lunar_holidays(calendar):
+    assert not calendar.is_trading_day(calendar.venue("2330.TW"), date(2026, 2, 17))
+    assert not calendar.is_trading_day(calendar.venue("005930.KS"), date(2026, 9, 25))
+    assert calendar.next_open("0700.HK", datetime(2026, 2, 16, 12, 0, tzinfo=timezone.utc)) == \
+        datetime(2026, 2, 20, 1, 30, tzinfo=timezone.utc)
+
+def test_lunch_break(calendar):
+    tokyo = ZoneInfo("Asia/Tokyo")
+    assert calendar.is_open("8035.T", datetime(2026, 10, 15, 10, 0, tzinfo=tokyo))
+    assert not calendar.is_open("8035.T", datetime(2026, 10, 15, 12, 0, tzinfo=tokyo))
+
+def test_extra_closures_and_unknown_years(tmp_path):
+    calendar = make_calendar(tmp_path, {"Taiwan": ["2026-07-29"]})
+    assert not calendar.is_trading_day(calendar.venue("2330.TW"), date(2026, 7, 29))
+    assert calendar.is_trading_day(calendar.venue("NVDA"), date(2040, 1, 3))
+    assert calendar.is_open("UNKNOWN.XX", datetime(2026, 11, 26, 12, 0, tzinfo=timezone.utc))
+
+def test_preload_loads_every_venue_up_front(calendar, monkeypatch):
+    calendar.preload()
+    assert all(calendar._calendars[venue.mic] is not None for venue in calendar.venues.values() if venue.mic)
+
+    # Later market-hours checks never load a calendar on the caller's thread
+    def no_loading(mic):
+        raise AssertionError(f"{mic} loaded after preload")
+    monkeypatch.setattr("metta.exchange_calendar.xcals.get_calendar", no_loading)
+    calendar.open_venues(["NVDA", "2330.TW", "005930.KS", "8035.T", "0981.HK"],
+                         at=datetime(2026, 10, 16, 2, 0, tzinfo=timezone.utc))
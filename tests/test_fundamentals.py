@@ -0,0 +1,45 @@
+from metta.fundamentals import FundamentalsCache
+from metta.history_store import HistoryStore
+from metta.market_data_provider import MarketDataProvider
+from metta.stock_data import StockDataFetcher
+
+class InfoProvider(MarketDataProvider):
+    def __init__(self):
+        self.calls = 0
+
+    def history(self, symbol, interval="1d", period=None, start=None):
+        raise AssertionError("no bars needed")
+
+    def download(self, symbols, interval="1d", period=None, start=None):
+        raise AssertionError("no bars needed")
+
+    def info(self, symbol):
+        self.calls += 1
+        return {"previousClose": 100.0, "marketCap": 5e9, "sharesOutstanding": 1e6}
+
+def test_records_are_scoped_to_a_session_and_persisted(tmp_path):
+    path = str(tmp_path / "fundamentals.json")
+    FundamentalsCache(path).put("NVDA", "2026-10-16", previous_close=100.0, market_cap=5e9)
+
+    reloaded = FundamentalsCache(path)
+    assert reloaded.get("NVDA", "2026-10-16")["previous_close"] == 100.0
+    assert reloaded.get("NVDA", "2026-10-19") is None
+    assert reloaded.get("AMD", "2026-10-16") is None
+
+def test_market_cap_scales_with_price_when_shares_are_known(tmp_path):
+    cache = FundamentalsCache(str(tmp_path / "fundamentals.json"))
+    assert cache.market_cap({"shares_outstanding": 1e6, "market_cap": 5e9}, 120.0) == 120_000_000
+    assert cache.market_cap({"shares_outstanding": None, "market_cap": 5e9}, 120.0) == 5e9
+    assert cache.market_cap(None, 120.0) == 'N/A'
+
+def test_fetcher_asks_for_fundamentals_once_per_session(tmp_path):
+    provider = InfoProvider()
+    fetcher = StockDataFetcher(provider)
+    fetcher.history_store = HistoryStore(root=str(tmp_path))
+    fetcher.fundamentals = FundamentalsCache(str(tmp_path / "fundamentals.json"))
+
+    for _ in range(3):
+        assert fetcher.get_fundamentals("NVDA", "2026-10-16")["previous_close"] == 100.0
+    assert provider.calls == 1
+    fetcher.get_fundamentals("NVDA", "2026-10-19")
+    assert provider.calls == 2
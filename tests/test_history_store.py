@@ -0,0 +1,25 @@
+import pandas as pd
+from metta.history_store import HistoryStore
+
+def daily_frame(days, start="2026-01-05"):
+    index = pd.date_range(start, periods=days, freq="D", tz="America/New_York")
+    return pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": range(1, days + 1), "Volume": 10.0}, index=index)
+
+def test_append_overwrites_last_bar_and_adds_newer(tmp_path):
+    store = HistoryStore(root=str(tmp_path))
+    store.replace("NVDA", "1d", daily_frame(3), "5d")
+    revised = daily_frame(3, start="2026-01-07")
+    revised.loc[revised.index[0], "Close"] = 9.0
+    assert store.append("NVDA", "1d", revised) == 2
+    assert list(store.read("NVDA", "1d")["close"]) == [1.0, 2.0, 9.0, 2.0, 3.0]
+
+def test_batched_writes_save_the_index_once_flushed(tmp_path):
+    store = HistoryStore(root=str(tmp_path))
+    for symbol in ("NVDA", "AMD", "INTC"):
+        store.replace(symbol, "1d", daily_frame(5), "5d", flush=False)
+    assert HistoryStore(root=str(tmp_path)).index == {}
+
+    store.flush()
+    reloaded = HistoryStore(root=str(tmp_path))
+    assert set(reloaded.index) == {"NVDA_1d", "AMD_1d", "INTC_1d"}
+    assert reloaded.covers("AMD", "1d", "5d")
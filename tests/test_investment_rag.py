@@ -0,0 +1,37 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+pytest.importorskip("hyperon")
+from metta.investment_rag import InvestmentRAG
+
+class RecordingMeTTa:
+    """Counts how many threads are inside run() at once"""
+
+    def __init__(self):
+        self.active = 0
+        self.most_active = 0
+        self._count_lock = threading.Lock()
+
+    def run(self, query):
+        with self._count_lock:
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        time.sleep(0.005)
+        with self._count_lock:
+            self.active -= 1
+        return []
+
+def test_concurrent_queries_never_overlap_on_the_runner():
+    metta = RecordingMeTTa()
+    rag = InvestmentRAG(metta)
+    queries = [rag.get_company_market_cap, rag.get_recommendation, rag.query_system_level_topic,
+               rag.get_company_region]
+
+    # Alert analyses, chat queries and report preparation each bring their own pool
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        results = list(pool.map(lambda i: queries[i % len(queries)]("NVIDIA"), range(48)))
+
+    assert metta.most_active == 1
+    assert all(result == [] for result in results)
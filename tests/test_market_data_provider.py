@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+from metta.market_data_provider import MarketDataProvider, RecordingProvider, ReplayProvider
+
+class StaticProvider(MarketDataProvider):
+    def __init__(self, frame):
+        self.frame = frame
+
+    def history(self, symbol, interval="1d", period=None, start=None):
+        return self.frame
+
+    def download(self, symbols, interval="1d", period=None, start=None):
+        return {symbol: self.frame for symbol in symbols}
+
+    def info(self, symbol):
+        return {"symbol": symbol}
+
+def minute_bars(closes):
+    index = pd.date_range("2026-10-16 09:30", periods=len(closes), freq="1min", tz="America/New_York")
+    return pd.DataFrame({"Close": closes}, index=index)
+
+def test_partial_provider_fails_when_constructed():
+    class HistoryOnly(MarketDataProvider):
+        def history(self, symbol, interval="1d", period=None, start=None):
+            return pd.DataFrame()
+
+    with pytest.raises(TypeError):
+        HistoryOnly()
+
+def test_replay_serves_recorded_calls_in_order(tmp_path):
+    recorder = RecordingProvider(StaticProvider(minute_bars([1.0, 2.0])), str(tmp_path))
+    recorder.download(["NVDA"], interval="1m", period="1d")
+    recorder.inner = StaticProvider(minute_bars([1.0, 2.0, 3.0]))
+    recorder.download(["NVDA"], interval="1m", period="1d")
+    recorder.info("NVDA")
+
+    replay = ReplayProvider(str(tmp_path), speed=0, shift_to_now=False)
+    assert list(replay.download(["NVDA"], interval="1m", period="1d")["NVDA"]["Close"]) == [1.0, 2.0]
+    assert list(replay.download(["NVDA"], interval="1m", period="1d")["NVDA"]["Close"]) == [1.0, 2.0, 3.0]
+    assert replay.info("NVDA") == {"symbol": "NVDA"}
+    assert replay.info("AMD") == {}
@@ -0,0 +1,70 @@
+import json
+from metta.poll_scheduler import PollScheduler, load_watchlist
+
+NOW = 1_760_000_000.0
+
+def test_first_polls_are_spread_across_the_tier_interval():
+    scheduler = PollScheduler()
+    scheduler.assign({"A": 60, "B": 60, "C": 60, "D": 60}, tier="mega", now=NOW)
+    ticks = [scheduler.due(["A", "B", "C", "D"], now=NOW + offset) for offset in (0, 15, 30, 45, 60)]
+    assert ticks == [["A"], ["B"], ["C"], ["D"], ["A"]]
+    assert scheduler.status() == {"mega": 4}
+
+def test_unscheduled_symbols_are_due_every_tick():
+    scheduler = PollScheduler({"A": 300})
+    assert scheduler.due(["NEW"], now=NOW) == ["NEW"]
+    assert scheduler.due(["NEW"], now=NOW + 1) == ["NEW"]
+
+def test_missed_intervals_are_skipped_keeping_the_phase():
+    scheduler = PollScheduler()
+    scheduler.assign({"A": 60}, now=NOW)
+    assert scheduler.due(["A"], now=NOW + 10) == ["A"]
+    # The loop was blocked for several intervals: one poll, then back on the original phase
+    assert scheduler.due(["A"], now=NOW + 250) == ["A"]
+    assert scheduler.due(["A"], now=NOW + 299) == []
+    assert scheduler.due(["A"], now=NOW + 300) == ["A"]
+
+def test_closed_markets_are_never_due():
+    class AlwaysClosed:
+        def is_open(self, symbol, at=None):
+            return symbol.endswith(".US")
+
+    scheduler = PollScheduler(calendar=AlwaysClosed())
+    assert scheduler.due(["NVDA.US", "2330.TW"], now=NOW) == ["NVDA.US"]
+
+def test_watchlist_tiers_from_file(tmp_path):
+    path = tmp_path / "watchlist.json"
+    path.write_text(json.dumps({"mega": ["NVIDIA"], "mid": {"Acme Semi": "ACME"}, "extra": ["UMC"]}))
+    tiers = load_watchlist(str(path))
+    assert tiers["mega"] == {"NVIDIA": None}
+    assert tiers["mid"] == {"Acme Semi": "ACME"}
+    assert tiers["tail"] == {"UMC": None}
+
+def test_active_symbols_are_polled_faster_and_quiet_ones_slower():
+    scheduler = PollScheduler()
+    scheduler.assign({"A": 60, "B": 300}, now=NOW)
+    scheduler.adapt({"A": 2.0, "B": 0.5})
+    assert scheduler.intervals == {"A": 30, "B": 600}
+    # Activity beyond the bounds is clamped to the minimum interval
+    scheduler.adapt({"A": 100.0})
+    assert scheduler.intervals["A"] == 20
+
+def test_over_budget_intervals_are_stretched_evenly():
+    scheduler = PollScheduler(budget_per_minute=1.5)
+    scheduler.assign({"A": 60, "B": 120}, now=NOW)
+    assert abs(scheduler.adapt({}) - 1.5) < 1e-6
+    assert scheduler.intervals["B"] / scheduler.intervals["A"] == 2
+
+def test_clamped_symbols_leave_the_budget_to_the_others():
+    scheduler = PollScheduler(budget_per_minute=2.0)
+    scheduler.assign({"A": 60, "QUIET": 1800}, now=NOW)
+    assert abs(scheduler.adapt({"A": 4.0, "QUIET": 0.25}) - 2.0) < 1e-6
+    assert scheduler.intervals["QUIET"] == 1800
+
+def test_warns_when_the_budget_cannot_be_met(capsys):
+    scheduler = PollScheduler(budget_per_minute=0.1)
+    scheduler.assign({symbol: 60 for symbol in "ABCDEF"}, now=NOW)
+    demand = scheduler.adapt({})
+    assert demand > 0.1
+    assert set(scheduler.intervals.values()) == {1800}
+    assert "cannot be met" in capsys.readouterr().out
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+import pytest
+from metta.query_executor import QueryBusyError, QueryExecutor
+
+def test_timed_out_query_keeps_its_slot_until_the_worker_finishes():
+    async def scenario():
+        executor = QueryExecutor(max_workers=1, timeout=0.05, max_pending=1)
+        release = threading.Event()
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(release.wait)
+        assert executor.pending() == 1
+        with pytest.raises(QueryBusyError):
+            await executor.run(lambda: "late")
+
+        release.set()
+        for _ in range(100):
+            if not executor.pending():
+                break
+            await asyncio.sleep(0.01)
+        assert await executor.run(lambda: "ok") == "ok"
+        assert executor.pending() == 0
+
+    asyncio.run(scenario())
+
+def test_queued_query_that_times_out_is_cancelled():
+    async def scenario():
+        executor = QueryExecutor(max_workers=1, timeout=0.05, max_pending=4)
+        release = threading.Event()
+        ran = []
+        running = asyncio.ensure_future(executor.run(release.wait, timeout=5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(ran.append, "queued")
+        assert executor.pending() == 1
+
+        release.set()
+        await running
+        await asyncio.sleep(0.05)
+        assert ran == [] and executor.pending() == 0
+
+    asyncio.run(scenario())
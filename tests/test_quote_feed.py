@@ -0,0 +1,63 @@
+import asyncio
+from metta.bar_store import IntradayBarStore
+from metta.quote_feed import QuoteFeed
+
+OPEN = 1_760_000_400  # some bar open, epoch seconds
+
+class ScriptedSource:
+    """Appends the next scripted (symbol, timestamp, close) bars on each poll"""
+
+    def __init__(self, bar_store, polls):
+        self.bar_store = bar_store
+        self.polls = list(polls)
+        self.requested = []
+
+    async def poll(self, symbols):
+        self.requested.append(sorted(symbols))
+        for symbol, timestamp, close in self.polls.pop(0) if self.polls else []:
+            self.bar_store.append_bar(symbol, timestamp, close, close, close, close, 100.0)
+
+def test_one_fetch_for_all_subscribers_and_only_relevant_updates():
+    async def scenario():
+        store = IntradayBarStore()
+        source = ScriptedSource(store, [
+            [("NVDA", OPEN, 1.0), ("AMD", OPEN, 2.0)],
+            [("NVDA", OPEN, 1.5)],                      # forming bar revised
+            [],                                         # nothing new
+            [("NVDA", OPEN + 60, 1.6), ("AMD", OPEN + 60, 2.1)],
+        ])
+        feed = QuoteFeed(store, source)
+        received = {"nvda": [], "both": []}
+
+        feed.subscribe(["NVDA"], lambda updates: received["nvda"].append(updates))
+
+        async def on_both(updates):
+            received["both"].append(updates)
+        feed.subscribe(["NVDA", "AMD"], on_both)
+
+        for _ in range(4):
+            await feed.poll_once()
+        return source, received
+
+    source, received = asyncio.run(scenario())
+    assert source.requested == [["AMD", "NVDA"]] * 4
+    assert [sorted(update) for update in received["both"]] == [["AMD", "NVDA"], ["NVDA"], ["AMD", "NVDA"]]
+    assert [list(update) for update in received["nvda"]] == [["NVDA"]] * 3
+    # After a revision, the next delivery starts at the revised bar
+    assert list(received["nvda"][1]["NVDA"].close) == [1.5]
+    assert list(received["nvda"][2]["NVDA"].close) == [1.5, 1.6]
+
+def test_failing_subscriber_does_not_block_others():
+    async def scenario():
+        store = IntradayBarStore()
+        feed = QuoteFeed(store, ScriptedSource(store, [[("NVDA", OPEN, 1.0)]]))
+        delivered = []
+        subscription = feed.subscribe(["NVDA"], lambda updates: 1 / 0)
+        feed.subscribe(["NVDA"], delivered.append)
+        await feed.poll_once()
+        feed.unsubscribe(subscription)
+        return feed, delivered
+
+    feed, delivered = asyncio.run(scenario())
+    assert len(delivered) == 1
+    assert feed.subscribed_symbols() == ["NVDA"]
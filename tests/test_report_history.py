@@ -0,0 +1,20 @@
+from metta.report_history import ReportHistory
+
+def article(title):
+    return {"title": title, "source": "Wire", "published": "2026-10-16"}
+
+def test_covered_and_dismissed_articles_are_skipped_by_later_reports(tmp_path):
+    path = str(tmp_path / "report_history.json")
+    ReportHistory(path).record("Chip stocks rallied.", [article("TSMC beats estimates")],
+                               dismissed=[article("Minor supplier update")])
+
+    history = ReportHistory(path)
+    fetched = [article("TSMC  Beats Estimates"), article("Minor supplier update"), article("Nvidia unveils new GPU")]
+    assert [a["title"] for a in history.unseen(fetched)] == ["Nvidia unveils new GPU"]
+    assert "Chip stocks rallied." in history.previous_context()
+
+def test_old_reports_fall_out_of_the_history(tmp_path):
+    history = ReportHistory(str(tmp_path / "report_history.json"), length=2)
+    for hour in range(3):
+        history.record(f"Report {hour}", [article(f"Story {hour}")])
+    assert [a["title"] for a in history.unseen([article("Story 0"), article("Story 2")])] == ["Story 0"]
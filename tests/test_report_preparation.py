@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+
+pytest.importorskip("hyperon")
+pytest.importorskip("openai")
+from metta.scheduler import REPORT_LEAD_MINUTES, ScheduledTaskManager
+
+def manager_with(prepared):
+    """A task manager holding `prepared`, whose fresh gathering returns "gathered now" """
+    manager = ScheduledTaskManager.__new__(ScheduledTaskManager)
+    manager.gathered = 0
+
+    async def gather():
+        manager.gathered += 1
+        return {"context": "gathered now"}
+    manager._prepare_report_context = gather
+    manager._prepared_report = prepared
+    return manager
+
+def take(started_ago, context=None, error=None):
+    async def scenario():
+        async def prepare():
+            await asyncio.sleep(0.01)
+            if error:
+                raise error
+            return context
+        prepared = (datetime.now() - started_ago, asyncio.create_task(prepare()))
+        manager = manager_with(prepared)
+        result = await manager._take_prepared_context()
+        return manager, result
+    return asyncio.run(scenario())
+
+def test_fresh_prepared_context_is_used_once():
+    manager, result = take(timedelta(minutes=REPORT_LEAD_MINUTES), context={"context": "prepared"})
+    assert result == {"context": "prepared"}
+    assert manager.gathered == 0 and manager._prepared_report is None
+
+def test_stale_prepared_context_is_gathered_again():
+    manager, result = take(timedelta(minutes=REPORT_LEAD_MINUTES + 30), context={"context": "prepared"})
+    assert result == {"context": "gathered now"} and manager.gathered == 1
+
+def test_failed_preparation_is_gathered_again():
+    manager, result = take(timedelta(minutes=1), error=RuntimeError("news feed down"))
+    assert result == {"context": "gathered now"} and manager.gathered == 1
+
+def test_without_preparation_the_context_is_gathered():
+    manager = manager_with(None)
+    assert asyncio.run(manager._take_prepared_context()) == {"context": "gathered now"}
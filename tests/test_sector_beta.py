@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from metta.sector_beta import MIN_BETA_OBSERVATIONS, SectorBetas, sector_betas
+
+def test_betas_to_the_equal_weighted_sector():
+    rng = np.random.default_rng(0)
+    sector = rng.normal(0, 0.02, 60)
+    returns = np.column_stack([sector * 0.5, sector * 1.5, sector])
+    assert np.allclose(sector_betas(returns), [0.5, 1.5, 1.0])
+
+def test_missing_days_are_masked_pairwise():
+    rng = np.random.default_rng(1)
+    sector = rng.normal(0, 0.02, 60)
+    returns = np.column_stack([sector * 2, sector, sector * 0])
+    returns[::7, 0] = np.nan  # holidays on another calendar
+    betas = sector_betas(returns)
+    assert np.all(np.isfinite(betas))
+    assert betas[0] > betas[1] > betas[2]
+
+def test_short_histories_have_no_beta():
+    returns = np.random.default_rng(2).normal(0, 0.02, (60, 2))
+    returns[: 60 - MIN_BETA_OBSERVATIONS + 1, 1] = np.nan
+    betas = sector_betas(returns)
+    assert np.isfinite(betas[0]) and np.isnan(betas[1])
+
+class FakeFetcher:
+    def __init__(self, closes):
+        self.closes = closes
+        self.syncs = 0
+        self.history_store = self
+
+    def sync_history(self, symbols, period, interval):
+        self.syncs += 1
+
+    def read_frame(self, symbol, interval, period):
+        closes = self.closes.get(symbol, [])
+        index = pd.date_range("2026-07-01", periods=len(closes), freq="B", tz="America/New_York")
+        return pd.DataFrame({"Close": closes}, index=index)
+
+def test_betas_are_computed_once_per_day_and_universe():
+    sector = np.cumprod(1 + np.random.default_rng(3).normal(0, 0.02, 61)) * 100
+    fetcher = FakeFetcher({"NVDA": sector ** 2 / 100, "INTC": sector, "AMD": sector})
+    betas = SectorBetas(fetcher)
+
+    first = betas.betas(["NVDA", "INTC", "AMD", "UNKNOWN"])
+    assert set(first) == {"NVDA", "INTC", "AMD"}
+    assert first["NVDA"] > first["INTC"]
+    betas.betas(["UNKNOWN", "AMD", "INTC", "NVDA"])
+    assert fetcher.syncs == 1
+    betas.betas(["NVDA", "INTC"])
+    assert fetcher.syncs == 2
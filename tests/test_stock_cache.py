@@ -0,0 +1,43 @@
+from metta import stock_cache
+from metta.stock_cache import StockHistoryCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(stock_cache.time, "monotonic", clock)
+    cache = StockHistoryCache()
+    cache.put(("NVDA", "1m"), "bars", ttl=cache.ttl_for("1m"))
+    clock.now += 59
+    assert cache.get(("NVDA", "1m")) == "bars"
+    clock.now += 1
+    assert cache.get(("NVDA", "1m")) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_ttls_follow_the_bar_interval():
+    cache = StockHistoryCache(default_ttl=42)
+    assert cache.ttl_for("1m") < cache.ttl_for("1d") < cache.ttl_for("1mo")
+    assert cache.ttl_for("unknown") == 42
+
+def test_least_recently_used_entry_is_evicted():
+    cache = StockHistoryCache(max_entries=2)
+    cache.put(("NVDA", "1d"), 1)
+    cache.put(("AMD", "1d"), 2)
+    cache.get(("NVDA", "1d"))
+    cache.put(("INTC", "1d"), 3)
+    assert cache.get(("AMD", "1d")) is None
+    assert cache.get(("NVDA", "1d")) == 1 and cache.get(("INTC", "1d")) == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_invalidate_one_symbol():
+    cache = StockHistoryCache()
+    cache.put(("NVDA", "1d"), 1)
+    cache.put(("NVDA", "1m"), 2)
+    cache.put(("AMD", "1d"), 3)
+    cache.invalidate("NVDA")
+    assert cache.stats()["entries"] == 1 and cache.get(("AMD", "1d")) == 3
@@ -0,0 +1,63 @@
+import pandas as pd
+from metta.fundamentals import FundamentalsCache
+from metta.history_store import HistoryStore
+from metta.market_data_provider import MarketDataProvider
+from metta.stock_data import StockDataFetcher
+
+NEW_YORK = "America/New_York"
+
+def minute_bars(closes, start="2026-10-16 10:00"):
+    index = pd.date_range(start, periods=len(closes), freq="1min", tz=NEW_YORK)
+    return pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 100.0},
+                        index=index)
+
+def daily_bars(closes, last_day):
+    index = pd.date_range(end=last_day, periods=len(closes), freq="B", tz=NEW_YORK)
+    return pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 1e6},
+                        index=index)
+
+class FakeProvider(MarketDataProvider):
+    def __init__(self, intraday, daily, info=None):
+        self.intraday, self.daily, self._info = intraday, daily, info or {}
+        self.info_calls = []
+
+    def history(self, symbol, interval="1d", period=None, start=None):
+        return self.download([symbol], interval, period, start).get(symbol, pd.DataFrame())
+
+    def download(self, symbols, interval="1d", period=None, start=None):
+        source = self.intraday if interval == "1m" else self.daily
+        return {symbol: source[symbol] for symbol in symbols if symbol in source}
+
+    def info(self, symbol):
+        self.info_calls.append(symbol)
+        return self._info.get(symbol, {})
+
+def make_fetcher(tmp_path, provider):
+    fetcher = StockDataFetcher(provider)
+    fetcher.history_store = HistoryStore(root=str(tmp_path))
+    fetcher.fundamentals = FundamentalsCache(str(tmp_path / "fundamentals.json"))
+    return fetcher
+
+def test_bulk_quotes_take_previous_close_from_the_last_completed_session(tmp_path):
+    provider = FakeProvider(
+        intraday={"NVDA": minute_bars([110.0, 111.0]), "AMD": minute_bars([200.0, 198.0])},
+        # NVDA's daily bars already include today's bar in progress; AMD's end yesterday
+        daily={"NVDA": daily_bars([98.0, 100.0, 111.0], "2026-10-16"),
+               "AMD": daily_bars([190.0, 220.0], "2026-10-15")},
+    )
+    quotes = make_fetcher(tmp_path, provider).get_bulk_quotes(["NVDA", "AMD"])
+
+    assert quotes["NVDA"]["current"]["previous_close"] == 100.0
+    assert quotes["NVDA"]["current"]["change_percent"] == 11.0
+    assert quotes["AMD"]["current"]["previous_close"] == 220.0
+    assert list(quotes["NVDA"]["bars"].close) == [110.0, 111.0]
+    assert provider.info_calls == []
+
+def test_bulk_quotes_fall_back_to_fundamentals_without_daily_bars(tmp_path):
+    provider = FakeProvider(intraday={"NVDA": minute_bars([110.0])}, daily={},
+                            info={"NVDA": {"previousClose": 100.0, "sharesOutstanding": 10.0}})
+    quotes = make_fetcher(tmp_path, provider).get_bulk_quotes(["NVDA", "MISSING"], with_fundamentals=True)
+
+    assert set(quotes) == {"NVDA"}
+    assert quotes["NVDA"]["current"]["previous_close"] == 100.0
+    assert quotes["NVDA"]["current"]["market_cap"] == 1100
@@ -0,0 +1,50 @@
+import pytest
+from metta.symbol_index import DEFAULT_ALIASES, SymbolResolver
+
+COMPANIES = {
+    "NVIDIA": "NVDA", "TSMC": "TSM", "Intel": "INTC", "AMD": "AMD",
+    "Texas Instruments": "TXN", "Micron": "MU", "Applied Materials": "AMAT",
+    "Lam Research": "LRCX", "SK Hynix": "000660.KS", "Samsung": "005930.KS",
+    "Tokyo Electron": "8035.T", "KLA Corporation": "KLAC",
+}
+
+@pytest.fixture
+def resolver():
+    return SymbolResolver(COMPANIES, DEFAULT_ALIASES)
+
+@pytest.mark.parametrize("query, symbol", [
+    ("NVIDIA", "NVDA"),
+    ("nvda", "NVDA"),
+    ("Taiwan Semiconductor", "TSM"),
+    ("2330.TW", "TSM"),
+    ("005930", "005930.KS"),
+    ("KLA Corp.", "KLAC"),
+    ("What is the Micron stock price", "MU"),
+])
+def test_exact_and_phrase_lookups(resolver, query, symbol):
+    assert resolver.resolve(query) == symbol
+
+@pytest.mark.parametrize("query, symbol", [
+    ("Lam", "LRCX"),
+    ("Applied", "AMAT"),
+    ("Texas", "TXN"),
+    ("SK", "000660.KS"),
+    ("Tokyo", "8035.T"),
+    ("Lam stock", "LRCX"),
+    ("Lam Research Corp", "LRCX"),
+])
+def test_partial_names_still_resolve(resolver, query, symbol):
+    assert resolver.resolve(query) == symbol
+
+def test_short_keys_only_match_a_whole_query(resolver):
+    assert resolver.resolve("MU") == "MU"
+    assert resolver.resolve("tell me about semiconductors") is None
+
+def test_ambiguous_keys_resolve_to_nothing():
+    resolver = SymbolResolver({"Applied Materials": "AMAT", "Applied Optoelectronics": "AAOI"})
+    assert resolver.resolve("Applied") is None
+    assert resolver.resolve("Applied Materials") == "AMAT"
+
+@pytest.mark.parametrize("query", ["Intelligence", "artificial intelligence", "Camden", "AMDOCS", "Instrumental"])
+def test_names_inside_other_words_do_not_match(resolver, query):
+    assert resolver.resolve(query) is None
@@ -0,0 +1,65 @@
+import numpy as np
+from metta.bar_store import IntradayBarStore
+from metta.volatility_scan import VolatilityScanner
+
+OPEN = 1_760_000_400  # some bar open, epoch seconds
+THRESHOLDS = {"high": 5.0, "extreme": 10.0}
+SYMBOLS = ["NVDA", "AMD", "INTC", "TSM", "MU", "AVGO"]
+
+def store_with(closes_by_symbol):
+    store = IntradayBarStore()
+    for symbol, closes in closes_by_symbol.items():
+        for i, close in enumerate(closes):
+            store.append_bar(symbol, OPEN + 60 * i, close, close, close, close, 100.0)
+    return store
+
+def flat(minutes=61, price=100.0):
+    return [price] * minutes
+
+def test_flags_the_largest_move_at_the_worst_severity():
+    closes = {symbol: flat() for symbol in SYMBOLS}
+    closes["NVDA"] = flat(50) + [104.0] * 10 + [112.0]
+    result = VolatilityScanner(store_with(closes)).scan(SYMBOLS, THRESHOLDS)
+
+    assert result.changes.shape == (len(SYMBOLS), len(result.windows))
+    nvda = result.symbols.index("NVDA")
+    assert np.allclose(result.changes[nvda, result.windows.index("1 minute")], 112 / 104 * 100 - 100)
+    assert [move["symbol"] for move in result.triggered()] == ["NVDA"]
+    move = result.triggered()[0]
+    assert move["severity"] == "extreme"
+    assert move["change_percent"] == 12.0 and move["previous_price"] == 100.0
+
+def test_windows_before_the_first_bar_start_from_the_open():
+    closes = {"NVDA": [100.0, 101.0, 106.0]}
+    result = VolatilityScanner(store_with(closes)).scan(["NVDA"], THRESHOLDS)
+    changes = dict(zip(result.windows, result.changes[0]))
+    assert np.isclose(changes["60 minutes"], 6.0) and np.isclose(changes["since open"], 6.0)
+
+def test_sector_wide_move_flags_the_sector_not_its_members():
+    closes = {symbol: flat(55) + [107.0] * 6 for symbol in SYMBOLS}
+    result = VolatilityScanner(store_with(closes)).scan(SYMBOLS, THRESHOLDS, betas={})
+
+    assert result.triggered() == []
+    sector = result.sector_triggered()
+    assert sector["severity"] == "high" and np.isclose(sector["change_percent"], 7.0)
+    assert sector["symbols"] == len(SYMBOLS)
+
+def test_volatility_scaled_thresholds():
+    closes = {"NVDA": flat(60) + [101.5], "AMD": flat(60) + [100.5]}
+    result = VolatilityScanner(store_with(closes)).scan(
+        ["NVDA", "AMD"], THRESHOLDS, sigmas={"NVDA": 0.1, "AMD": 0.05},
+        sigma_thresholds={"high": 4.0, "extreme": 6.0, "min_percent": 1.0}
+    )
+    # NVDA moved 15 sigma in a minute; AMD 10 sigma but below the 1% floor
+    assert [(move["symbol"], move["severity"]) for move in result.triggered()] == [("NVDA", "extreme")]
+    assert np.isclose(result.triggered()[0]["zscore"], 15.0)
+
+def test_stale_symbols_are_left_out():
+    closes = {"NVDA": flat()}
+    result = VolatilityScanner(store_with(closes)).scan(["NVDA", "UNKNOWN"], THRESHOLDS, max_age=60)
+    assert result.symbols == []
+
+def test_alert_prices_are_rounded_to_cents():
+    closes = {"NVDA": flat(60, price=172.51000213623047) + [181.22999572753906]}
+    move = VolatilityScanner(store_with(closes)).scan(["NVDA"], THRESHOLDS).triggered()[0]
+    assert move["current_price"] == 181.23 and move["previous_price"] == 172.51
@@ -0,0 +1,58 @@
+import math
+import numpy as np
+from metta.bar_store import IntradayBarStore
+from metta.volatility_stats import SymbolVolatility, VolatilityStats
+
+OPEN = 1_760_000_400  # some bar open, epoch seconds
+
+def test_ewma_variance_follows_the_recurrence():
+    stats = SymbolVolatility(halflife=2.0)
+    closes = [100.0, 101.0, 100.0, 102.0]
+    for i, close in enumerate(closes):
+        stats.update(OPEN + 60 * i, close, close, close)
+
+    alpha = 1 - 0.5 ** (1 / 2.0)
+    returns = [(b / a - 1) * 100 for a, b in zip(closes, closes[1:])]
+    expected = returns[0] ** 2
+    for change in returns[1:]:
+        expected = (1 - alpha) * expected + alpha * change ** 2
+    assert math.isclose(stats.ewma_variance, expected)
+    assert math.isclose(stats.ewma_volatility, math.sqrt(expected))
+    assert stats.count == 3
+
+def test_rolling_window_matches_numpy():
+    stats = SymbolVolatility(window=5)
+    closes = 100 + np.cumsum(np.sin(np.arange(12)))
+    for i, close in enumerate(closes):
+        stats.update(OPEN + 60 * i, close, close, close)
+
+    returns = (closes[1:] / closes[:-1] - 1) * 100
+    assert math.isclose(stats.mean, returns[-5:].mean())
+    assert math.isclose(stats.variance, returns[-5:].var(ddof=1))
+
+def test_gaps_do_not_form_returns():
+    stats = SymbolVolatility()
+    stats.update(OPEN, 100.0, 100.0, 100.0)
+    stats.update(OPEN + 3600, 110.0, 110.0, 110.0)
+    assert stats.count == 0 and stats.ewma_variance is None
+
+def test_observe_folds_in_completed_bars_once():
+    store = IntradayBarStore()
+    for i in range(40):
+        close = 100.0 + (i % 2)
+        store.append_bar("NVDA", OPEN + 60 * i, close, close + 0.1, close - 0.1, close, 100.0)
+
+    stats = VolatilityStats(min_samples=30)
+    assert stats.observe("NVDA", store.session("NVDA")) == 39
+    assert stats.observe("NVDA", store.session("NVDA")) == 0
+    assert stats.get("NVDA").count == 38
+    assert stats.sigma("NVDA") is not None and set(stats.sigmas(["NVDA", "AMD"])) == {"NVDA"}
+
+def test_sigma_waits_for_enough_samples():
+    store = IntradayBarStore()
+    for i in range(5):
+        store.append_bar("NVDA", OPEN + 60 * i, 100.0, 100.0, 100.0, 100.0 + i, 100.0)
+    stats = VolatilityStats(min_samples=30)
+    stats.observe("NVDA", store.session("NVDA"))
+    assert stats.sigma("NVDA") is None
+    assert stats.snapshot("NVDA")["samples"] == 3